@@ -0,0 +1,300 @@
+"""
+帳簿サービスのベンチマーク
+
+合成した勘定科目表 (既定 500 勘定) と仕訳 (既定 10,000 件) で、MCP ツールを FastMCP 経由で呼び出し、
+転記スループット・取得ツールのレイテンシ・ピークメモリを計測して JSON で出力する。
+GUI モードでは offscreen の Qt で BokicastService を起動し、本番と同じく Qt スレッドで転記する。
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_service.py --journals 100000 --output bench.json
+    python benchmarks/bench_service.py --headless --journals 10000 --batch 100
+
+計測フェーズ:
+  write : 仕訳を journal_entry (--batch 指定時は journal_entries) で転記し、件数/秒とレイテンシを計測
+  read  : get_bs / get_pl / get_trial_balance / get_t_account を --reads 回ずつ呼び出し、レイテンシを計測
+  mixed : 転記と取得を並行して --mixed-seconds 秒間実行し、負荷時のレイテンシを計測
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from threading import Thread
+from typing import Any, Awaitable, Callable, Iterator
+
+# 💡 リポジトリから直接実行した場合もパッケージを読み込めるようにする
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from bokicast_mcp_server import mod_service
+
+# 合成する勘定科目表のカテゴリ別の割合
+CATEGORY_RATIOS = {"資産": 0.4, "負債": 0.16, "純資産": 0.04, "費用": 0.24, "収益": 0.16}
+
+# 資産・負債の勘定ごとの期首残高
+OPENING_BALANCE = 1_000_000
+
+
+#
+# 合成データ
+#
+def make_config(account_count: int) -> dict[str, Any]:
+    """account_count 勘定の期首残高試算表を持つ設定を作成します。貸借差額は資本金で調整します。"""
+    opening: dict[str, dict[str, int]] = {}
+    for category, ratio in CATEGORY_RATIOS.items():
+        count = max(1, int(account_count * ratio))
+        opening[category] = {f"{category}{i:03d}": 0 for i in range(count)}
+
+    for account_name in opening["資産"]:
+        opening["資産"][account_name] = OPENING_BALANCE
+    for account_name in opening["負債"]:
+        opening["負債"][account_name] = OPENING_BALANCE
+    opening["純資産"]["資本金"] = OPENING_BALANCE * (len(opening["資産"]) - len(opening["負債"]))
+
+    return {
+        "フォント": {"種別": "Meiryo UI", "サイズ": 14},
+        "モード": "個別",
+        "期首残高試算表": opening
+    }
+
+
+def iter_journals(conf: dict[str, Any], rng: random.Random, prefix: str = "B") -> Iterator[dict[str, Any]]:
+    """借方・貸方それぞれ1～3明細の、貸借が一致する仕訳を順に作成します。"""
+    accounts = [name for accounts in conf["期首残高試算表"].values() for name in accounts]
+    for i in itertools.count():
+        debit = [{"account": rng.choice(accounts), "amount": rng.randint(1, 100_000)} for _ in range(rng.randint(1, 3))]
+        total = sum(item["amount"] for item in debit)
+
+        credit_accounts = [rng.choice(accounts) for _ in range(rng.randint(1, 3))]
+        amounts = [total // len(credit_accounts)] * len(credit_accounts)
+        amounts[0] += total - sum(amounts)
+        credit = [{"account": name, "amount": amount} for name, amount in zip(credit_accounts, amounts)]
+
+        yield {
+            "journal_id": f"{prefix}{i:07d}",
+            "debit": debit,
+            "credit": credit,
+            "date": f"2025-{rng.randint(4, 12):02d}-{rng.randint(1, 28):02d}"
+        }
+
+
+#
+# 計測
+#
+def summarize(latencies: list[float]) -> dict[str, Any]:
+    """レイテンシ (秒) のリストを、件数・平均・p50・p99・最大 (ミリ秒) にまとめます。"""
+    if not latencies:
+        return {"count": 0}
+
+    ordered = sorted(latencies)
+
+    def percentile(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50_ms": round(percentile(50), 3),
+        "p99_ms": round(percentile(99), 3),
+        "max_ms": round(ordered[-1] * 1000, 3)
+    }
+
+
+def peak_rss_mb() -> float | None:
+    """プロセスのピーク RSS (MB) を返します。取得できない環境では None を返します。"""
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # 💡 Linux は KB、macOS はバイト
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def call_tool(name: str, arguments: dict[str, Any]) -> str:
+    """FastMCP 経由でツールを呼び出し、結果の文字列を返します。"""
+    result = await mod_service.mcp.call_tool(name, arguments)
+    content = result[0] if isinstance(result, tuple) else result
+    return content[0].text
+
+
+async def timed(latencies: list[float], call: Callable[[], Awaitable[str]]) -> str:
+    start = time.perf_counter()
+    text = await call()
+    latencies.append(time.perf_counter() - start)
+    return text
+
+
+#
+# フェーズ
+#
+async def run_write(journals: list[dict[str, Any]], batch: int) -> dict[str, Any]:
+    latencies: list[float] = []
+    errors = 0
+    start = time.perf_counter()
+
+    if batch > 0:
+        for i in range(0, len(journals), batch):
+            text = await timed(latencies, lambda: call_tool("journal_entries", {"journals_data": json.dumps(journals[i:i + batch], ensure_ascii=False)}))
+            errors += text.count('"status": "error"')
+    else:
+        for journal in journals:
+            text = await timed(latencies, lambda: call_tool("journal_entry", {"journal_data": json.dumps(journal, ensure_ascii=False)}))
+            errors += '"status": "ok"' not in text
+
+    elapsed = time.perf_counter() - start
+    return {
+        "journals": len(journals),
+        "seconds": round(elapsed, 3),
+        "journals_per_sec": round(len(journals) / elapsed, 1),
+        "errors": errors,
+        "latency": summarize(latencies)
+    }
+
+
+def read_calls(conf: dict[str, Any], rng: random.Random) -> dict[str, Callable[[], Awaitable[str]]]:
+    accounts = [name for accounts in conf["期首残高試算表"].values() for name in accounts]
+    return {
+        "get_bs": lambda: call_tool("get_bs", {}),
+        "get_pl": lambda: call_tool("get_pl", {}),
+        "get_trial_balance": lambda: call_tool("get_trial_balance", {}),
+        "get_t_account": lambda: call_tool("get_t_account", {"accout_name": rng.choice(accounts)}),
+        "get_t_account_summary": lambda: call_tool("get_t_account", {"accout_name": rng.choice(accounts), "summary": True})
+    }
+
+
+async def run_read(conf: dict[str, Any], reads: int, rng: random.Random) -> dict[str, Any]:
+    results = {}
+    for name, call in read_calls(conf, rng).items():
+        latencies: list[float] = []
+        for _ in range(reads):
+            await timed(latencies, call)
+        results[name] = summarize(latencies)
+
+    return results
+
+
+async def run_mixed(conf: dict[str, Any], seconds: float, readers: int, rng: random.Random) -> dict[str, Any]:
+    """1つの転記タスクと readers 個の取得タスクを seconds 秒間並行して実行します。"""
+    deadline = time.perf_counter() + seconds
+    write_latencies: list[float] = []
+    read_latencies: dict[str, list[float]] = {}
+    calls = read_calls(conf, rng)
+
+    async def writer():
+        for journal in iter_journals(conf, rng, prefix="M"):
+            if time.perf_counter() >= deadline:
+                return
+            await timed(write_latencies, lambda: call_tool("journal_entry", {"journal_data": json.dumps(journal, ensure_ascii=False)}))
+
+    async def reader():
+        names = list(calls)
+        while time.perf_counter() < deadline:
+            name = rng.choice(names)
+            await timed(read_latencies.setdefault(name, []), calls[name])
+
+    await asyncio.gather(writer(), *(reader() for _ in range(readers)))
+
+    return {
+        "seconds": seconds,
+        "readers": readers,
+        "journal_entry": summarize(write_latencies),
+        **{name: summarize(latencies) for name, latencies in sorted(read_latencies.items())}
+    }
+
+
+async def run(args: argparse.Namespace, conf: dict[str, Any]) -> dict[str, Any]:
+    rng = random.Random(args.seed)
+    journals = list(itertools.islice(iter_journals(conf, rng), args.journals))
+
+    results = {"write": await run_write(journals, args.batch)}
+    results["read"] = await run_read(conf, args.reads, rng)
+    if args.mixed_seconds > 0:
+        results["mixed"] = await run_mixed(conf, args.mixed_seconds, args.readers, rng)
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            "mode": "headless" if args.headless else "gui",
+            "journals": args.journals,
+            "accounts": args.accounts,
+            "batch": args.batch,
+            "reads": args.reads,
+            "mixed_seconds": args.mixed_seconds,
+            "readers": args.readers,
+            "seed": args.seed
+        },
+        "results": results,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+#
+# main
+#
+def main():
+    parser = argparse.ArgumentParser(description="bokicast-mcp-server benchmark")
+    parser.add_argument("--journals", type=int, default=10_000, help="転記する仕訳の件数")
+    parser.add_argument("--accounts", type=int, default=500, help="勘定科目数")
+    parser.add_argument("--batch", type=int, default=0, help="journal_entries 1回あたりの仕訳数 (0 の場合は journal_entry で1件ずつ)")
+    parser.add_argument("--reads", type=int, default=200, help="取得ツールごとの呼び出し回数")
+    parser.add_argument("--mixed-seconds", type=float, default=5.0, help="転記と取得を並行する秒数 (0 の場合は省略)")
+    parser.add_argument("--readers", type=int, default=4, help="並行フェーズの取得タスク数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    parser.add_argument("--headless", action="store_true", help="Qt を使わずに帳簿サービスのみで計測する")
+    parser.add_argument("--output", help="結果の JSON の出力先 (省略時は標準出力)")
+    args = parser.parse_args()
+
+    conf = make_config(args.accounts)
+    report: dict[str, Any] = {}
+
+    if args.headless:
+        from bokicast_mcp_server.mod_book_service import BookRegistry
+
+        mod_service._headless = True
+        mod_service._service = BookRegistry(conf)
+        report = asyncio.run(run(args, conf))
+    else:
+        from PySide6.QtWidgets import QApplication
+        from bokicast_mcp_server.mod_bokicast_service import BokicastService
+
+        app = QApplication(sys.argv)
+        service = BokicastService.instance(conf)
+        mod_service._service = service
+
+        # 💡 本番と同じく、ツールは別スレッドのイベントループから Qt スレッドへ転記を依頼する
+        def worker():
+            nonlocal report
+            try:
+                report = asyncio.run(run(args, conf))
+            finally:
+                service.invoke(app.quit)
+
+        Thread(target=worker, daemon=True).start()
+        app.exec()
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
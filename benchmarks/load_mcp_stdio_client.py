@@ -0,0 +1,307 @@
+"""
+stdio MCP 負荷生成クライアント
+
+tests/mock_mcp_stdio_client_sdk.py と同じく MCP SDK の stdio_client でサーバを起動し、
+journal_entry と取得ツールを指定した割合・目標レートで並行して呼び出して、
+ツールごとのレイテンシのヒストグラムとエラー率を JSON で出力する。
+
+    python benchmarks/load_mcp_stdio_client.py -y bokicast-mcp-server.yaml --rate 200 --duration 30 \\
+        --mix journal_entry=6,get_bs=2,get_pl=1,get_t_account=1 --headless
+
+連結帳簿 (--entity 連結) は参照専用のため、--mix に journal_entry を指定できない。
+
+リクエストは目標レートの予定時刻に発行し (オープンループ)、レイテンシは予定時刻から応答までを計測する。
+サーバの stdio ループが詰まると、応答待ちだけでなく発行待ちの時間もレイテンシに現れる。
+service_ms は実際に送信してから応答までの時間。
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import yaml
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+#
+# global setting.
+#
+sys.stdout.reconfigure(encoding='utf-8')
+sys.stderr.reconfigure(encoding='utf-8')
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# 💡 リポジトリから直接実行した場合もパッケージを読み込めるようにする
+sys.path.insert(0, str(REPO_ROOT))
+
+# ヒストグラムはサーバの get_server_stats と同じ区切りで集計する
+from bokicast_mcp_server.mod_metrics import ToolMetrics
+from bokicast_mcp_server.mod_book_service import CONSOLIDATED_ENTITY, DEFAULT_ENTITY, find_entities
+from bokicast_mcp_server.mod_consolidation import strip_entity_prefix
+
+DEFAULT_MIX = "journal_entry=6,get_bs=2,get_pl=1,get_t_account=1"
+
+
+#
+# 計測
+#
+class ToolStats:
+    """ツール1つ分の呼び出し結果 (レイテンシ・エラー件数)。"""
+
+    def __init__(self):
+        self.metrics = ToolMetrics()
+        self.latencies: list[float] = []
+        self.service_times: list[float] = []
+        self.error_samples: list[str] = []
+
+    def record(self, latency: float, service_time: float, error: str | None):
+        self.metrics.record(latency, error is not None)
+        self.latencies.append(latency)
+        self.service_times.append(service_time)
+        if error is not None and len(self.error_samples) < 5:
+            self.error_samples.append(error[:200])
+
+    def to_dict(self) -> dict[str, Any]:
+        count = self.metrics.count
+        errors = self.metrics.errors
+        result = {
+            "count": count,
+            "errors": errors,
+            "error_rate": round(errors / count, 4) if count else 0.0,
+            "latency": summarize(self.latencies),
+            "service": summarize(self.service_times),
+            "histogram_ms": self.metrics.histogram()
+        }
+        if self.error_samples:
+            result["error_samples"] = self.error_samples
+        return result
+
+
+def summarize(values: list[float]) -> dict[str, float]:
+    """秒のリストを p50 / p90 / p99 / 最大 (ミリ秒) にまとめます。"""
+    if not values:
+        return {}
+
+    ordered = sorted(values)
+
+    def percentile(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 3)
+
+    return {"p50_ms": percentile(50), "p90_ms": percentile(90), "p99_ms": percentile(99), "max_ms": round(ordered[-1] * 1000, 3)}
+
+
+#
+# リクエスト
+#
+def parse_mix(text: str) -> dict[str, int]:
+    """"journal_entry=6,get_bs=2" 形式の文字列を {ツール名: 重み} に変換します。"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+
+def entity_accounts(conf: dict[str, Any], entity: str) -> list[str]:
+    """
+    エンティティの勘定科目名を返します。
+    連結帳簿の場合は、親会社・子会社の勘定科目を連結勘定 (勘定対応、または接頭辞を除いた名前) に読み替えます。
+    """
+    if entity != CONSOLIDATED_ENTITY:
+        opening = conf.get(entity or DEFAULT_ENTITY) or {}
+        return [name for accounts in opening.values() for name in accounts]
+
+    cons_conf = conf.get("連結") or {}
+    subsidiaries = cons_conf.get("子会社") or []
+    if isinstance(subsidiaries, str):
+        subsidiaries = [subsidiaries]
+    account_map = cons_conf.get("勘定対応") or {}
+
+    names = {}
+    for member in [cons_conf.get("親会社")] + list(subsidiaries):
+        for name in entity_accounts(conf, member):
+            names[account_map.get(name, strip_entity_prefix(name))] = None
+    return list(names)
+
+
+def validate_args(parser: argparse.ArgumentParser, args: argparse.Namespace, conf: dict[str, Any]):
+    """エンティティと --mix の組み合わせを検証し、不正な場合は parser.error で終了します。"""
+    entities = find_entities(conf) + ([CONSOLIDATED_ENTITY] if conf.get("モード") == "連結" else [])
+    if (args.entity or DEFAULT_ENTITY) not in entities:
+        parser.error(f"エンティティ '{args.entity}' は {args.yaml} に存在しません。{' | '.join(entities)} を指定してください。")
+
+    mix = parse_mix(args.mix)
+    if not mix.get("journal_entry"):
+        return
+    if args.entity == CONSOLIDATED_ENTITY:
+        parser.error("連結帳簿は参照専用のため、--mix に journal_entry は指定できません。")
+    if len(entity_accounts(conf, args.entity)) < 2:
+        parser.error(f"エンティティ '{args.entity or DEFAULT_ENTITY}' の勘定科目が2つ未満のため、journal_entry を作成できません。")
+
+
+class RequestFactory:
+    """エンティティの勘定科目を使って、ツールの引数を作成する。"""
+
+    def __init__(self, conf: dict[str, Any], entity: str, rng: random.Random):
+        self.accounts = entity_accounts(conf, entity)
+        self.entity = entity
+        self.rng = rng
+        self.sequence = 0
+
+    def arguments(self, tool: str) -> dict[str, Any]:
+        arguments: dict[str, Any] = {"entity": self.entity} if self.entity else {}
+        if tool == "journal_entry":
+            self.sequence += 1
+            amount = self.rng.randint(1, 10_000)
+            debit, credit = self.rng.sample(self.accounts, 2)
+            arguments["journal_data"] = json.dumps({
+                "journal_id": f"L{self.sequence:07d}",
+                "debit": [{"account": debit, "amount": amount}],
+                "credit": [{"account": credit, "amount": amount}]
+            }, ensure_ascii=False)
+        elif tool == "get_t_account":
+            arguments["accout_name"] = self.rng.choice(self.accounts)
+
+        return arguments
+
+
+def result_error(result: Any) -> str | None:
+    """ツールの結果がエラーの場合はその内容を、正常な場合は None を返します。"""
+    text = "".join(getattr(content, "text", "") for content in result.content)
+    if result.isError or text.startswith("エラーが発生しました"):
+        return text
+    if '"status": "error"' in text or '"status": "unknown"' in text:
+        return text
+    return None
+
+
+#
+# 負荷生成
+#
+async def run_load(session: ClientSession, args: argparse.Namespace, factory: RequestFactory) -> dict[str, Any]:
+    mix = parse_mix(args.mix)
+    tools, weights = list(mix), list(mix.values())
+    stats = {tool: ToolStats() for tool in tools}
+    semaphore = asyncio.Semaphore(args.concurrency)
+    in_flight = 0
+    max_in_flight = 0
+
+    async def request(tool: str, arguments: dict[str, Any], scheduled: float):
+        nonlocal in_flight, max_in_flight
+        async with semaphore:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            sent = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(session.call_tool(tool, arguments), timeout=args.timeout)
+                error = result_error(result)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            finally:
+                in_flight -= 1
+
+        done = time.perf_counter()
+        stats[tool].record(done - scheduled, done - sent, error)
+
+    tasks = []
+    start = time.perf_counter()
+    total = int(args.rate * args.duration)
+    for i in range(total):
+        # 💡 前の応答を待たずに予定時刻で発行する (オープンループ)
+        scheduled = start + i / args.rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        tool = factory.rng.choices(tools, weights)[0]
+        tasks.append(asyncio.create_task(request(tool, factory.arguments(tool), scheduled)))
+
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    count = sum(tool_stats.metrics.count for tool_stats in stats.values())
+    errors = sum(tool_stats.metrics.errors for tool_stats in stats.values())
+    return {
+        "target_rate": args.rate,
+        "achieved_rate": round(count / elapsed, 1),
+        "seconds": round(elapsed, 3),
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "max_in_flight": max_in_flight,
+        "tools": {tool: tool_stats.to_dict() for tool, tool_stats in stats.items()}
+    }
+
+
+async def main_async(args: argparse.Namespace, conf: dict[str, Any]) -> dict[str, Any]:
+    server_args = ["-m", "bokicast_mcp_server.main", "-y", str(Path(args.yaml).resolve())]
+    if args.headless:
+        server_args.append("--headless")
+
+    env = dict(os.environ)
+    env["PYTHONUTF8"] = "1"
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")]))
+    server_params = StdioServerParameters(command=args.python, args=server_args, env=env)
+
+    with open(args.server_log, "w", encoding="utf-8") as errlog:
+        async with stdio_client(server_params, errlog=errlog) as (read_stream, write_stream):
+            async with ClientSession(read_stream, write_stream) as session:
+                started = time.perf_counter()
+                await session.initialize()
+                initialize_ms = round((time.perf_counter() - started) * 1000, 1)
+
+                factory = RequestFactory(conf, args.entity, random.Random(args.seed))
+                report = await run_load(session, args, factory)
+
+    return {
+        "params": {
+            "yaml": args.yaml,
+            "headless": args.headless,
+            "entity": args.entity,
+            "mix": parse_mix(args.mix),
+            "rate": args.rate,
+            "duration": args.duration,
+            "concurrency": args.concurrency,
+            "seed": args.seed
+        },
+        "initialize_ms": initialize_ms,
+        **report
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bokicast-mcp-server stdio load generator")
+    parser.add_argument("-y", "--yaml", default=str(REPO_ROOT / "bokicast-mcp-server.yaml"), help="サーバに渡す YAML ファイル")
+    parser.add_argument("--headless", action="store_true", help="サーバを --headless で起動する")
+    parser.add_argument("--python", default=sys.executable, help="サーバを起動する Python")
+    parser.add_argument("--entity", default="", help="ツールに渡す entity (省略時は期首残高試算表)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="ツール名=重み のカンマ区切り")
+    parser.add_argument("--rate", type=float, default=50.0, help="目標リクエスト数/秒")
+    parser.add_argument("--duration", type=float, default=10.0, help="負荷をかける秒数")
+    parser.add_argument("--concurrency", type=int, default=64, help="同時に応答待ちにするリクエストの上限")
+    parser.add_argument("--timeout", type=float, default=30.0, help="1リクエストのタイムアウト秒数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    parser.add_argument("--server-log", default=os.devnull, help="サーバの標準エラー出力の保存先")
+    parser.add_argument("--output", help="結果の JSON の出力先 (省略時は標準出力)")
+    args = parser.parse_args()
+
+    with open(args.yaml, "r", encoding="utf-8") as f:
+        conf = yaml.safe_load(f) or {}
+    validate_args(parser, args, conf)
+
+    report = asyncio.run(main_async(args, conf))
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
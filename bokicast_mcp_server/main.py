@@ -11,7 +11,7 @@ import yaml
 import os
 from importlib.metadata import version, PackageNotFoundError
 
-from bokicast_mcp_server import mod_service
+# 💡 mod_service (FastMCP / PySide6) は起動時間を抑えるため、引数の解析後に読み込む
 
 #
 # global setting.
@@ -68,6 +68,26 @@ def main():
         required=True,
         help="設定用の YAML ファイルパスを指定"
     )
+    parser.add_argument(
+        "--transport",
+        choices=["stdio", "sse", "streamable-http"],
+        help="MCP のトランスポートを指定 (YAML の MCP.トランスポート より優先)"
+    )
+    parser.add_argument(
+        "--host",
+        type=str,
+        help="sse / streamable-http で待ち受けるホスト (YAML の MCP.ホスト より優先)"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        help="sse / streamable-http で待ち受けるポート (YAML の MCP.ポート より優先)"
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="画面を表示せず(PySide6 を使用せず)に MCP サーバを起動"
+    )
 
     args = parser.parse_args()
 
@@ -84,7 +104,16 @@ def main():
         logging.info(f"YAML設定を読み込みました: {args.yaml}")
 
         avatar_dict = config.get("avatar", {})
-        mod_service.start(config)
+
+        # コマンドライン引数で MCP の設定を上書きする
+        mcp_conf = config.get("MCP") or {}
+        config["MCP"] = mcp_conf
+        for key, value in [("トランスポート", args.transport), ("ホスト", args.host), ("ポート", args.port)]:
+            if value is not None:
+                mcp_conf[key] = value
+
+        from bokicast_mcp_server import mod_service
+        mod_service.start(config, headless=args.headless)
 
     except Exception as e:
         logging.error(f"不明な例外が発生しました。{e}")
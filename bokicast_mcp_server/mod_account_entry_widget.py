@@ -5,11 +5,25 @@ from PySide6.QtWidgets import (
 from PySide6.QtGui import QFont, QFontMetrics, QMouseEvent
 from PySide6.QtCore import Qt, QPoint
 import sys
+from functools import lru_cache
 from typing import Optional, Tuple
 
 import logging
 logger = logging.getLogger(__name__)
 
+# 💡 文字列幅のメモの上限件数。仕訳ごとに異なるラベルも計測するため、最近使われたものだけを残す
+TEXT_WIDTH_CACHE_SIZE = 4096
+
+# フォント -> QFontMetrics。使用するフォントは数種類のみ
+_font_metrics: dict[str, QFontMetrics] = {}
+
+
+@lru_cache(maxsize=TEXT_WIDTH_CACHE_SIZE)
+def _cached_text_width(font_key: str, text: str) -> int:
+    """フォントと文字列をキーに、文字列の表示幅をメモして返します。"""
+    return _font_metrics[font_key].horizontalAdvance(text)
+
+
 class AccountEntryWidget(QWidget):
     _drag_start_position: QPoint | None = None  # 💡 ドラッグ開始位置を保持するメンバー変数
     _single_row_height: int = 0
@@ -18,6 +32,10 @@ class AccountEntryWidget(QWidget):
     # 💡 スナップ距離を定義（このピクセル数以内に近づくと引っ付く）
     SNAP_DISTANCE = 15 
 
+    # 💡 列幅のベースとなる最小幅と、文字列幅に加えるマージン
+    MIN_COLUMN_WIDTH = 20
+    COLUMN_MARGIN = 20
+
     def __init__(self, parent, title, font, hcolor, enable_drag=True):
         super().__init__(parent)
         
@@ -41,6 +59,8 @@ class AccountEntryWidget(QWidget):
         # ---- フォント設定（パラメータ化） ----
         self.font = font
         self.fm = QFontMetrics(self.font)
+        self._font_key = self.font.key()
+        _font_metrics.setdefault(self._font_key, self.fm)
 
         # ---- レイアウト ----
         self.layout = QVBoxLayout(self)
@@ -67,6 +87,19 @@ class AccountEntryWidget(QWidget):
         self.layout.addStretch()
         self.table.setSizeAdjustPolicy(QAbstractScrollArea.AdjustToContents)
 
+        # 💡 行ごとの勘定科目名・金額(整数)と、勘定科目名 -> 行 の索引
+        #    テーブルのテキストを走査・再解析せずに検索と金額取得を行うため
+        self._names: list[str] = []
+        self._amounts: list[int] = []
+        self._row_index: dict[str, int] = {}
+
+        # 💡 行ごとの必要幅と、その最大値（変更のあったセルのみ計測して更新する）
+        self._row_widths: list[int] = []
+        self._max_column_width = self.MIN_COLUMN_WIDTH
+
+        # 💡 金額の合計（追加・更新・削除のたびに差分で更新する）
+        self._total_amount = 0
+
         # 💡 テーブル単一行の高さを計算
         # QTableWidgetの行高さを取得するため、一時的に行を追加して測定する
         self.table.insertRow(0)
@@ -236,30 +269,48 @@ class AccountEntryWidget(QWidget):
         
         margin = 8
         h = self.header_label.height() + margin
-
-        rows = self.table.rowCount()
-        for i in range(rows):
-            h += self._single_row_height
+        h += self.table.rowCount() * self._single_row_height
                 
         return h
 
 
     def add_item(self, item_name: str, amount: int):
-        row = self.table.rowCount()
-        self.table.insertRow(row)
+        self.add_items([(item_name, amount)])
+
+    def add_items(self, items: list[tuple[str, int]]):
+        """
+        複数の明細をまとめて追加します。
+        列幅・高さ・サイズの調整は最後に1回だけ行います。
+        """
+        if not items:
+            return
+
+        start = self.table.rowCount()
+        self.table.setRowCount(start + len(items))
+
+        for row, (item_name, amount) in enumerate(items, start):
+            # ---- 勘定科目 ----
+            item = QTableWidgetItem(item_name)
+            item.setFont(self.font)
+            self.table.setItem(row, 0, item)
+
+            # ---- 金額 ----
+            amount_item = QTableWidgetItem(f"{amount:,} ")
+            amount_item.setFont(self.font)
+            amount_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            self.table.setItem(row, 1, amount_item)
 
-        # ---- 勘定科目 ----
-        item = QTableWidgetItem(item_name)
-        item.setFont(self.font)
-        self.table.setItem(row, 0, item)
+            self._names.append(item_name)
+            self._amounts.append(amount)
+            self._row_index.setdefault(item_name, row)
+            self._total_amount += amount
 
-        # ---- 金額 ----
-        amount_item = QTableWidgetItem(f"{amount:,} ")
-        amount_item.setFont(self.font)
-        amount_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-        self.table.setItem(row, 1, amount_item)
+            row_width = self._measure_row_width(item_name, amount_item.text())
+            self._row_widths.append(row_width)
+            self._max_column_width = max(self._max_column_width, row_width)
+
+            self.table.setRowHeight(row, self._single_row_height)
 
-        self.table.setRowHeight(row, self._single_row_height)
         #self.table.resizeRowsToContents() # 内容に合わせて行高さを調整
         self._fix_column_widths_based_on_contents()
         
@@ -271,32 +322,15 @@ class AccountEntryWidget(QWidget):
 
     def _find_item_and_amount(self, item_name: str) -> Tuple[int, Optional[int]]:
         """
-        テーブル内で勘定科目名 (列0) を検索し、
+        索引から勘定科目名 (列0) の行を検索し、
         見つかった場合はその行インデックスと列1 (金額) の数値を返す。
         見つからない場合は (-1, None) を返す。
         """
-        for row in range(self.table.rowCount()):
-            # 1. 勘定科目名 (列0) をチェック
-            name_item = self.table.item(row, 0)
-            if name_item and name_item.text() == item_name:
-                # 2. 勘定科目が見つかった場合、金額 (列1) を取得
-                amount_item = self.table.item(row, 1)
-                
-                amount_value: Optional[int] = None
-                if amount_item:
-                    try:
-                        # テキストからカンマ(,)とスペース( )を取り除き、整数に変換
-                        text_value = amount_item.text().replace(',', '').strip()
-                        amount_value = int(text_value)
-                    except ValueError:
-                        # 変換エラーが発生した場合は None のまま
-                        pass
-                
-                # 行インデックスと金額を返す
-                return row, amount_value
-                
-        # 見つからなかった場合
-        return -1, None
+        row = self._row_index.get(item_name)
+        if row is None:
+            return -1, None
+
+        return row, self._amounts[row]
 
     def update_item(self, item_name: str, amount: int):
         """
@@ -323,6 +357,17 @@ class AccountEntryWidget(QWidget):
             amount_item.setFont(self.font)
             amount_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
             self.table.setItem(row_index, 1, amount_item)
+            self._amounts[row_index] = amount
+            self._total_amount += amount - existing_amount
+
+            old_width = self._row_widths[row_index]
+            new_width = self._measure_row_width(item_name, amount_text)
+            self._row_widths[row_index] = new_width
+            if new_width >= self._max_column_width:
+                self._max_column_width = new_width
+            elif old_width == self._max_column_width:
+                # 最大幅のセルが縮んだ場合のみ、計測済みの行幅から最大値を求め直す
+                self._recalc_max_column_width()
             
             # 高さ・幅・ウィジェットサイズ調整の呼び出し
             self.table.setRowHeight(row_index, self._single_row_height) 
@@ -336,85 +381,79 @@ class AccountEntryWidget(QWidget):
             self.add_item(item_name, amount)
             logger.debug(f"Add: {item_name} を新規追加し、金額 {amount:,} を設定しました。")
 
+    def remove_item(self, item_name: str):
+        """
+        勘定科目名に一致する行を削除する。なければ何もしない。
+        """
+        row_index = self._row_index.get(item_name)
+        if row_index is None:
+            return
+
+        self.table.removeRow(row_index)
+        del self._names[row_index]
+        self._total_amount -= self._amounts.pop(row_index)
+        removed_width = self._row_widths.pop(row_index)
+        self._rebuild_row_index()
+        if removed_width == self._max_column_width:
+            self._recalc_max_column_width()
+
+        self._fix_column_widths_based_on_contents()
+        self._fix_height_based_on_contents()
+        self.adjustSize()
+
+    def _rebuild_row_index(self):
+        self._row_index = {}
+        for row, name in enumerate(self._names):
+            self._row_index.setdefault(name, row)
+
     def clear_all(self):
         self.table.setRowCount(0)
+        self._names = []
+        self._amounts = []
+        self._row_index = {}
+        self._row_widths = []
+        self._max_column_width = self.MIN_COLUMN_WIDTH
+        self._total_amount = 0
+
+        self._fix_column_widths_based_on_contents()
+        self._fix_height_based_on_contents()
+        self.adjustSize()
 
     def get_all_items(self) -> list[tuple[str,int]]:
         """
         テーブル内のすべてのアイテムを [(item_name, amount), ...] で返す
         """
-        items = []
-        row_count = self.table.rowCount()
-        for row in range(row_count):
-            name_item = self.table.item(row, 0)
-            amount_item = self.table.item(row, 1)
-            if name_item and amount_item:
-                name = name_item.text()
-                amount_text = amount_item.text().replace(',', '')
-                try:
-                    amount = int(amount_text)
-                except ValueError:
-                    amount = 0
-                items.append((name, amount))
-        return items
+        return list(zip(self._names, self._amounts))
         
     def get_total_amount(self) -> int:
         """
-        テーブルの2列目（金額）に表示されているすべての項目の合計値を計算して返します。
+        テーブルの2列目（金額）に表示されているすべての項目の合計値を返します。
         
-        QTableWidgetItemのテキストからカンマや通貨単位の書式を削除し、整数に変換して合計します。
+        合計は行の追加・更新・削除時に差分で更新しているため、テーブルの走査は行いません。
         """
-        total = 0
-        amount_column = 1  # 金額は2列目（インデックス1）
-        
-        # テーブルの全行を反復処理
-        for row in range(self.table.rowCount()):
-            item = self.table.item(row, amount_column)
-            
-            if item is not None:
-                amount_text = item.text().strip()  # 前後の空白を削除
-                
-                # 💡 書式を削除し、金額を数値として抽出
-                # 例: "120,000 " -> "120000"
-                cleaned_amount_text = amount_text.replace(",", "")
-                
-                try:
-                    amount = int(cleaned_amount_text)
-                    total += amount
-                except ValueError:
-                    # 変換エラーが発生した場合（データが予期しない形式の場合）
-                    logger.debug(f"警告: 行 {row} の金額 '{amount_text}' を数値に変換できませんでした。")
-                    continue
-        
-        return total
+        return self._total_amount
 
     def get_max_column_width(self) -> int:
         """
-        テーブルの内容全体に基づき、2列で統一するために必要な最大の列幅を計算して返します。
+        テーブルの内容全体に基づき、2列で統一するために必要な最大の列幅を返します。
         
         このメソッドは、実際のウィジェットの幅設定は行いません。
         戻り値は、統一された1列あたりの必要な幅 (unified_width) です。
+        行の追加・更新時に変更されたセルのみを計測して保持している値を返すため、再計測は行いません。
         """
-        rows = self.table.rowCount()
-        min_widths = [0, 0]
-
-        # 各列の最大幅を計算
-        for col in range(2):
-            needed_width = 20  # ベースとなる最小幅
-
-            for row in range(rows):
-                item = self.table.item(row, col)
-                if item:
-                    # 文字列の幅を計算し、マージン (20) を追加
-                    w = self.fm.horizontalAdvance(item.text()) + 20
-                    needed_width = max(needed_width, w)
+        return self._max_column_width
 
-            min_widths[col] = needed_width
+    def _text_width(self, text: str) -> int:
+        """文字列の表示幅を返します。計測結果は同じフォントの全ウィジェットで共有します。"""
+        return _cached_text_width(self._font_key, text)
 
-        # 2列のうち、より広い方の幅を採用して統一列幅とする
-        unified_width = max(min_widths)
+    def _measure_row_width(self, item_name: str, amount_text: str) -> int:
+        """1行分（勘定科目・金額）のうち、広い方のセルに必要な列幅を返します。"""
+        return max(self._text_width(item_name), self._text_width(amount_text)) + self.COLUMN_MARGIN
 
-        return unified_width
+    def _recalc_max_column_width(self):
+        self._max_column_width = max(self._row_widths, default=self.MIN_COLUMN_WIDTH)
+        self._max_column_width = max(self._max_column_width, self.MIN_COLUMN_WIDTH)
 
     def set_fixed_column_width(self, unified_width: int):
         """
@@ -456,10 +495,7 @@ class AccountEntryWidget(QWidget):
         rows = self.table.rowCount()
         self.header_label.setFixedHeight(self._table_header_height) 
 
-        table_needed_height = 0
-        if rows > 0:
-            for i in range(rows):
-                table_needed_height += self._single_row_height
+        table_needed_height = rows * self._single_row_height
                 
         self.table.setMinimumHeight(0)
         self.table.setMaximumHeight(table_needed_height) 
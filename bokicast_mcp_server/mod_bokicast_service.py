@@ -1,9 +1,12 @@
 import sys
 import yaml
 import json
-from typing import Any, List, Dict
+import threading
+from concurrent.futures import Future
+from functools import partial
+from typing import Any, Callable, List, Dict
 from PySide6.QtWidgets import QWidget, QLabel, QApplication
-from PySide6.QtCore import Qt, QTimer, QPoint, Slot, QEvent
+from PySide6.QtCore import Qt, QTimer, QPoint, Slot, Signal, QEvent
 from PySide6.QtGui import QPixmap, QShortcut, QKeySequence
 import logging
 from PySide6.QtWidgets import (
@@ -15,7 +18,10 @@ from PySide6.QtCore import Qt, QPoint
 
 from bokicast_mcp_server.mod_t_account_widget import TAccountWidget
 from bokicast_mcp_server.mod_journal_entry_widget import JournalEntryWidget
+from bokicast_mcp_server.mod_journal_widget_pool import JournalWidgetPool
 from bokicast_mcp_server.mod_bs_pl_widget import BsPlWidget
+from bokicast_mcp_server.mod_ledger import Ledger
+from bokicast_mcp_server.mod_book_service import BookRegistry
 
 
 # ロガーの設定
@@ -24,6 +30,9 @@ logger = logging.getLogger(__name__)
 class BokicastService(QWidget):
     _instance = None
 
+    # 💡 他スレッド(MCP)から Qt スレッドへ処理を依頼するためのシグナル
+    invoke_requested = Signal(object)
+
     @classmethod
     def instance(cls, conf: dict[str, Any]):
         if cls._instance is None:
@@ -38,9 +47,14 @@ class BokicastService(QWidget):
         super().__init__()
         self.conf = conf
         logger.info(f"BokicastService.__init__: called.")
-        self.ledger_dict = {}
+
+        # 💡 Qt スレッドでの実行を待っている invoke の件数
+        self._queue_lock = threading.Lock()
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.account_widget_dict: dict[str, dict[str, TAccountWidget]] = {}
         self.bspl_widget_dict = {}
-        self.journal_dict: dict[str, JournalEntryWidget] = {}
+        self.invoke_requested.connect(self._on_invoke_requested, Qt.QueuedConnection)
         self.main_widget = QWidget()
         self.main_widget.setWindowTitle("Bokicast MCP Server")
         self.main_widget.setStyleSheet("background-color: #F0F0F0;")
@@ -55,60 +69,112 @@ class BokicastService(QWidget):
         font_size = self.conf.get("フォント", {}).get("サイズ", 14)
         self.font = QFont(font_type, font_size)
 
+        # 💡 仕訳は帳簿に保持し、表示には少数のウィジェットを使い回す
+        self.journal_pool = JournalWidgetPool(self.main_widget, self.font, partial(self.get_t_account_widget, "当期"))
+
 
-        self.ledger_dict["前期"] = self.get_account_dict("期首残高試算表")
-        self.pre_bspl = BsPlWidget(self.main_widget, self.font, self.ledger_dict["前期"], "前期")
+        # 💡 帳簿・仕訳ログ・チェックポイントは Qt に依存しない BookService がエンティティごとに管理する
+        #    画面に表示するのは既定のエンティティの帳簿のみ
+        self.books = BookRegistry(self.conf)
+        self.book = self.books.get()
+        self.ledger_dict: dict[str, Ledger] = self.book.ledger_dict
+        QApplication.instance().aboutToQuit.connect(self.books.close)
+
+        # 💡 T字勘定ウィジェットは初めて開かれたときに get_t_account_widget で作成する
+        for period in ["前期", "当期"]:
+            self.account_widget_dict[period] = {}
+
+        self.pre_bspl = BsPlWidget(self.main_widget, self.font, self.ledger_dict["前期"], partial(self.get_t_account_widget, "前期"), "前期")
         self.bspl_widget_dict["前期"] = self.pre_bspl
 
-        self.ledger_dict["当期"] = self.get_account_dict("期首残高試算表")
-        self.cur_bspl = BsPlWidget(self.main_widget, self.font, self.ledger_dict["当期"], "")
+        self.cur_bspl = BsPlWidget(self.main_widget, self.font, self.ledger_dict["当期"], partial(self.get_t_account_widget, "当期"), "")
         self.cur_bspl.assets.header_label.installEventFilter(self)
         self.bspl_widget_dict["当期"] = self.cur_bspl
 
 
-    def get_account_dict(self, target_set):
-        opening_balances = self.conf.get(target_set, {})
-        account_dict = {}
-        for category, accounts_data in opening_balances.items():
-            # データ形式のチェック (念のため)
-            if not isinstance(accounts_data, dict):
-                logger.warning(f"カテゴリ '{category}' のデータ形式が不正です。辞書形式である必要があります。")
-                continue
+    def get_t_account_widget(self, period: str, account_name: str) -> TAccountWidget | None:
+        """
+        指定された期の勘定に対応する TAccountWidget を返します。
+        初めて開かれた勘定はこのときに作成し、帳簿の明細をまとめて描画します。
+        勘定が存在しない場合は None を返します。Qt スレッドで呼び出してください。
+        """
+        account_dict = self.account_widget_dict[period]
+        widget = account_dict.get(account_name)
+        if widget is not None:
+            return widget
 
-            for account_name, initial_balance in accounts_data.items():
-                # 1. TAccountWidget の作成と登録
-                #    残高が0でも、取引で使用する可能性があるためウィジェット自体は作成します
-                t_account = TAccountWidget(self.main_widget, account_name, self.font, self.journal_dict, category)
-                account_dict[account_name] = t_account
-
-                # 2. 期首残高の登録処理
-                if initial_balance == 0:
-                    logger.debug(f"  -> {account_name} ({category}): 残高が0のため期首仕訳の登録はスキップ")
-                    continue
-
-                # カテゴリに基づいて 借方(Debit) か 貸方(Credit) かを判断
-                if category in ['資産', '費用']:
-                    t_account.add_debit("期首残高", initial_balance)
-                elif category in ['負債', '純資産', '収益']:
-                    t_account.add_credit("期首残高", initial_balance)
-                else:
-                    logger.warning(f"  -> {account_name}: 未知のカテゴリ '{category}' です。期首残高は未登録。")
+        account = self.ledger_dict[period].accounts.get(account_name)
+        if account is None:
+            return None
+
+        widget = TAccountWidget(self.main_widget, account, self.font, partial(self.get_journal_widget, period))
+        account_dict[account_name] = widget
+        return widget
+
+    def get_journal_widget(self, period: str, journal_id: str) -> JournalEntryWidget | None:
+        """
+        指定された期の帳簿にある仕訳を表示する JournalEntryWidget をプールから割り当てて返します。
+        仕訳が存在しない場合は None を返します。Qt スレッドで呼び出してください。
+        """
+        journal_data = self.ledger_dict[period].journals.get(journal_id)
+        if journal_data is None:
+            return None
+
+        return self.journal_pool.acquire(journal_id, journal_data)
+
+    def _refresh_t_account_widgets(self, account_names):
+        """作成済みの当期の T字勘定ウィジェットのみ再描画します。未作成の勘定は開かれたときに描画されます。"""
+        account_dict = self.account_widget_dict["当期"]
+        for account_name in account_names:
+            widget = account_dict.get(account_name)
+            if widget is not None:
+                widget.refresh()
+
+    #
+    # スレッド間呼び出し
+    #
+    def invoke(self, func: Callable[..., Any], *args) -> Future:
+        """
+        Qt スレッドで func(*args) を実行するよう依頼し、結果を受け取る Future を返します。
+        任意のスレッドから呼び出せます。
+        """
+        future = Future()
+        with self._queue_lock:
+            self.queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+        self.invoke_requested.emit((future, func, args))
+        return future
 
-        return account_dict
+    @Slot(object)
+    def _on_invoke_requested(self, request):
+        future, func, args = request
+        with self._queue_lock:
+            self.queue_depth -= 1
+
+        # 呼び出し元でタイムアウト等によりキャンセル済みなら実行しない
+        if not future.set_running_or_notify_cancel():
+            return
+
+        try:
+            future.set_result(func(*args))
+        except Exception as e:
+            future.set_exception(e)
 
     #
     # セッター
     #
-    @Slot(str)
-    def journal_entry(self, journal_str: str):
+    def journal_entry(self, journal_data: dict[str, Any], entity: str | None = None) -> dict[str, Any]:
         """
-        仕訳データを受け取り、JournalEntryWidgetを生成して表示します。
+        仕訳データを帳簿へ転記し、JournalEntryWidgetを生成して表示します。
+        画面に表示していないエンティティの場合や、転記できなかった仕訳は表示しません。
+        表示に失敗しても転記は取り消さず、実行結果をそのまま返します。
+        Qt スレッドで呼び出してください。
 
         journal_data = {
             "journal_id" : "J004",
             "debit": [
-                {"account": "仕入", "amount": 1000},
-                {"account": "荷役費", "amount": 500},
+                {"account": "仕入", "amount": 1500},
                 {"account": "雑費", "amount": 500}
             ],
             "credit": [
@@ -116,16 +182,61 @@ class BokicastService(QWidget):
             ],
             "remarks": "仕訳ID004の例"
         }
+
+        Returns:
+            dict: 実行結果
+                成功: {"journal_id": "J004", "status": "ok", "balances": {勘定科目: 転記後の残高, ...}}
+                失敗: {"journal_id": "J004", "status": "error", "error": エラーメッセージ}
         """
-        journal_data = json.loads(journal_str)
+        book = self.books.get(entity)
+        result = book.journal_entry(journal_data)
+        if book is not self.book or result["status"] != "ok":
+            return result
+
+        # 💡 転記と仕訳ログへの追記は済んでいるため、表示の失敗で実行結果を置き換えない
+        try:
+            self._refresh_t_account_widgets(result["balances"])
+            self._show_journal_widget(journal_data)
+        except Exception:
+            logger.exception(f"仕訳 {result['journal_id']} の表示に失敗しました。")
+
+        return result
+
+    def journal_entries(self, journal_list: list[Any], entity: str | None = None) -> list[dict[str, Any]]:
+        """
+        複数の仕訳データをまとめて帳簿へ転記し、仕訳ごとの実行結果を返します。
+        T字勘定の再描画は最後に1回だけ行い、表示するのは最後に転記した仕訳ウィジェットのみとします。
+        Qt スレッドで呼び出してください。
+        """
+        book = self.books.get(entity)
+        results = book.journal_entries(journal_list)
+        if book is not self.book:
+            return results
+
+        touched_all: dict[str, None] = {}
+        last_journal = None
+        for result in results:
+            if result["status"] != "ok":
+                continue
+
+            touched_all.update(dict.fromkeys(result["balances"]))
+            last_journal = journal_list[result["index"]]
+
+        # 💡 転記済みの仕訳ごとの結果を返すため、表示の失敗で実行結果を置き換えない
+        try:
+            self._refresh_t_account_widgets(touched_all)
+
+            if last_journal is not None:
+                self._show_journal_widget(last_journal)
+        except Exception:
+            logger.exception("仕訳の表示に失敗しました。")
+
+        return results
+
+    def _show_journal_widget(self, journal_data: dict[str, Any]):
         journal_id = journal_data.get("journal_id", "NO_ID")
-        logger.info(f"journal_entry: Processing Journal ID: {journal_id}")
-        
-        account_dict = self.ledger_dict["当期"]
-        j = JournalEntryWidget(self.main_widget, journal_id, self.font, account_dict, self.journal_dict)
-        self.journal_dict[journal_id] = j
+        j = self.journal_pool.acquire(journal_id, journal_data)
 
-        j.add_journal(journal_data)
         #main_x = self.main_widget.x()
         #main_y = self.main_widget.y()
 
@@ -136,34 +247,24 @@ class BokicastService(QWidget):
         j.move(center_x, center_y)
         j.show()
 
-    def get_bs_data(self):
-        data = {
-                    "前期": self.pre_bspl.get_bs_data(),
-                    "当期": self.cur_bspl.get_bs_data()
-               }
-
-        return json.dumps(data, ensure_ascii=False, indent=4)
-
-    def get_pl_data(self):
-        data = {
-                    "前期": self.pre_bspl.get_pl_data(),
-                    "当期": self.cur_bspl.get_pl_data()
-               }
-               
-        return json.dumps(data, ensure_ascii=False, indent=4)
-
-    def get_account_data(self, acc_name):
-
-        account_dict = self.ledger_dict["当期"]
-        if acc_name not in account_dict:
-            logger.warning(f"Account '{acc_name}' not found.")
-            return json.dumps({"error": "Account not found"}, ensure_ascii=False)
+    #
+    # ゲッター
+    # 💡 MCP スレッドから呼ばれるため、Qt スレッドが公開したスナップショットのみを参照する
+    #
+    def get_bs_data(self, entity: str | None = None):
+        return self.books.get_bs_data(entity)
 
-        t_account = account_dict[acc_name]
+    def get_pl_data(self, entity: str | None = None):
+        return self.books.get_pl_data(entity)
 
-        return t_account.get_account_data()
+    def get_trial_balance_data(self, entity: str | None = None):
+        return self.books.get_trial_balance_data(entity)
 
+    def get_ledger_stats(self):
+        return self.books.get_ledger_stats()
 
+    def get_account_data(self, acc_name, entity: str | None = None, query=None):
+        return self.books.get_account_data(acc_name, entity, query)
 
     def eventFilter(self, source, event):
         """
@@ -210,7 +311,7 @@ if __name__ == "__main__":
         "remarks": "仕訳ID004の例"
     }
 
-    s.journal_entry(json.dumps(test_journal_data)) 
+    s.journal_entry(test_journal_data) 
 
     test_journal_data = {
         "journal_id": "J005", # 👈 journal_id を追加
@@ -223,7 +324,7 @@ if __name__ == "__main__":
         "remarks": "仕訳ID005の例"
     }
 
-    s.journal_entry(json.dumps(test_journal_data)) 
+    s.journal_entry(test_journal_data) 
 
 
 
@@ -0,0 +1,403 @@
+"""
+Book service module
+Qt に依存しない帳簿サービス（帳簿・仕訳ログ・チェックポイント・取得データのキャッシュ）を定義する
+"""
+import json
+import logging
+import threading
+from typing import Any, Callable
+
+from bokicast_mcp_server.mod_ledger import Ledger, AccountQuery
+from bokicast_mcp_server.mod_chart_of_accounts import DEBIT_CATEGORIES, CREDIT_CATEGORIES
+from bokicast_mcp_server.mod_journal_log import JournalLog
+from bokicast_mcp_server.mod_checkpoint import Checkpoint
+from bokicast_mcp_server.mod_consolidation import ConsolidatedLedger, Elimination
+
+logger = logging.getLogger(__name__)
+
+# 既定のエンティティ (entity 未指定時に使用する期首残高試算表のキー)
+DEFAULT_ENTITY = "期首残高試算表"
+
+# 連結帳簿のエンティティ名 (モード: 連結 の場合のみ)
+CONSOLIDATED_ENTITY = "連結"
+
+
+def find_entities(conf: dict[str, Any]) -> list[str]:
+    """
+    YAML 設定から、期首残高試算表の形式 (カテゴリ -> {勘定科目: 残高}) を持つキーをエンティティ名として返します。
+    既定のエンティティは常に先頭に含めます。
+
+    P社:
+      "P:純資産":
+        "P:資本金" : 40000
+      ...
+    """
+    categories = DEBIT_CATEGORIES + CREDIT_CATEGORIES
+    entities = [DEFAULT_ENTITY]
+    for key, value in conf.items():
+        if key == DEFAULT_ENTITY or not isinstance(value, dict) or not value:
+            continue
+
+        if all(isinstance(accounts, dict) and str(category).split(":")[-1] in categories
+               for category, accounts in value.items()):
+            entities.append(key)
+
+    return entities
+
+
+# --------------------------------------------------------
+# BookReader
+# --------------------------------------------------------
+class BookReader:
+    """
+    ledger_dict (期 -> snapshot を持つ帳簿) から、貸借対照表／損益計算書／T字勘定データを取得する基底クラス。
+    公開済みのスナップショットのみを参照するため、任意のスレッドから呼び出せます。
+    """
+
+    def __init__(self):
+        self.ledger_dict: dict[str, Any] = {}
+        self._json_cache: dict[str, tuple[tuple[int, ...], str]] = {}
+
+    def get_bs_data(self) -> str:
+        snapshots = [self.ledger_dict["前期"].snapshot, self.ledger_dict["当期"].snapshot]
+        return self._get_cached_json("bs", snapshots, lambda: {
+                    "前期": snapshots[0].get_bs_data(),
+                    "当期": snapshots[1].get_bs_data()
+               })
+
+    def get_pl_data(self) -> str:
+        snapshots = [self.ledger_dict["前期"].snapshot, self.ledger_dict["当期"].snapshot]
+        return self._get_cached_json("pl", snapshots, lambda: {
+                    "前期": snapshots[0].get_pl_data(),
+                    "当期": snapshots[1].get_pl_data()
+               })
+
+    def get_trial_balance_data(self) -> str:
+        snapshots = [self.ledger_dict["前期"].snapshot, self.ledger_dict["当期"].snapshot]
+
+        def build():
+            data = {
+                "前期": snapshots[0].get_trial_balance_data(),
+                "当期": snapshots[1].get_trial_balance_data()
+            }
+            data["貸借一致"] = data["前期"]["貸借一致"] and data["当期"]["貸借一致"]
+            return data
+
+        return self._get_cached_json("tb", snapshots, build)
+
+    def get_ledger_stats(self) -> dict[str, Any]:
+        """期ごとの帳簿の大きさ (勘定数・明細数・バージョン) を返します。"""
+        stats = {}
+        for period, ledger in self.ledger_dict.items():
+            snapshot = ledger.snapshot
+            stats[period] = {"勘定数": len(snapshot.chart), "明細数": snapshot.size, "バージョン": snapshot.version}
+        return stats
+
+    def _get_cached_json(self, key: str, snapshots: list, build: Callable[[], Any]) -> str:
+        """
+        スナップショットのバージョンをキーに、シリアライズ済みJSONをキャッシュして返します。
+        転記がない間の繰り返し取得は、辞書の参照のみで済みます。
+        """
+        versions = tuple(snapshot.version for snapshot in snapshots)
+        cached = self._json_cache.get(key)
+        if cached is not None and cached[0] == versions:
+            return cached[1]
+
+        text = json.dumps(build(), ensure_ascii=False, indent=4)
+        self._json_cache[key] = (versions, text)
+        return text
+
+    def get_account_data(self, acc_name: str, query: AccountQuery | None = None) -> str:
+        account_data = self.ledger_dict["当期"].snapshot.get_account_data(acc_name, query)
+        if account_data is None:
+            logger.warning(f"Account '{acc_name}' not found.")
+            return json.dumps({"error": "Account not found"}, ensure_ascii=False)
+
+        return json.dumps(account_data, ensure_ascii=False, indent=4)
+
+
+# --------------------------------------------------------
+# BookService
+# --------------------------------------------------------
+class BookService(BookReader):
+    """
+    前期・当期の帳簿への転記と、貸借対照表／損益計算書／T字勘定データの取得を行うサービス。
+    画面表示を行う BokicastService と、ヘッドレスモードの MCP サーバの両方から使用する。
+
+    エンティティ (会社) ごとに1つ作成し、帳簿・仕訳ログ・キャッシュ・ロックはエンティティ間で共有しない。
+
+    転記 (journal_entry / journal_entries) はエンティティごとのロックで1件ずつ実行するため、任意のスレッドから呼び出せます。
+    取得 (get_*) は公開済みのスナップショットのみを参照するため、ロックを取らずに任意のスレッドから呼び出せます。
+    """
+
+    def __init__(self, conf: dict[str, Any], entity: str = DEFAULT_ENTITY):
+        super().__init__()
+        self.conf = conf
+        self.entity = entity
+        self.ledger_dict: dict[str, Ledger] = {}
+        self.lock = threading.RLock()
+
+        for period in ["前期", "当期"]:
+            self.ledger_dict[period] = Ledger.from_opening_balances(self.conf.get(entity) or {}, self.conf.get("勘定科目別名"))
+
+        # 💡 仕訳ログがあれば当期の帳簿へ再適用する (既定以外のエンティティはファイル名にエンティティ名を付加)
+        file_entity = None if entity == DEFAULT_ENTITY else entity
+        self.journal_log = JournalLog.from_config(self.conf, file_entity)
+        self.checkpoint = Checkpoint.from_config(self.conf, file_entity)
+        if self.checkpoint is not None and self.journal_log is None:
+            logger.warning("チェックポイントには仕訳ログの設定が必要です。チェックポイントは使用しません。")
+            self.checkpoint = None
+
+        if self.journal_log is not None:
+            self._restore_ledger()
+            self.journal_log.open()
+
+    #
+    # 永続化
+    #
+    def _restore_ledger(self):
+        """
+        最新のチェックポイントを読み込み、それ以降に追記された仕訳ログのみを当期の帳簿へ再適用します。
+        設定の期首残高が変更されている場合は、チェックポイントを使わず、設定の期首残高に仕訳ログ全体を再適用します。
+        """
+        ledger = self.ledger_dict["当期"]
+        log_offset = 0
+
+        data = self.checkpoint.load() if self.checkpoint is not None else None
+        if data is not None:
+            try:
+                ledger.load_checkpoint(data["ledger"])
+                log_offset = data["log_offset"]
+                logger.info(f"チェックポイント {self.checkpoint.path} を読み込みました。(仕訳ログ位置={log_offset})")
+            except ValueError as e:
+                logger.warning(f"{e} チェックポイント {self.checkpoint.path} を使わず、仕訳ログ全体を再適用します。")
+
+        count = ledger.replay(self.journal_log.read(log_offset))
+        logger.info(f"仕訳ログ {self.journal_log.path} から {count} 件の仕訳を再適用しました。")
+
+        # 💡 再適用した仕訳はチェックポイントに未保存のため、次の保存 (終了時を含む) の対象にする
+        if self.checkpoint is not None:
+            self.checkpoint.record(count)
+
+    def _save_checkpoint(self):
+        """仕訳ログを fsync してから、当期の帳簿のスナップショットをワーカースレッドでチェックポイントへ保存します。"""
+        # 💡 ロック中に行うのはスナップショットと仕訳ログの位置の取得のみで、シリアライズと書き込みは転記と並行する
+        self.journal_log.sync()
+        self.checkpoint.save_async(self.ledger_dict["当期"].snapshot, self.journal_log.offset)
+
+    def get_ledger_stats(self) -> dict[str, Any]:
+        stats = super().get_ledger_stats()
+        for period, ledger in self.ledger_dict.items():
+            stats[period]["仕訳数"] = len(ledger.journals)
+        return stats
+
+    def close(self):
+        """未保存の転記があればチェックポイントを保存し、仕訳ログを閉じます。"""
+        if self.journal_log is None:
+            return
+
+        with self.lock:
+            # 💡 終了時にチェックポイントを保存し、次回起動時の再適用をなくす
+            if self.checkpoint is not None:
+                if self.checkpoint.pending > 0:
+                    self.journal_log.sync()
+                    self.checkpoint.save(self.ledger_dict["当期"].snapshot, self.journal_log.offset)
+                self.checkpoint.close()
+
+            self.journal_log.close()
+
+    #
+    # セッター
+    #
+    def journal_entry(self, journal_data: Any) -> dict[str, Any]:
+        """
+        当期の帳簿へ仕訳を転記し、実行結果を返します。
+
+        Returns:
+            dict: 実行結果
+                成功: {"journal_id": "J004", "status": "ok", "balances": {勘定科目: 転記後の残高, ...}}
+                失敗: {"journal_id": "J004", "status": "error", "error": エラーメッセージ}
+        """
+        journal_id = journal_data.get("journal_id", "NO_ID") if isinstance(journal_data, dict) else None
+        logger.info(f"journal_entry: Processing Journal ID: {journal_id} ({self.entity})")
+
+        ledger = self.ledger_dict["当期"]
+        with self.lock:
+            try:
+                touched = ledger.post(journal_data)
+            except ValueError as e:
+                logger.warning(f"Journal {journal_id} commit 中止: {e}")
+                return {"journal_id": journal_id, "status": "error", "error": str(e)}
+
+            # 転記できた仕訳のみ仕訳ログへ追記する
+            if self.journal_log is not None:
+                self.journal_log.append(journal_data)
+                if self.checkpoint is not None and self.checkpoint.record():
+                    self._save_checkpoint()
+
+            balances = {account_name: ledger.accounts[account_name].get_balance() for account_name in touched}
+
+        return {"journal_id": journal_id, "status": "ok", "balances": balances}
+
+    def journal_entries(self, journal_list: list[Any]) -> list[dict[str, Any]]:
+        """
+        複数の仕訳データをまとめて当期の帳簿へ転記し、仕訳ごとの実行結果 (index 付き) を返します。
+        スナップショットの公開・変更通知・仕訳ログへの追記・チェックポイントの記録は、まとめて1回だけ行います。
+        """
+        logger.info(f"journal_entries: Processing {len(journal_list)} journals ({self.entity})")
+
+        ledger = self.ledger_dict["当期"]
+        # 💡 まとめて転記する間は、同じエンティティへの他の転記を割り込ませない
+        with self.lock:
+            outcomes = ledger.post_many(journal_list)
+
+            results, posted = [], []
+            for index, (journal_data, outcome) in enumerate(zip(journal_list, outcomes)):
+                journal_id = journal_data.get("journal_id", "NO_ID") if isinstance(journal_data, dict) else None
+                if isinstance(outcome, ValueError):
+                    logger.warning(f"Journal {journal_id} commit 中止: {outcome}")
+                    results.append({"index": index, "journal_id": journal_id, "status": "error", "error": str(outcome)})
+                    continue
+
+                posted.append(journal_data)
+                results.append({"index": index, "journal_id": journal_id, "status": "ok", "balances": outcome})
+
+            # 転記できた仕訳のみ仕訳ログへ追記する
+            if self.journal_log is not None and posted:
+                self.journal_log.append_many(posted)
+                if self.checkpoint is not None and self.checkpoint.record(len(posted)):
+                    self._save_checkpoint()
+
+        return results
+
+
+# --------------------------------------------------------
+# ConsolidatedBook
+# --------------------------------------------------------
+class ConsolidatedBook(BookReader):
+    """
+    親会社・子会社の BookService を合算した連結帳簿（参照専用）。
+    YAML 設定の「連結」で、合算するエンティティと相殺消去を指定する。
+
+    連結:
+      親会社: P社
+      子会社: [S社]
+      勘定対応:            # 省略時は接頭辞を除いた勘定科目名 ("P:現金" -> "現金") に合算する
+        "P:商品": 商品
+      相殺消去:
+        - 名称: 投資と資本の相殺消去
+          勘定: ["P:S社株式", "S:資本金", "S:繰越利益剰余金"]
+          借方差額: のれん
+          貸方差額: 負ののれん発生益
+    """
+
+    def __init__(self, conf: dict[str, Any], books: dict[str, BookService]):
+        super().__init__()
+        self.entity = CONSOLIDATED_ENTITY
+
+        cons_conf = conf.get("連結") or {}
+        parent = cons_conf.get("親会社")
+        subsidiaries = cons_conf.get("子会社") or []
+        if isinstance(subsidiaries, str):
+            subsidiaries = [subsidiaries]
+
+        entities = ([parent] if parent else []) + list(subsidiaries)
+        unknown = [entity for entity in entities if entity not in books]
+        if not entities or unknown:
+            raise ValueError(f"連結の親会社・子会社の設定が不正です。存在しないエンティティ: {unknown or '(未指定)'}")
+
+        eliminations = [
+            Elimination(
+                elim_conf.get("名称", f"相殺消去{index + 1}"),
+                list(elim_conf.get("勘定", [])),
+                elim_conf.get("借方差額", "のれん"),
+                elim_conf.get("貸方差額", "負ののれん発生益")
+            )
+            for index, elim_conf in enumerate(cons_conf.get("相殺消去") or [])
+        ]
+        account_map = cons_conf.get("勘定対応") or {}
+
+        for period in ["前期", "当期"]:
+            ledgers = {entity: books[entity].ledger_dict[period] for entity in entities}
+            self.ledger_dict[period] = ConsolidatedLedger(ledgers, account_map, eliminations)
+
+        logger.info(f"連結: {', '.join(entities)} (相殺消去 {len(eliminations)} 件)")
+
+    def close(self):
+        pass
+
+    def journal_entry(self, journal_data: Any) -> dict[str, Any]:
+        journal_id = journal_data.get("journal_id", "NO_ID") if isinstance(journal_data, dict) else None
+        return {"journal_id": journal_id, "status": "error", "error": "連結帳簿へは転記できません。親会社・子会社のエンティティへ転記してください。"}
+
+    def journal_entries(self, journal_list: list[Any]) -> list[dict[str, Any]]:
+        return [{"index": index, **self.journal_entry(journal_data)} for index, journal_data in enumerate(journal_list)]
+
+    def get_account_data(self, acc_name: str, query: AccountQuery | None = None) -> str:
+        # 💡 連結勘定は明細を持たず、内訳もエンティティ数分のみのため query は使用しない
+        account_data = self.ledger_dict["当期"].get_account_data(acc_name)
+        if account_data is None:
+            logger.warning(f"Account '{acc_name}' not found.")
+            return json.dumps({"error": "Account not found"}, ensure_ascii=False)
+
+        return json.dumps(account_data, ensure_ascii=False, indent=4)
+
+
+# --------------------------------------------------------
+# BookRegistry
+# --------------------------------------------------------
+class BookRegistry:
+    """
+    エンティティ名 -> BookService (連結モードでは ConsolidatedBook を含む) の一覧。
+    1つのプロセスで複数の会社の帳簿を扱い、MCP ツールの entity 引数で対象を選択する。
+    entity を省略 (None または空文字) した場合は既定のエンティティを使用する。
+    """
+
+    def __init__(self, conf: dict[str, Any]):
+        self.conf = conf
+        self.books: dict[str, BookReader] = {}
+        for entity in find_entities(conf):
+            self.books[entity] = BookService(conf, entity)
+
+        # 💡 連結モードでは、各エンティティの転記を差分で反映する連結帳簿を追加する
+        if conf.get("モード") == "連結":
+            self.books[CONSOLIDATED_ENTITY] = ConsolidatedBook(conf, self.books)
+
+        logger.info(f"エンティティ: {', '.join(self.books)}")
+
+    def get(self, entity: str | None = None) -> BookReader:
+        """エンティティの BookService (連結の場合は ConsolidatedBook) を返します。存在しない場合は ValueError を送出します。"""
+        book = self.books.get(entity or DEFAULT_ENTITY)
+        if book is None:
+            raise ValueError(f"エンティティ '{entity}' は存在しません。{' | '.join(self.books)} を指定してください。")
+
+        return book
+
+    def close(self):
+        for book in self.books.values():
+            book.close()
+
+    #
+    # MCP ツールから呼び出す I/F (BokicastService と同じ)
+    #
+    def journal_entry(self, journal_data: Any, entity: str | None = None) -> dict[str, Any]:
+        return self.get(entity).journal_entry(journal_data)
+
+    def journal_entries(self, journal_list: list[Any], entity: str | None = None) -> list[dict[str, Any]]:
+        return self.get(entity).journal_entries(journal_list)
+
+    def get_bs_data(self, entity: str | None = None) -> str:
+        return self.get(entity).get_bs_data()
+
+    def get_pl_data(self, entity: str | None = None) -> str:
+        return self.get(entity).get_pl_data()
+
+    def get_trial_balance_data(self, entity: str | None = None) -> str:
+        return self.get(entity).get_trial_balance_data()
+
+    def get_ledger_stats(self) -> dict[str, Any]:
+        """エンティティごとの帳簿の大きさを返します。"""
+        return {entity: book.get_ledger_stats() for entity, book in self.books.items()}
+
+    def get_account_data(self, acc_name: str, entity: str | None = None, query: AccountQuery | None = None) -> str:
+        return self.get(entity).get_account_data(acc_name, query)
@@ -5,13 +5,14 @@ from PySide6.QtWidgets import (
 from PySide6.QtGui import QFont, QFontMetrics, QMouseEvent
 from PySide6.QtCore import Qt, QPoint, QTimer, QEvent
 import sys
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List
 import yaml
 import json
 
 # 💡 AccountEntryWidget を別のファイルからインポートします
 from bokicast_mcp_server.mod_account_entry_widget import AccountEntryWidget
 from bokicast_mcp_server.mod_t_account_widget import TAccountWidget
+from bokicast_mcp_server.mod_ledger import Ledger
 
 import logging
 logger = logging.getLogger(__name__)
@@ -22,11 +23,13 @@ logger = logging.getLogger(__name__)
 class BsPlWidget(QFrame):
     BASE_HEIGHT = 250
 
-    def __init__(self, parent, font: QFont, account_dict: dict[str, TAccountWidget], title_key):
+    def __init__(self, parent, font: QFont, ledger: Ledger, get_account_widget: Callable[[str], TAccountWidget | None], title_key):
         super().__init__(parent)
         self.font = font
         self.fm = QFontMetrics(self.font)
-        self.account_dict = account_dict
+        self.ledger = ledger
+        # 💡 T字勘定ウィジェットは初めて開くときに作成されるため、辞書ではなく取得関数を受け取る
+        self.get_account_widget = get_account_widget
         self.title_key = title_key
         self.setMouseTracking(True)
         
@@ -50,17 +53,14 @@ class BsPlWidget(QFrame):
         self.assets.move(center_x, center_y)
         self.expense.move(self.assets.x(), self.assets.y() + self.assets.height()+20)
 
-        self.update_bs_pos_timer = QTimer()
-        self.update_bs_pos_timer.timeout.connect(lambda: self._update_bs_pos())
-        self.update_bs_pos_timer.start(200)
+        # 💡 ポーリングせず、帳簿の変更通知とウィジェットの移動/リサイズで再描画する
+        self._update_pending = False
+        self.ledger.add_listener(lambda touched: self.request_update())
 
-        self.update_pl_pos_timer = QTimer()
-        self.update_pl_pos_timer.timeout.connect(lambda: self._update_pl_pos())
-        self.update_pl_pos_timer.start(200)
-
-        self.update_bspl_timer = QTimer()
-        self.update_bspl_timer.timeout.connect(lambda: self._update_bspl())
-        self.update_bspl_timer.start(1000)
+        for w in [self.assets, self.liabilities, self.expense, self.revenue]:
+            w.installEventFilter(self)
+        self._update_bs_pos()
+        self._update_pl_pos()
 
         self.assets.table.cellDoubleClicked.connect(
             lambda row, col: self._on_account_clicked(self.assets, row, col)
@@ -81,6 +81,33 @@ class BsPlWidget(QFrame):
         self.show()
 
 
+    def request_update(self):
+        """
+        再描画を要求します。
+        同じイベントループ中の複数回の要求は、次のイベントループで1回の再描画にまとめます。
+        """
+        if self._update_pending:
+            return
+
+        self._update_pending = True
+        QTimer.singleShot(0, self._on_update_requested)
+
+    def _on_update_requested(self):
+        self._update_pending = False
+        self._update_bspl()
+
+    def eventFilter(self, source, event):
+        """
+        資産・負債／費用・収益ウィジェットの移動やリサイズに追従して、隣接ウィジェットを配置し直します。
+        """
+        if event.type() in (QEvent.Move, QEvent.Resize):
+            if source is self.assets or source is self.liabilities:
+                self._update_bs_pos()
+            elif source is self.expense or source is self.revenue:
+                self._update_pl_pos()
+
+        return False
+
     def _update_bspl(self):
         self._update_bspl_balance()
         self._update_bspl_widths()
@@ -88,8 +115,8 @@ class BsPlWidget(QFrame):
 
     def _update_bspl_balance(self):
         """
-        全勘定科目 (self.account_dict) を走査し、
-        TAccountWidget.category に基づいて各セクション(資産・負債など)に表示する。
+        帳簿の全勘定科目 (self.ledger.accounts) を走査し、
+        Account.category に基づいて各セクション(資産・負債など)に表示する。
         """
         
         # カテゴリ名と格納先ウィジェットのマッピング
@@ -101,23 +128,20 @@ class BsPlWidget(QFrame):
             '収益': self.revenue
         }
 
-        # account_dict に登録されている全 TAccountWidget をループ
-        for account_name, t_account in self.account_dict.items():
+        # 💡 全勘定の残高は明細テーブルからまとめて集計する
+        balances = self.ledger.snapshot.totals().balance
+
+        # 勘定科目表に登録されている全勘定をループ
+        for info in self.ledger.chart:
             
-            # TAccountWidget からカテゴリを取得
-            # (t_account.category が str 型で "資産" 等を保持している前提)
-            category = getattr(t_account, 'category', None)
+            account_name = info.name
+            category = info.category
 
             target_widget = widget_map.get(category)
 
             if target_widget:
-                # 残高取得
-                balance = t_account.get_balance()
-
-                # 貸方区分（負債・純資産・収益）はマイナスで管理されている場合があるため、
-                # 表示用に絶対値にする
-                if category in ['負債', '純資産', '収益']:
-                    balance = abs(balance)
+                # 残高取得 (貸方区分（負債・純資産・収益）は正常残高の符号を掛けて正にする)
+                balance = int(balances[info.id]) * info.sign
 
                 # 各セクションウィジェットに追加/更新
                 target_widget.update_item(account_name, balance)
@@ -257,7 +281,7 @@ class BsPlWidget(QFrame):
             return
 
         account_name = account_name_item.text().strip()
-        t = self.account_dict.get(account_name)
+        t = self.get_account_widget(account_name)
 
         if not t:
             logger.debug(f"T勘定が存在しません: {account_name}")
@@ -328,14 +352,7 @@ class BsPlWidget(QFrame):
                 }
             }
         """
-        data = {
-                    "資産": self._collect_category_dict("資産"),
-                    "負債": self._collect_category_dict("負債"),
-                    "純資産": self._collect_category_dict("純資産")
-                }
-        
-        return data
-        #return json.dumps(data, ensure_ascii=False, indent=4)
+        return self.ledger.get_bs_data()
 
 
     def get_pl_data(self):
@@ -358,42 +375,7 @@ class BsPlWidget(QFrame):
                 }
             }
         """
-
-        data = {
-                    "費用": self._collect_category_dict("費用"),
-                    "収益": self._collect_category_dict("収益")
-                }
-
-        return data
-
-    def _collect_category_dict(self, category_name: str) -> Dict[str, int]:
-        """
-        指定されたカテゴリの勘定科目と残高の辞書を作成するヘルパーメソッド。
-        TAccountWidgetのカテゴリ情報に基づいて残高を集計する。
-        """
-        result = {}
-        
-        # self.account_dict にある全ての TAccountWidget を走査
-        for account_name, t_account in self.account_dict.items():
-            
-            # TAccountWidgetのカテゴリが要求されたカテゴリと一致するか確認
-            if getattr(t_account, 'category', None) == category_name:
-                
-                # TAccountWidgetから現在の残高を取得
-                balance = t_account.get_balance()
-
-                # 負債・純資産・収益は貸方(マイナス)で管理されているため絶対値にする
-                # このヘルパーメソッドは純資産や負債も呼ばれる可能性があるため、ロジックは維持
-                if category_name in ['負債', '純資産', '収益']:
-                    # 注意: '負債', '純資産'は get_bs_data から呼ばれますが、ロジックの汎用性を維持
-                    balance = abs(balance)
-
-                # 残高が0でない場合のみ追加
-                if balance != 0:
-                    result[account_name] = balance
-            
-        return result
-
+        return self.ledger.get_pl_data()
 
     def hide(self):
         self.assets.hide()
@@ -420,11 +402,6 @@ if __name__ == "__main__":
 
     logger.debug(config)
 
-    account_to_category: Dict[str, str] = {}
-    for category, accounts in config.get('勘定', {}).items():
-        for account in accounts:
-            account_to_category[account] = category
-
     app = QApplication(sys.argv)
     
 
@@ -435,28 +412,15 @@ if __name__ == "__main__":
     
 
     font = QFont("MS Gothic", 10)
+    ledger = Ledger.from_opening_balances(config.get('期首残高試算表', {}))
     account_dict: Dict[str, TAccountWidget] = {}
-    trial_balance_data = config.get('決算整理前残高試算表', {})
-    for account_name, initial_balance in trial_balance_data.items():
-        t_account = TAccountWidget(main_widget, account_name, font)
-        account_dict[account_name] = t_account
-
-        if initial_balance == 0:
-            logger.debug(f"  -> {account_name}: 残高が0のためスキップ")
-            continue
-
-        category = account_to_category.get(account_name)
-
-        if category == '資産' or category == '費用':
-            t_account.add_debit("期首残高", initial_balance)
-        elif category == '負債' or category == '純資産' or category == '収益':
-            t_account.add_credit("期首残高", initial_balance)
-        else:
-            logger.debug(f"  -> {account_name}: 勘定カテゴリ ({category}) が不明。期首残高は未登録。")
-
 
+    def get_account_widget(account_name):
+        if account_name not in account_dict and account_name in ledger.accounts:
+            account_dict[account_name] = TAccountWidget(main_widget, ledger.accounts[account_name], font, lambda journal_id: None)
+        return account_dict.get(account_name)
 
-    bspl = BsPlWidget(main_widget, font, account_dict, config)
+    bspl = BsPlWidget(main_widget, font, ledger, get_account_widget, "")
     
     main_widget.show()
 
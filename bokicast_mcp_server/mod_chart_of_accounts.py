@@ -0,0 +1,97 @@
+"""
+Chart of accounts module
+勘定科目表（勘定科目ID・カテゴリ・正常残高の符号・別名）を定義する
+"""
+import logging
+from typing import Dict, Iterator, List, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# 借方残高となるカテゴリ / 貸方残高となるカテゴリ
+DEBIT_CATEGORIES = ['資産', '費用']
+CREDIT_CATEGORIES = ['負債', '純資産', '収益']
+
+
+def normal_sign(category: str) -> int:
+    """
+    カテゴリの正常残高の符号を返します。
+    借方残高 (資産・費用) は 1、貸方残高 (負債・純資産・収益) は -1、未知のカテゴリは 0。
+    """
+    if category in DEBIT_CATEGORIES:
+        return 1
+    if category in CREDIT_CATEGORIES:
+        return -1
+    return 0
+
+
+# --------------------------------------------------------
+# AccountInfo
+# --------------------------------------------------------
+class AccountInfo(NamedTuple):
+    """勘定科目表の1行。sign は (借方 - 貸方) に掛けると正常残高が正になる符号。"""
+    id: int
+    name: str
+    category: str
+    sign: int
+
+
+# --------------------------------------------------------
+# ChartOfAccounts
+# --------------------------------------------------------
+class ChartOfAccounts:
+    """
+    勘定科目表。
+    勘定科目に登録順の整数ID (0, 1, 2, ...) を振り、ID をリストの添字として明細や残高を管理できるようにする。
+    勘定科目名と別名の両方から ID を引ける。
+    """
+
+    def __init__(self):
+        self.accounts: List[AccountInfo] = []
+        self._ids: Dict[str, int] = {}
+        self._category_ids: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.accounts)
+
+    def __iter__(self) -> Iterator[AccountInfo]:
+        return iter(self.accounts)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    def __getitem__(self, account_id: int) -> AccountInfo:
+        return self.accounts[account_id]
+
+    def add(self, name: str, category: str) -> AccountInfo:
+        """勘定科目を登録して返します。登録済みの場合は既存の勘定科目を返します。"""
+        account_id = self._ids.get(name)
+        if account_id is not None:
+            return self.accounts[account_id]
+
+        info = AccountInfo(len(self.accounts), name, category, normal_sign(category))
+        self.accounts.append(info)
+        self._ids[name] = info.id
+        self._category_ids.setdefault(category, []).append(info.id)
+        return info
+
+    def add_alias(self, alias: str, name: str) -> bool:
+        """勘定科目 name に別名を登録します。name が未登録、または alias が使用済みの場合は False を返します。"""
+        account_id = self._ids.get(name)
+        if account_id is None or alias in self._ids:
+            return False
+
+        self._ids[alias] = account_id
+        return True
+
+    def get_id(self, name: str) -> int | None:
+        """勘定科目名または別名から ID を返します。未登録の場合は None を返します。"""
+        return self._ids.get(name)
+
+    def get(self, name: str) -> AccountInfo | None:
+        """勘定科目名または別名から勘定科目を返します。未登録の場合は None を返します。"""
+        account_id = self._ids.get(name)
+        return None if account_id is None else self.accounts[account_id]
+
+    def ids_in(self, category: str) -> List[int]:
+        """カテゴリに属する勘定科目の ID を登録順に返します。"""
+        return self._category_ids.get(category, [])
@@ -0,0 +1,148 @@
+"""
+Checkpoint module
+帳簿の明細テーブルを定期的に JSON ファイルへ保存し、起動時の仕訳ログの再適用を末尾のみに抑える
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict
+
+from bokicast_mcp_server.mod_ledger import LedgerSnapshot
+from bokicast_mcp_server.mod_journal_log import entity_path
+
+logger = logging.getLogger(__name__)
+
+# チェックポイントの形式。形式の異なるチェックポイントは読み込まず、仕訳ログ全体を再適用する
+CHECKPOINT_FORMAT = 2
+
+
+# --------------------------------------------------------
+# Checkpoint
+# --------------------------------------------------------
+class Checkpoint:
+    """
+    帳簿のチェックポイント（帳簿のスナップショット時点の明細テーブル、および仕訳ログの位置）。
+    interval 件の転記ごと、または interval_seconds 秒経過後の転記時に保存する。
+    転記時の保存は、公開済みのスナップショットをワーカースレッドでシリアライズして書き出すため、転記を待たせない。
+    保存は一時ファイルへ書き出してから置き換えるため、途中でクラッシュしても前回分が残る。
+    """
+
+    def __init__(self, path: str, interval: int = 1000, interval_seconds: float = 300):
+        self.path = path
+        self.interval = max(1, interval)
+        self.interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_saved = time.monotonic()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+        self._writing: Future | None = None
+
+    @classmethod
+    def from_config(cls, conf: Dict[str, Any], entity: str | None = None) -> 'Checkpoint | None':
+        """
+        YAML 設定の「チェックポイント」から Checkpoint を作成します。未設定の場合は None を返します。
+        entity を指定した場合は、ファイル名にエンティティ名を付加します。
+
+        チェックポイント:
+          ファイル: "bokicast-checkpoint.json"
+          間隔件数: 1000
+          間隔秒: 300
+        """
+        cp_conf = conf.get("チェックポイント")
+        if not cp_conf or not cp_conf.get("ファイル"):
+            return None
+
+        return cls(entity_path(cp_conf["ファイル"], entity), cp_conf.get("間隔件数", 1000), cp_conf.get("間隔秒", 300))
+
+    def load(self) -> Dict[str, Any] | None:
+        """保存済みのチェックポイントを返します。存在しない、または壊れている場合は None を返します。"""
+        if not os.path.exists(self.path):
+            return None
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"チェックポイント {self.path} を読み込めないため、仕訳ログ全体を再適用します。{e}")
+            return None
+
+        if data.get("format") != CHECKPOINT_FORMAT:
+            logger.warning(f"チェックポイント {self.path} は形式が異なるため、仕訳ログ全体を再適用します。")
+            return None
+
+        return data
+
+    def save(self, snapshot: LedgerSnapshot, log_offset: int):
+        """
+        帳簿のスナップショットと、そこまでに反映済みの仕訳ログの位置 (バイト) を保存し、完了を待ちます。
+        仕訳ログは呼び出し前に fsync しておいてください。
+        """
+        self.wait()
+        self._write(snapshot, log_offset, self._pending)
+
+    def save_async(self, snapshot: LedgerSnapshot, log_offset: int) -> bool:
+        """
+        save と同じ内容をワーカースレッドで保存します。
+        前回の保存が終わっていない場合は保存せずに False を返します (次の転記で改めて保存します)。
+        """
+        if self._writing is not None and not self._writing.done():
+            return False
+
+        self._writing = self._executor.submit(self._write, snapshot, log_offset, self._pending)
+        return True
+
+    def wait(self):
+        """ワーカースレッドで保存中のチェックポイントがあれば、完了を待ちます。"""
+        if self._writing is not None:
+            self._writing.result()
+            self._writing = None
+
+    def close(self):
+        """保存中のチェックポイントの完了を待ち、ワーカースレッドを終了します。"""
+        self.wait()
+        self._executor.shutdown()
+
+    def _write(self, snapshot: LedgerSnapshot, log_offset: int, count: int):
+        """
+        チェックポイントを書き出します。保存できた場合のみ、スナップショットに含まれる転記 count 件を未保存の件数から除きます。
+        """
+        try:
+            data = {"format": CHECKPOINT_FORMAT, "log_offset": log_offset, "ledger": snapshot.to_checkpoint()}
+
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"チェックポイント {self.path} を保存できませんでした。{e}")
+            return
+
+        # 💡 保存中に記録された転記は未保存のまま残す
+        with self._lock:
+            self._pending -= count
+            self._last_saved = time.monotonic()
+        logger.info(f"チェックポイント {self.path} を保存しました。(version={snapshot.version})")
+
+    def record(self, count: int = 1) -> bool:
+        """
+        転記 count 件を記録し、チェックポイントを保存すべきときは True を返します。
+        保存中は False を返し、保存の完了後の転記で改めて判定します。
+        """
+        with self._lock:
+            self._pending += count
+        if self._writing is not None and not self._writing.done():
+            return False
+        if self._pending >= self.interval:
+            return True
+
+        return time.monotonic() - self._last_saved >= self.interval_seconds
+
+    @property
+    def pending(self) -> int:
+        """前回の保存以降に記録した転記件数。"""
+        return self._pending
@@ -0,0 +1,180 @@
+"""
+Consolidation module
+親会社・子会社の帳簿を合算し、相殺消去を行った連結帳簿を定義する
+"""
+import logging
+import threading
+from functools import partial
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+from bokicast_mcp_server.mod_chart_of_accounts import ChartOfAccounts
+from bokicast_mcp_server.mod_ledger import Ledger, LedgerSnapshot
+from bokicast_mcp_server.mod_postings import PostingTable, DEBIT, CREDIT, NO_JOURNAL
+
+logger = logging.getLogger(__name__)
+
+
+def strip_entity_prefix(account_name: str) -> str:
+    """"P:現金" のようなエンティティ接頭辞付きの勘定科目名から接頭辞を除きます。"""
+    return account_name.split(":", 1)[-1]
+
+
+# --------------------------------------------------------
+# Elimination
+# --------------------------------------------------------
+class Elimination(NamedTuple):
+    """
+    相殺消去1件分の設定。
+    accounts の残高を連結から除き、その合計 (借方 - 貸方) が借方なら debit_account (資産)、
+    貸方なら credit_account (収益) に差額として計上する。
+    """
+    name: str
+    accounts: List[str]
+    debit_account: str
+    credit_account: str
+
+
+# --------------------------------------------------------
+# ConsolidatedLedger
+# --------------------------------------------------------
+class ConsolidatedLedger:
+    """
+    各エンティティの帳簿を合算した連結帳簿（参照専用）。
+    各帳簿のリスナーで転記された勘定の残高の増減だけを連結残高へ反映するため、
+    get_bs のたびに全エンティティ・全明細を集計し直すことはない。
+    連結勘定は独自の勘定科目表 (chart) で管理し、残高は連結勘定IDを添字とするリストで保持する。
+    snapshot は Ledger と同じ LedgerSnapshot (連結勘定ごとに残高1行の明細テーブル) で、
+    連結残高が変わった後の最初の参照時にのみ作り直す。
+    """
+
+    def __init__(self, ledgers: Dict[str, Ledger], account_map: Dict[str, str], eliminations: List[Elimination]):
+        self.eliminations = eliminations
+        self.chart = ChartOfAccounts()
+        self._ledgers = ledgers
+        self._lock = threading.Lock()
+        self._version = 0
+        self._snapshot = LedgerSnapshot(0, 0, PostingTable(), self.chart, [])
+
+        # (エンティティ, 勘定) -> 連結勘定ID / 相殺消去の番号
+        self._targets: Dict[Tuple[str, str], int] = {}
+        self._elimination_targets: Dict[Tuple[str, str], int] = {}
+        # (エンティティ, 勘定) -> 連結へ反映済みの残高
+        self._seen: Dict[Tuple[str, str], int] = {}
+        # 連結勘定ID -> 残高 / 合算元の (エンティティ, 勘定)
+        self._balances: List[int] = []
+        self._sources: List[List[Tuple[str, str]]] = []
+        self._elimination_totals = [0] * len(eliminations)
+
+        elimination_index = {
+            account_name: index
+            for index, elimination in enumerate(eliminations)
+            for account_name in elimination.accounts
+        }
+
+        for entity, ledger in ledgers.items():
+            for account_name, account in ledger.accounts.items():
+                key = (entity, account_name)
+                index = elimination_index.get(account_name)
+                if index is not None:
+                    self._elimination_targets[key] = index
+                else:
+                    target = self._add_account(account_map.get(account_name, strip_entity_prefix(account_name)), account.category)
+                    self._sources[target].append(key)
+                    self._targets[key] = target
+
+                self._seen[key] = 0
+
+        # 💡 相殺消去の差額 (借方: のれん 等 / 貸方: 負ののれん発生益 等) の勘定も先に登録しておく
+        for elimination in eliminations:
+            self._add_account(elimination.debit_account, "資産")
+            self._add_account(elimination.credit_account, "収益")
+
+        for entity, ledger in ledgers.items():
+            self._on_posted(entity, list(ledger.accounts))
+            ledger.add_listener(partial(self._on_posted, entity))
+
+    def _add_account(self, account_name: str, category: str) -> int:
+        """連結勘定を登録し、その ID を返します。登録済みの場合は既存の ID を返します。"""
+        info = self.chart.add(account_name, category)
+        if info.id == len(self._balances):
+            self._balances.append(0)
+            self._sources.append([])
+        return info.id
+
+    @property
+    def version(self) -> int:
+        """いずれかのエンティティの転記で連結残高が変わるたびに1ずつ増えるバージョン番号。"""
+        return self._version
+
+    def _on_posted(self, entity: str, touched: List[str]):
+        """エンティティの帳簿に転記された勘定の残高の増減を、連結残高へ反映します。"""
+        ledger = self._ledgers[entity]
+        with self._lock:
+            for account_name in touched:
+                key = (entity, account_name)
+                if key not in self._seen:
+                    continue
+
+                balance = ledger.accounts[account_name].get_balance()
+                delta = balance - self._seen[key]
+                if delta == 0:
+                    continue
+
+                self._seen[key] = balance
+                target = self._targets.get(key)
+                if target is not None:
+                    self._balances[target] += delta
+                else:
+                    self._elimination_totals[self._elimination_targets[key]] += delta
+
+            self._version += 1
+
+    @property
+    def snapshot(self) -> LedgerSnapshot:
+        """連結残高のスナップショットを返します。"""
+        with self._lock:
+            if self._snapshot.version == self._version:
+                return self._snapshot
+
+            balances = list(self._balances)
+            for elimination, total in zip(self.eliminations, self._elimination_totals):
+                if total > 0:
+                    balances[self.chart.get_id(elimination.debit_account)] += total
+                elif total < 0:
+                    balances[self.chart.get_id(elimination.credit_account)] += total
+
+            # 💡 連結勘定ごとに残高1行の明細テーブルとして公開する
+            postings = PostingTable(len(balances))
+            for account_id, balance in enumerate(balances):
+                if balance != 0:
+                    postings.append(account_id, NO_JOURNAL, DEBIT if balance > 0 else CREDIT, abs(balance))
+
+            self._snapshot = LedgerSnapshot(self._version, len(postings), postings, self.chart, [])
+            return self._snapshot
+
+    def get_account_data(self, account_name: str) -> Dict[str, Any] | None:
+        """
+        連結勘定の残高と、合算元 (相殺消去の差額の場合は消去した) エンティティの勘定ごとの残高を返します。
+        勘定が存在しない場合は None を返します。
+        """
+        account_id = self.chart.get_id(account_name)
+        if account_id is None:
+            return None
+
+        snapshot = self.snapshot
+        with self._lock:
+            sources = list(self._sources[account_id])
+            for index, (elimination, total) in enumerate(zip(self.eliminations, self._elimination_totals)):
+                if (total > 0 and account_name == elimination.debit_account) or (total < 0 and account_name == elimination.credit_account):
+                    sources += [key for key, target in self._elimination_targets.items() if target == index]
+
+            breakdown = [
+                {"エンティティ": entity, "勘定": source_name, "残高": self._seen[(entity, source_name)]}
+                for entity, source_name in sources
+            ]
+
+        return {
+            "勘定": account_name,
+            "内訳": breakdown,
+            "残高": snapshot.get_balance(account_name)
+        }
@@ -5,10 +5,12 @@ from PySide6.QtWidgets import (
 from PySide6.QtGui import QFont, QFontMetrics, QMouseEvent
 from PySide6.QtCore import Qt, QPoint
 import sys
+from typing import Callable
 
 # 💡 AccountEntryWidget をインポート
 from bokicast_mcp_server.mod_account_entry_widget import AccountEntryWidget
 from bokicast_mcp_server.mod_t_account_widget import TAccountWidget
+from bokicast_mcp_server.mod_ledger import Account
 
 import logging
 logger = logging.getLogger(__name__)
@@ -27,12 +29,11 @@ class JournalEntryWidget(QFrame):
     _drag_start_position: QPoint | None = None
     SNAP_DISTANCE = 15 
     
-    def __init__(self, parent, journal_id: str, font: QFont, account_dict: dict[str, TAccountWidget], journal_dict):
+    def __init__(self, parent, journal_id: str, font: QFont, get_account_widget: Callable[[str], TAccountWidget | None]):
         super().__init__(parent)
         self.font = font
         self.fm = QFontMetrics(self.font)
-        self.account_dict = account_dict
-        self.journal_dict = journal_dict
+        self.get_account_widget = get_account_widget
         self.journal_id = journal_id
         self.balance_status = "✔ 正常"
 
@@ -198,9 +199,21 @@ class JournalEntryWidget(QFrame):
             self.remarks_input.setText(remarks_text)
 
         # 幅や合計の更新
+        # 💡 勘定への転記は帳簿(Ledger)側で行うため、ここでは表示のみ
         self.set_column_width_sync()
         self.update_totals()
-        self.commit()
+
+    def set_journal(self, journal_id: str, journal_data: dict):
+        """
+        表示中の仕訳を消去し、別の仕訳を表示します。
+        ウィジェットを使い回すための処理です。
+        """
+        self.journal_id = journal_id
+        self.header_label.setText(f"仕訳ID: {journal_id}")
+        self.debit_widget.clear_all()
+        self.credit_widget.clear_all()
+        self.remarks_input.clear()
+        self.add_journal(journal_data)
 
     def add_debit(self, account_name: str, amount: int):
         """借方に追加"""
@@ -214,45 +227,6 @@ class JournalEntryWidget(QFrame):
         self.set_column_width_sync()
         self.update_totals()
 
-    def commit(self):
-        if self.balance_status != "✔ 正常":
-            logger.debug(f"Journal {self.journal_id} 不一致のため commit 中止")
-            return
-
-        # debit/credit をテーブルから取得
-        debit_items = self.debit_widget.get_all_items()
-        credit_items = self.credit_widget.get_all_items()
-
-        # 借方
-        for account_name, amount in debit_items:
-            t_widget = self.account_dict.get(account_name)
-            if t_widget is None:
-                # 新規作成
-                t_widget = TAccountWidget(self.parent(), account_name, self.font, self.journal_dict)
-                self.account_dict[account_name] = t_widget
-
-            # 相手勘定が1つの場合は勘定名を付加
-            if len(credit_items) == 1:
-                credit_name = credit_items[0][0]
-                t_widget.add_debit(f"{self.journal_id}-{credit_name}", amount)
-            else:
-                t_widget.add_debit(self.journal_id, amount)
-
-        # 貸方
-        for account_name, amount in credit_items:
-            t_widget = self.account_dict.get(account_name)
-            if t_widget is None:
-                t_widget = TAccountWidget(self.parent(), account_name, self.font, self.journal_dict)
-                self.account_dict[account_name] = t_widget
-
-            if len(debit_items) == 1:
-                debit_name = debit_items[0][0]
-                t_widget.add_credit(f"{self.journal_id}-{debit_name}", amount)
-            else:
-                t_widget.add_credit(self.journal_id, amount)
-
-        logger.debug(f"Journal {self.journal_id} を commit 完了")
-
     # ----------------------------------------------------
     # 内部処理: 幅同期
     # ----------------------------------------------------
@@ -391,13 +365,10 @@ class JournalEntryWidget(QFrame):
         # 関連する TAccountWidget をリストアップ
         related_widgets = []
 
-        for account_name, _ in debit_items:
-            if account_name in self.account_dict:
-                related_widgets.append(self.account_dict[account_name])
-
-        for account_name, _ in credit_items:
-            if account_name in self.account_dict:
-                related_widgets.append(self.account_dict[account_name])
+        for account_name, _ in debit_items + credit_items:
+            w = self.get_account_widget(account_name)
+            if w is not None and w not in related_widgets:
+                related_widgets.append(w)
 
         # 対象がない場合は何もしない
         if not related_widgets:
@@ -516,21 +487,23 @@ if __name__ == "__main__":
     # ---------------------------------------------------
     
     # 1. 現金勘定（データ多め、スクロール確認用）
-    t_cash = TAccountWidget(main_widget, "現金勘定 (スクロールテスト)", font)
+    cash = Account("現金勘定 (スクロールテスト)", "資産")
     
     # 借方: たくさんのデータを追加してスクロールを確認
     for i in range(20):
-        t_cash.add_debit(f"売上入金_{i+1}", 10000)
+        cash.add_debit(f"売上入金_{i+1}", 10000)
     
     # 貸方: 少しだけ
-    t_cash.add_credit("仕入代金", 150000)
-    t_cash.add_credit("光熱費支払", 25000)
+    cash.add_credit("仕入代金", 150000)
+    cash.add_credit("光熱費支払", 25000)
+    t_cash = TAccountWidget(main_widget, cash, font, lambda journal_id: None)
     
     # 2. 買掛金勘定（データ少なめ、上寄せ確認用）
-    t_payable = TAccountWidget(main_widget, "買掛金勘定 (上寄せテスト)", font)
-    t_payable.add_debit("支払", 100000)
-    t_payable.add_credit("期首残高", 200000)
-    t_payable.add_credit("仕入発生", 500000)
+    payable = Account("買掛金勘定 (上寄せテスト)", "負債")
+    payable.add_debit("支払", 100000)
+    payable.add_credit("期首残高", 200000)
+    payable.add_credit("仕入発生", 500000)
+    t_payable = TAccountWidget(main_widget, payable, font, lambda journal_id: None)
     
     # 初期位置設定
     t_cash.move(50, 50)
@@ -542,21 +515,22 @@ if __name__ == "__main__":
     #---------------------------------------------------
 
     account_dict: dict[str, TAccountWidget] = {}
+    get_account_widget = account_dict.get
 
     # 1. 正常な仕訳
-    j1 = JournalEntryWidget(main_widget, "J-001", font, account_dict)
+    j1 = JournalEntryWidget(main_widget, "J-001", font, get_account_widget)
     j1.add_debit("現金", 100000)
     j1.add_credit("売上", 100000)
     j1.remarks_input.setText("商品Aの売上\n3行表示のテスト\nスクロール確認用")
     
     # 2. エラー（不一致）
-    j2 = JournalEntryWidget(main_widget, "J-002", font, account_dict)
+    j2 = JournalEntryWidget(main_widget, "J-002", font, get_account_widget)
     j2.add_debit("旅費交通費", 12500)
     j2.add_credit("現金", 10000) 
     j2.remarks_input.setText("金額不一致のテスト")
     
     # 3. 複数行（スクロール確認）
-    j3 = JournalEntryWidget(main_widget, "J-003", font, account_dict)
+    j3 = JournalEntryWidget(main_widget, "J-003", font, get_account_widget)
     j3.add_debit("仕入", 50000)
     j3.add_debit("租税公課", 5000) 
     j3.add_debit("発送費", 1500)
@@ -564,7 +538,7 @@ if __name__ == "__main__":
     j3.add_credit("買掛金", 57000)
     j3.remarks_input.setText("材料仕入\n複数科目のテスト\n狭いエリアでの表示確認")
 
-    j4 = JournalEntryWidget(main_widget, "J-004", font, account_dict)
+    j4 = JournalEntryWidget(main_widget, "J-004", font, get_account_widget)
     journal_data = {
         "debit": [
             {"account": "仕入", "amount": 1000},
@@ -589,11 +563,6 @@ if __name__ == "__main__":
     j3.show()
     j4.show()
 
-    j1.commit()
-    j2.commit()
-    j3.commit()
-    j4.commit()
-
     main_widget.show()
 
     sys.exit(app.exec())
\ No newline at end of file
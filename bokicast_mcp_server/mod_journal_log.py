@@ -0,0 +1,125 @@
+"""
+Journal log module
+転記済みの仕訳を JSONL ファイルへ追記保存し、起動時に読み出す
+"""
+import json
+import logging
+import os
+from typing import Any, Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+
+def entity_path(path: str, entity: str | None) -> str:
+    """
+    エンティティごとのファイル名を返します。
+    例: entity_path("bokicast-journal.jsonl", "P社") -> "bokicast-journal.P社.jsonl"
+    """
+    if not entity:
+        return path
+
+    root, ext = os.path.splitext(path)
+    return f"{root}.{entity}{ext}"
+
+
+# --------------------------------------------------------
+# JournalLog
+# --------------------------------------------------------
+class JournalLog:
+    """
+    追記専用の仕訳ログ（1行1仕訳の JSONL）。
+    追記のたびに flush してプロセスのクラッシュに備え、
+    fsync は sync_interval 件ごとにまとめて行う。
+    offset は追記済みの末尾のバイト位置で、チェックポイントからの再開位置として使う。
+    """
+
+    def __init__(self, path: str, sync_interval: int = 32):
+        self.path = path
+        self.sync_interval = max(1, sync_interval)
+        self.offset = 0
+        self._file = None
+        self._pending = 0
+
+    @classmethod
+    def from_config(cls, conf: Dict[str, Any], entity: str | None = None) -> 'JournalLog | None':
+        """
+        YAML 設定の「仕訳ログ」から JournalLog を作成します。未設定の場合は None を返します。
+        entity を指定した場合は、ファイル名にエンティティ名を付加します。
+
+        仕訳ログ:
+          ファイル: "bokicast-journal.jsonl"
+          同期件数: 32
+        """
+        log_conf = conf.get("仕訳ログ")
+        if not log_conf or not log_conf.get("ファイル"):
+            return None
+
+        return cls(entity_path(log_conf["ファイル"], entity), log_conf.get("同期件数", 32))
+
+    def read(self, offset: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        ログに保存された仕訳を offset (バイト位置) から順に返します。
+        書き込み途中でクラッシュした不完全な行は読み飛ばします。
+        """
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line.decode("utf-8"))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    logger.warning(f"仕訳ログ {self.path} に解析できない行があるため読み飛ばします。{line[:80]!r}")
+
+    def open(self):
+        """ログファイルを追記モードで開きます。"""
+        if self._file is not None:
+            return
+
+        self._file = open(self.path, "ab")
+        self.offset = self._file.tell()
+
+        # 💡 末尾が改行で終わっていない(書き込み途中でクラッシュした)場合は、次の仕訳と混ざらないよう改行する
+        if self.offset > 0:
+            with open(self.path, "rb") as f:
+                f.seek(self.offset - 1)
+                if f.read(1) != b"\n":
+                    self._file.write(b"\n")
+                    self._file.flush()
+                    self.offset = self._file.tell()
+
+    def append(self, journal_data: Dict[str, Any]):
+        """仕訳を1行追記します。"""
+        self.append_many([journal_data])
+
+    def append_many(self, journal_list: List[Dict[str, Any]]):
+        """複数の仕訳を1仕訳1行で追記します。flush はまとめて1回だけ行います。"""
+        self.open()
+        self._file.write("".join(json.dumps(journal_data, ensure_ascii=False) + "\n" for journal_data in journal_list).encode("utf-8"))
+        self._file.flush()
+        self.offset = self._file.tell()
+
+        self._pending += len(journal_list)
+        if self._pending >= self.sync_interval:
+            self.sync()
+
+    def sync(self):
+        """未同期の追記をディスクへ書き出します (fsync)。"""
+        if self._file is None or self._pending == 0:
+            return
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def close(self):
+        """未同期の追記を書き出してログファイルを閉じます。"""
+        if self._file is None:
+            return
+
+        self.sync()
+        self._file.close()
+        self._file = None
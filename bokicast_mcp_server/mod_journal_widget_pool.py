@@ -0,0 +1,83 @@
+"""
+Journal widget pool module
+仕訳ごとにウィンドウを作らず、少数の JournalEntryWidget を使い回して仕訳を表示する
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+from PySide6.QtWidgets import QWidget
+from PySide6.QtGui import QFont
+
+from bokicast_mcp_server.mod_journal_entry_widget import JournalEntryWidget
+from bokicast_mcp_server.mod_t_account_widget import TAccountWidget
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------------
+# JournalWidgetPool
+# --------------------------------------------------------
+class JournalWidgetPool:
+    """
+    JournalEntryWidget のプール。
+    仕訳データ自体は帳簿(Ledger)が保持し、ウィジェットは表示が必要になったときに割り当てる。
+    空きがなければ、非表示のもの → 最も長く使われていないもの の順に再利用する。
+    """
+    POOL_SIZE = 8
+
+    def __init__(self, parent: QWidget, font: QFont, get_account_widget: Callable[[str], TAccountWidget | None], size: int = POOL_SIZE):
+        self.parent = parent
+        self.font = font
+        self.get_account_widget = get_account_widget
+        self.size = max(1, size)
+
+        # 💡 仕訳ID -> ウィジェット。末尾ほど最近使われたもの
+        self._widgets: OrderedDict[str, JournalEntryWidget] = OrderedDict()
+        self._journal_data: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, journal_id: str) -> JournalEntryWidget | None:
+        """指定された仕訳を表示中のウィジェットを返します。割り当てがなければ None を返します。"""
+        return self._widgets.get(journal_id)
+
+    def acquire(self, journal_id: str, journal_data: Dict[str, Any]) -> JournalEntryWidget:
+        """
+        指定された仕訳を表示するウィジェットを返します。
+        すでに割り当て済みならそのまま、そうでなければ新規作成または再利用して仕訳を描画します。
+        """
+        j = self._widgets.get(journal_id)
+        if j is not None:
+            self._widgets.move_to_end(journal_id)
+            # 同じ仕訳IDで別の仕訳が登録された場合は描画し直す
+            if self._journal_data[journal_id] is not journal_data:
+                j.set_journal(journal_id, journal_data)
+                self._journal_data[journal_id] = journal_data
+            return j
+
+        reuse = len(self._widgets) >= self.size
+        if reuse:
+            j = self._pop_reusable()
+        else:
+            j = JournalEntryWidget(self.parent, journal_id, self.font, self.get_account_widget)
+
+        # 💡 描画に失敗してもウィジェットを失わないよう、描画の前にプールへ登録する
+        self._widgets[journal_id] = j
+        self._journal_data[journal_id] = journal_data
+
+        if reuse:
+            j.hide()
+            j.set_journal(journal_id, journal_data)
+        else:
+            j.add_journal(journal_data)
+        return j
+
+    def _pop_reusable(self) -> JournalEntryWidget:
+        for journal_id, j in self._widgets.items():
+            if not j.isVisible():
+                break
+        else:
+            journal_id = next(iter(self._widgets))
+
+        logger.debug(f"仕訳 {journal_id} のウィジェットを再利用します。")
+        del self._journal_data[journal_id]
+        return self._widgets.pop(journal_id)
@@ -0,0 +1,692 @@
+"""
+Ledger module
+Qt に依存しない帳簿(勘定科目・仕訳・残高)を定義する
+"""
+import json
+import logging
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+import numpy as np
+
+from bokicast_mcp_server.mod_chart_of_accounts import ChartOfAccounts, normal_sign
+from bokicast_mcp_server.mod_postings import PostingTable, PostingTotals, DEBIT, CREDIT, NO_JOURNAL, NO_DATE, parse_date
+
+logger = logging.getLogger(__name__)
+
+
+def parse_journal_list(journals_str: str) -> List[Any]:
+    """
+    JSON配列、またはNDJSON(1行1仕訳)の文字列を仕訳データのリストに変換します。
+    """
+    text = journals_str.strip()
+    if text.startswith("["):
+        return json.loads(text)
+
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+# --------------------------------------------------------
+# AccountQuery
+# --------------------------------------------------------
+class AccountQuery(NamedTuple):
+    """
+    T字勘定の明細の取得条件。
+    cursor は明細テーブルの行番号で、前回の結果の「次カーソル」を指定すると続きから取得する。
+    limit が0の場合は件数を制限しない。仕訳ID・日付の範囲は両端を含み、None は制限なし。
+    結果の「件数」はカーソルに関係なく、条件に合う明細全体の件数。
+    summary が True の場合は明細を返さず、条件に合う明細の合計と件数のみを返す。
+    """
+    cursor: int = 0
+    limit: int = 0
+    journal_from: str | None = None
+    journal_to: str | None = None
+    date_from: str | None = None
+    date_to: str | None = None
+    summary: bool = False
+
+
+# --------------------------------------------------------
+# Account
+# --------------------------------------------------------
+class Account:
+    """
+    勘定科目（T字勘定）1つ分の帳簿データ。
+    借方・貸方の明細を (ラベル, 金額) で保持し、合計は整数で積み上げる。
+    id は帳簿の勘定科目表 (ChartOfAccounts) の勘定科目ID。
+    rows / positions は転記順の明細の索引で、明細テーブルの行番号と、その明細の debit / credit 内の位置。
+    """
+
+    def __init__(self, name: str, category: str, account_id: int = -1):
+        self.id = account_id
+        self.name = name
+        self.category = category
+        self.debit: List[Tuple[str, int]] = []
+        self.credit: List[Tuple[str, int]] = []
+        self.debit_total = 0
+        self.credit_total = 0
+        self.rows: List[int] = []
+        self.positions: List[int] = []
+
+    def add_debit(self, label: str, amount: int):
+        """借方（Debit）に明細を追加します。"""
+        self.debit.append((label, amount))
+        self.debit_total += amount
+
+    def add_credit(self, label: str, amount: int):
+        """貸方（Credit）に明細を追加します。"""
+        self.credit.append((label, amount))
+        self.credit_total += amount
+
+    def get_balance(self) -> int:
+        """借方合計 - 貸方合計 を返します。"""
+        return self.debit_total - self.credit_total
+
+    def get_account_data(self) -> Dict[str, Any]:
+        """
+        T字勘定の借方、貸方データを返します。
+
+        Returns:
+            dict: {"勘定": 勘定名, "借方": [...], "貸方": [...], "残高": 残高}
+        """
+        return {
+            "勘定": self.name,
+            "借方": [{"ラベル": label, "金額": amount} for label, amount in self.debit],
+            "貸方": [{"ラベル": label, "金額": amount} for label, amount in self.credit],
+            "残高": self.get_balance()
+        }
+
+
+# --------------------------------------------------------
+# Ledger
+# --------------------------------------------------------
+class Ledger:
+    """
+    勘定科目と仕訳を保持する帳簿。
+    仕訳の検証・転記と、貸借対照表／損益計算書データの集計を行う。
+    転記のたびに登録済みのリスナーへ、転記した勘定科目名のリストを通知する。
+    勘定は勘定科目表 (chart) の整数IDで管理し、検証・転記・集計は ID を添字にしたリストで行う。
+    明細は勘定ごとの Account (表示用のラベル付き) と、列指向の明細テーブル (postings) の両方へ追記し、
+    残高の集計は明細テーブルで行う。
+    accounts (勘定科目名 -> Account) は画面表示など名前で参照する側のために保持する。
+    """
+
+    def __init__(self):
+        self.chart = ChartOfAccounts()
+        self.accounts: Dict[str, Account] = {}
+        self.journals: Dict[str, Dict[str, Any]] = {}
+        self.postings = PostingTable()
+        self._accounts_by_id: List[Account] = []
+        self._listeners: List[Callable[[List[str]], None]] = []
+        self.snapshot = LedgerSnapshot(0, 0, self.postings, self.chart, self._accounts_by_id)
+
+    def add_account(self, name: str, category: str) -> Account:
+        """勘定科目表に勘定科目を登録し、その Account を返します。登録済みの場合は既存の Account を返します。"""
+        info = self.chart.add(name, category)
+        if info.id < len(self._accounts_by_id):
+            return self._accounts_by_id[info.id]
+
+        account = Account(name, category, info.id)
+        self._accounts_by_id.append(account)
+        self.accounts[name] = account
+        return account
+
+    @classmethod
+    def from_opening_balances(cls, opening_balances: Dict[str, Any], aliases: Dict[str, str] | None = None) -> 'Ledger':
+        """
+        期首残高試算表（カテゴリ -> {勘定科目: 残高}）から帳簿を作成します。
+        aliases (別名 -> 勘定科目名) を指定した場合は、仕訳・参照で別名も使用できます。
+        """
+        ledger = cls()
+        for category, accounts_data in opening_balances.items():
+            # 💡 "P:純資産" のようなエンティティ接頭辞付きのカテゴリは接頭辞を除く
+            category = category.split(":")[-1]
+
+            # データ形式のチェック (念のため)
+            if not isinstance(accounts_data, dict):
+                logger.warning(f"カテゴリ '{category}' のデータ形式が不正です。辞書形式である必要があります。")
+                continue
+
+            for account_name, initial_balance in accounts_data.items():
+                # 残高が0でも、取引で使用する可能性があるため勘定自体は作成します
+                account = ledger.add_account(account_name, category)
+
+                if initial_balance == 0:
+                    logger.debug(f"  -> {account_name} ({category}): 残高が0のため期首仕訳の登録はスキップ")
+                    continue
+
+                # 正常残高の符号に基づいて 借方(Debit) か 貸方(Credit) かを判断
+                sign = ledger.chart[account.id].sign
+                if sign == 0:
+                    logger.warning(f"  -> {account_name}: 未知のカテゴリ '{category}' です。期首残高は未登録。")
+                    continue
+
+                ledger._add_posting(account.id, DEBIT if sign > 0 else CREDIT, "期首残高", initial_balance, NO_JOURNAL)
+
+        for alias, account_name in (aliases or {}).items():
+            if account_name in ledger.chart and not ledger.chart.add_alias(alias, account_name):
+                logger.warning(f"別名 '{alias}' は既に使用されているため、'{account_name}' の別名に登録できません。")
+
+        ledger._publish()
+        return ledger
+
+    @property
+    def version(self) -> int:
+        """転記のたびに1ずつ増える帳簿のバージョン番号。"""
+        return self.snapshot.version
+
+    # ----------------------------------------------------
+    # 変更通知
+    # ----------------------------------------------------
+    def add_listener(self, listener: Callable[[List[str]], None]):
+        """残高変更時に呼び出すリスナーを登録します。"""
+        self._listeners.append(listener)
+
+    def _notify(self, touched: List[str]):
+        for listener in self._listeners:
+            listener(touched)
+
+    def _add_posting(self, account_id: int, side: int, label: str, amount: int, journal: int, date: np.datetime64 = NO_DATE):
+        """勘定 (Account) と明細テーブルの両方へ明細を1行追記します。"""
+        account = self._accounts_by_id[account_id]
+        account.rows.append(len(self.postings))
+        if side == DEBIT:
+            account.positions.append(len(account.debit))
+            account.add_debit(label, amount)
+        else:
+            account.positions.append(len(account.credit))
+            account.add_credit(label, amount)
+
+        self.postings.append(account_id, journal, side, amount, date)
+
+    # ----------------------------------------------------
+    # 仕訳
+    # ----------------------------------------------------
+    def validate_journal(self, journal_data: Dict[str, Any]) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+        """
+        仕訳データを検証し、借方・貸方の (勘定科目ID, 金額) リストを返します。
+        勘定科目は別名でも指定できます。不正な場合は ValueError を送出します。
+        """
+        debit_items, credit_items, _ = self._validate(journal_data)
+        return debit_items, credit_items
+
+    def _validate(self, journal_data: Dict[str, Any]) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]], np.datetime64]:
+        if not isinstance(journal_data, dict):
+            raise ValueError("仕訳データはJSONオブジェクトである必要があります。")
+
+        journal_id = journal_data.get("journal_id", "NO_ID")
+        if not isinstance(journal_id, str):
+            raise ValueError(f"仕訳ID '{journal_id}' は文字列である必要があります。")
+
+        # 💡 再送された仕訳を二重に転記しないよう、転記済みの仕訳IDは受け付けない
+        if journal_id in self.journals:
+            raise ValueError(f"仕訳 {journal_id}: 同じ仕訳IDの仕訳は転記済みです。別の仕訳IDを指定してください。")
+
+        remarks = journal_data.get("remarks")
+        if remarks is not None and not isinstance(remarks, str):
+            raise ValueError(f"仕訳 {journal_id}: 備考 '{remarks}' は文字列である必要があります。")
+
+        debit_items = self._validate_items(journal_id, journal_data.get("debit", []), "借方")
+        credit_items = self._validate_items(journal_id, journal_data.get("credit", []), "貸方")
+
+        debit_total = sum(amount for _, amount in debit_items)
+        credit_total = sum(amount for _, amount in credit_items)
+        if debit_total != credit_total:
+            raise ValueError(f"仕訳 {journal_id}: 貸借が一致しません。借方計 {debit_total:,} / 貸方計 {credit_total:,}")
+
+        try:
+            date = parse_date(journal_data.get("date"))
+        except ValueError as e:
+            raise ValueError(f"仕訳 {journal_id}: {e}") from None
+
+        return debit_items, credit_items, date
+
+    def _validate_items(self, journal_id: str, items: Any, side: str) -> List[Tuple[int, int]]:
+        if not isinstance(items, list) or not items:
+            raise ValueError(f"仕訳 {journal_id}: {side}が指定されていません。")
+
+        result = []
+        for item in items:
+            if not isinstance(item, dict):
+                raise ValueError(f"仕訳 {journal_id}: {side}の明細が不正です。{item}")
+
+            account_name = item.get("account", "")
+            amount = item.get("amount", 0)
+            account_id = self.chart.get_id(account_name)
+            if account_id is None:
+                raise ValueError(f"仕訳 {journal_id}: 勘定科目 '{account_name}' は存在しません。")
+            if not isinstance(amount, int) or isinstance(amount, bool):
+                raise ValueError(f"仕訳 {journal_id}: {account_name} の金額 '{amount}' は整数である必要があります。")
+
+            result.append((account_id, amount))
+
+        return result
+
+    def post(self, journal_data: Dict[str, Any]) -> List[str]:
+        """
+        仕訳を検証して各勘定へ転記し、転記した勘定科目名のリストを返します。
+
+        journal_data = {
+            "journal_id" : "J004",
+            "debit": [{"account": "仕入", "amount": 1000}, ...],
+            "credit": [{"account": "買掛金", "amount": 1000}, ...],
+            "date": "2025-04-01",  (任意)
+            "remarks": "備考文字列"
+        }
+        """
+        touched_ids = self._apply(journal_data)
+        touched = [self.chart[account_id].name for account_id in touched_ids]
+
+        self._publish()
+        self._notify(touched)
+        return touched
+
+    def post_many(self, journal_list: List[Any]) -> List[Dict[str, int] | ValueError]:
+        """
+        複数の仕訳を順に検証して転記し、仕訳ごとに「転記した勘定科目名 -> 転記直後の残高」の辞書、
+        または転記できなかった理由の ValueError を返します。
+        スナップショットの公開とリスナーへの通知は最後に1回だけ、転記した勘定をまとめて行います。
+        """
+        outcomes: List[Dict[str, int] | ValueError] = []
+        touched_ids: Dict[int, None] = {}
+        for journal_data in journal_list:
+            try:
+                account_ids = self._apply(journal_data)
+            except ValueError as e:
+                outcomes.append(e)
+                continue
+
+            touched_ids.update(dict.fromkeys(account_ids))
+            outcomes.append({
+                self._accounts_by_id[account_id].name: self._accounts_by_id[account_id].get_balance()
+                for account_id in account_ids
+            })
+
+        if touched_ids:
+            self._publish()
+            self._notify([self.chart[account_id].name for account_id in touched_ids])
+        return outcomes
+
+    def replay(self, journal_list: Iterable[Dict[str, Any]]) -> int:
+        """
+        保存済みの仕訳をまとめて転記し、転記できた件数を返します。
+        スナップショットの公開とリスナーへの通知は最後に1回だけ行います。
+        """
+        count = 0
+        for journal_data in journal_list:
+            try:
+                self._apply(journal_data)
+                count += 1
+            except ValueError as e:
+                logger.warning(f"仕訳の再適用をスキップしました: {e}")
+
+        self._publish()
+        self._notify(list(self.accounts))
+        return count
+
+    def _apply(self, journal_data: Dict[str, Any]) -> List[int]:
+        """仕訳を検証して各勘定へ転記し、転記した勘定科目IDのリストを返します。"""
+        debit_items, credit_items, date = self._validate(journal_data)
+        journal_id = journal_data.get("journal_id", "NO_ID")
+        journal = self.postings.add_journal(journal_id, journal_data.get("remarks"))
+
+        # 借方
+        label = self._label(journal_id, [account_id for account_id, _ in credit_items])
+        for account_id, amount in debit_items:
+            self._add_posting(account_id, DEBIT, label, amount, journal, date)
+
+        # 貸方
+        label = self._label(journal_id, [account_id for account_id, _ in debit_items])
+        for account_id, amount in credit_items:
+            self._add_posting(account_id, CREDIT, label, amount, journal, date)
+
+        self.journals[journal_id] = journal_data
+        logger.debug(f"Journal {journal_id} を commit 完了")
+
+        return list(dict.fromkeys(account_id for account_id, _ in debit_items + credit_items))
+
+    def _label(self, journal_id: str, counter_ids: List[int]) -> str:
+        """明細のラベルを返します。相手勘定が1つの場合は仕訳IDに勘定名を付加します。"""
+        if len(counter_ids) == 1:
+            return f"{journal_id}-{self._accounts_by_id[counter_ids[0]].name}"
+        return journal_id
+
+    # ----------------------------------------------------
+    # チェックポイント
+    # ----------------------------------------------------
+    def load_checkpoint(self, data: Dict[str, Any]):
+        """
+        LedgerSnapshot.to_checkpoint で保存した明細テーブルで帳簿を置き換えます。
+        勘定ごとの明細・合計と仕訳データは、明細テーブルから作り直します。
+        設定に存在しない勘定の明細は読み飛ばします。
+        チェックポイントの期首残高が設定 (期首残高試算表) と異なる場合は、帳簿を変更せずに ValueError を送出します。
+        """
+        account_ids = {info.name: info.id for info in self.chart}
+        unknown = [name for name in data["postings"]["accounts"] if name not in account_ids]
+        if unknown:
+            logger.warning(f"チェックポイントの勘定 {unknown} は設定に存在しないため読み飛ばします。")
+
+        postings = PostingTable.from_checkpoint(data["postings"], account_ids)
+        if not postings.same_opening_balances(self.postings):
+            raise ValueError("チェックポイントの期首残高が設定の期首残高と一致しません。")
+
+        self.postings = postings
+        self._rebuild_from_postings()
+        self._publish()
+        self._notify(list(self.accounts))
+
+    def _rebuild_from_postings(self):
+        """
+        明細テーブルから、各勘定の明細 (ラベル付き)・合計・索引 (rows / positions) と、仕訳データ (journals) を作り直します。
+        """
+        postings = self.postings
+        columns = postings.columns()
+        account_ids = columns.account_id.tolist()
+        journals = columns.journal.tolist()
+        sides = columns.side.tolist()
+        amounts = columns.amount.tolist()
+
+        # 仕訳番号 -> 明細の行番号
+        journal_rows: Dict[int, List[int]] = {}
+        for row, journal in enumerate(journals):
+            if journal != NO_JOURNAL:
+                journal_rows.setdefault(journal, []).append(row)
+
+        labels = ["期首残高"] * len(journals)
+        self.journals = {}
+        for journal, rows in journal_rows.items():
+            journal_id = postings.journal_ids[journal]
+            debit_rows = [row for row in rows if sides[row] == DEBIT]
+            credit_rows = [row for row in rows if sides[row] != DEBIT]
+
+            debit_label = self._label(journal_id, [account_ids[row] for row in credit_rows])
+            credit_label = self._label(journal_id, [account_ids[row] for row in debit_rows])
+            for row in debit_rows:
+                labels[row] = debit_label
+            for row in credit_rows:
+                labels[row] = credit_label
+
+            journal_data = {
+                "journal_id": journal_id,
+                "debit": [{"account": self.chart[account_ids[row]].name, "amount": amounts[row]} for row in debit_rows],
+                "credit": [{"account": self.chart[account_ids[row]].name, "amount": amounts[row]} for row in credit_rows]
+            }
+            date = columns.date[rows[0]]
+            if not np.isnat(date):
+                journal_data["date"] = str(date)
+            if postings.journal_remarks[journal] is not None:
+                journal_data["remarks"] = postings.journal_remarks[journal]
+            self.journals[journal_id] = journal_data
+
+        for account in self._accounts_by_id:
+            account.debit, account.credit = [], []
+            account.debit_total = account.credit_total = 0
+            account.rows, account.positions = [], []
+
+        for row, (account_id, side, amount, label) in enumerate(zip(account_ids, sides, amounts, labels)):
+            account = self._accounts_by_id[account_id]
+            account.rows.append(row)
+            if side == DEBIT:
+                account.positions.append(len(account.debit))
+                account.add_debit(label, amount)
+            else:
+                account.positions.append(len(account.credit))
+                account.add_credit(label, amount)
+
+    # ----------------------------------------------------
+    # スナップショット
+    # ----------------------------------------------------
+    def _publish(self):
+        """
+        転記結果を反映した新しいスナップショットを作成して差し替えます。
+        スナップショットは明細テーブルの現在の行数を記録するだけで、集計は参照時に行います。
+        """
+        # 💡 参照の差し替えのみで公開するため、読み取り側はロック不要
+        self.snapshot = LedgerSnapshot(self.snapshot.version + 1, len(self.postings), self.postings, self.chart, self._accounts_by_id)
+
+    # ----------------------------------------------------
+    # 集計 (最新のスナップショットから取得)
+    # ----------------------------------------------------
+    def get_category_dict(self, category_name: str) -> Dict[str, int]:
+        """指定されたカテゴリの勘定科目と残高の辞書を返します。"""
+        return self.snapshot.get_category_dict(category_name)
+
+    def get_bs_data(self) -> Dict[str, Dict[str, int]]:
+        """貸借対照表データを返します。"""
+        return self.snapshot.get_bs_data()
+
+    def get_pl_data(self) -> Dict[str, Dict[str, int]]:
+        """損益計算書データを返します。"""
+        return self.snapshot.get_pl_data()
+
+    def get_account_data(self, account_name: str) -> Dict[str, Any] | None:
+        """T字勘定データを返します。勘定が存在しない場合は None を返します。"""
+        return self.snapshot.get_account_data(account_name)
+
+
+# --------------------------------------------------------
+# LedgerSnapshot
+# --------------------------------------------------------
+class LedgerSnapshot:
+    """
+    ある時点の帳簿の読み取り専用スナップショット。
+    Ledger が転記のたびに新しいスナップショットを作成して差し替える（コピーオンライト）ため、
+    Qt スレッド以外からもロックなしで、転記途中の状態を見ることなく参照できる。
+    追記専用の明細テーブルの、スナップショット時点の行数 (size) までを集計対象とする。
+    明細は Account の追記専用リストを、スナップショット時点の件数で切り出して参照する。
+    """
+
+    def __init__(self, version: int, size: int, postings: PostingTable, chart: ChartOfAccounts, accounts: List[Account]):
+        self.version = version
+        self.size = size
+        self.postings = postings
+        self.chart = chart
+        self._accounts = accounts
+
+    def to_checkpoint(self) -> Dict[str, Any]:
+        """
+        スナップショット時点の明細テーブルを、JSON に保存できる辞書で返します。
+        勘定ごとの明細と仕訳データは明細テーブルから作り直せるため保存しません。
+        公開済みのスナップショットのみを参照するため、任意のスレッドから呼び出せます。
+        """
+        return {
+            "version": self.version,
+            "postings": self.postings.to_checkpoint(self.size, [info.name for info in self.chart])
+        }
+
+    def totals(self) -> PostingTotals:
+        """勘定科目IDを添字とする、借方・貸方の合計と明細数を返します。"""
+        return self.postings.totals(self.size, len(self.chart))
+
+    def get_balance(self, account_name: str) -> int:
+        """借方合計 - 貸方合計 を返します。勘定が存在しない場合は ValueError を送出します。"""
+        account_id = self.chart.get_id(account_name)
+        if account_id is None:
+            raise ValueError(f"勘定科目 '{account_name}' は存在しません。")
+
+        totals = self.totals()
+        return int(totals.debit_total[account_id] - totals.credit_total[account_id])
+
+    def get_category_dict(self, category_name: str) -> Dict[str, int]:
+        """
+        指定されたカテゴリの勘定科目と残高の辞書を返します。残高0の勘定は含めません。
+        残高は正常残高の符号を掛けた値 (負債・純資産・収益は貸方残高が正) です。
+        """
+        account_ids = np.asarray(self.chart.ids_in(category_name), dtype=np.intp)
+        balances = self.totals().balance[account_ids] * normal_sign(category_name)
+
+        return {
+            self.chart[int(account_ids[i])].name: int(balances[i])
+            for i in np.flatnonzero(balances)
+        }
+
+    def get_bs_data(self) -> Dict[str, Dict[str, int]]:
+        """貸借対照表データを返します。"""
+        return {
+            "資産": self.get_category_dict("資産"),
+            "負債": self.get_category_dict("負債"),
+            "純資産": self.get_category_dict("純資産")
+        }
+
+    def get_pl_data(self) -> Dict[str, Dict[str, int]]:
+        """損益計算書データを返します。"""
+        return {
+            "費用": self.get_category_dict("費用"),
+            "収益": self.get_category_dict("収益")
+        }
+
+    def get_trial_balance_data(self) -> Dict[str, Any]:
+        """
+        合計残高試算表データを返します。明細のない勘定は含めません。
+        全勘定の合計は明細テーブルの1回の集計から求めます。
+        """
+        totals = self.totals()
+        debit_total = totals.debit_total[:len(self.chart)]
+        credit_total = totals.credit_total[:len(self.chart)]
+        balance = debit_total - credit_total
+        debit_balance = np.maximum(balance, 0)
+        credit_balance = np.maximum(-balance, 0)
+
+        rows = [
+            {
+                "勘定": self.chart[account_id].name,
+                "区分": self.chart[account_id].category,
+                "借方合計": int(debit_total[account_id]),
+                "貸方合計": int(credit_total[account_id]),
+                "借方残高": int(debit_balance[account_id]),
+                "貸方残高": int(credit_balance[account_id])
+            }
+            for account_id in np.flatnonzero((totals.debit_count + totals.credit_count)[:len(self.chart)]).tolist()
+        ]
+
+        total = {
+            "借方合計": int(debit_total.sum()),
+            "貸方合計": int(credit_total.sum()),
+            "借方残高": int(debit_balance.sum()),
+            "貸方残高": int(credit_balance.sum())
+        }
+        return {
+            "勘定": rows,
+            "合計": total,
+            "貸借一致": total["借方合計"] == total["貸方合計"] and total["借方残高"] == total["貸方残高"]
+        }
+
+    def get_account_data(self, account_name: str, query: AccountQuery | None = None) -> Dict[str, Any] | None:
+        """
+        T字勘定データを返します。勘定科目名のほか別名でも指定できます。勘定が存在しない場合は None を返します。
+        query を指定した場合は、条件に合う明細のみ (または合計のみ) を返します。
+        残高と明細数は、全勘定の集計ではなく、この勘定のスナップショット時点の明細のみから求めます。
+        """
+        account_id = self.chart.get_id(account_name)
+        if account_id is None:
+            return None
+
+        account = self._accounts[account_id]
+        columns = self.postings.columns(self.size)
+        selected = np.asarray(account.rows[:bisect_left(account.rows, self.size)], dtype=np.intp)
+        is_debit = columns.side[selected] == DEBIT
+        amounts = columns.amount[selected]
+        balance = int(amounts[is_debit].sum() - amounts[~is_debit].sum())
+        if query is None:
+            debit_count = int(is_debit.sum())
+            return {
+                "勘定": account.name,
+                "借方": [{"ラベル": label, "金額": amount} for label, amount in account.debit[:debit_count]],
+                "貸方": [{"ラベル": label, "金額": amount} for label, amount in account.credit[:len(selected) - debit_count]],
+                "残高": balance
+            }
+
+        return self._query_account(account, balance, query)
+
+    def _query_account(self, account: Account, balance: int, query: AccountQuery) -> Dict[str, Any]:
+        """
+        勘定の明細の索引 (rows) から、条件に合う明細を取得します。
+        行番号・仕訳IDの範囲は索引の二分探索で絞り込み、日付の範囲は絞り込んだ明細のみを走査するため、
+        勘定の全明細を組み立てることはない。
+        件数と summary の合計はカーソルに関係なく条件に合う明細全体の値で、カーソルは返す明細 (ページ) のみに適用する。
+        """
+        rows = account.rows
+        columns = self.postings.columns(self.size)
+
+        # 💡 スナップショット時点の明細のみ (索引は行番号順)
+        start, stop = 0, bisect_left(rows, self.size)
+
+        if query.journal_from is not None or query.journal_to is not None:
+            first = self._journal_number(query.journal_from, NO_JOURNAL)
+            last = self._journal_number(query.journal_to, len(self.postings.journal_ids))
+            row_start, row_stop = self.postings.journal_rows(self.size, first, last)
+            start, stop = bisect_left(rows, row_start, start, stop), bisect_left(rows, row_stop, start, stop)
+            # 💡 journal_from が journal_to より後の場合は、該当する明細なし
+            stop = max(stop, start)
+
+        selected = None
+        matched = None
+        if query.date_from is not None or query.date_to is not None:
+            selected = np.asarray(rows[start:stop], dtype=np.intp)
+            dates = columns.date[selected]
+            mask = np.ones(len(selected), dtype=bool)
+            if query.date_from is not None:
+                mask &= dates >= parse_date(query.date_from)
+            if query.date_to is not None:
+                mask &= dates <= parse_date(query.date_to)
+            selected = selected[mask]
+            matched = start + np.flatnonzero(mask)
+
+        count = stop - start if matched is None else len(matched)
+
+        if query.summary:
+            if selected is None:
+                selected = np.asarray(rows[start:stop], dtype=np.intp)
+            is_debit = columns.side[selected] == DEBIT
+            amounts = columns.amount[selected]
+            return {
+                "勘定": account.name,
+                "借方合計": int(amounts[is_debit].sum()),
+                "貸方合計": int(amounts[~is_debit].sum()),
+                "借方件数": int(is_debit.sum()),
+                "貸方件数": int((~is_debit).sum()),
+                "件数": count,
+                "残高": balance
+            }
+
+        # 💡 カーソル以降の明細から limit 件を返す
+        begin = bisect_left(rows, query.cursor, start, stop)
+        if matched is None:
+            remaining = stop - begin
+        else:
+            matched = matched[np.searchsorted(matched, begin):]
+            remaining = len(matched)
+
+        limit = remaining if query.limit <= 0 else min(query.limit, remaining)
+        if matched is None:
+            page = range(begin, begin + limit)
+        else:
+            page = matched[:limit].tolist()
+
+        debit, credit = [], []
+        for index in page:
+            row = rows[index]
+            if columns.side[row] == DEBIT:
+                label, amount = account.debit[account.positions[index]]
+                debit.append({"ラベル": label, "金額": amount})
+            else:
+                label, amount = account.credit[account.positions[index]]
+                credit.append({"ラベル": label, "金額": amount})
+
+        return {
+            "勘定": account.name,
+            "借方": debit,
+            "貸方": credit,
+            "残高": balance,
+            "件数": count,
+            "次カーソル": rows[page[-1]] + 1 if limit < remaining else None
+        }
+
+    def _journal_number(self, journal_id: str | None, default: int) -> int:
+        if journal_id is None:
+            return default
+
+        number = self.postings.journal_number(journal_id)
+        if number is None:
+            raise ValueError(f"仕訳 '{journal_id}' は存在しません。")
+        return number
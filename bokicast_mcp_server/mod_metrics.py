@@ -0,0 +1,157 @@
+"""
+Metrics module
+MCP ツールの呼び出し回数・レイテンシのヒストグラムを集計し、定期的にファイルへ出力する
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# レイテンシのヒストグラムの上限値 (ミリ秒)
+HISTOGRAM_BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+
+# --------------------------------------------------------
+# ToolMetrics
+# --------------------------------------------------------
+class ToolMetrics:
+    """ツール1つ分の呼び出し回数・エラー回数・レイテンシ。"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def record(self, seconds: float, error: bool):
+        self.count += 1
+        self.errors += error
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+        ms = seconds * 1000
+        for index, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+            if ms <= bound:
+                self.buckets[index] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def histogram(self) -> Dict[str, int]:
+        """HISTOGRAM_BOUNDS_MS 以下の件数ごとのレイテンシのヒストグラムを返します。"""
+        histogram = {f"<={bound}": count for bound, count in zip(HISTOGRAM_BOUNDS_MS, self.buckets)}
+        histogram[f">{HISTOGRAM_BOUNDS_MS[-1]}"] = self.buckets[-1]
+        return histogram
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "呼び出し数": self.count,
+            "エラー数": self.errors,
+            "平均ms": round(self.total_seconds / self.count * 1000, 3) if self.count else 0.0,
+            "最大ms": round(self.max_seconds * 1000, 3),
+            "ヒストグラムms": self.histogram()
+        }
+
+
+# --------------------------------------------------------
+# ServerMetrics
+# --------------------------------------------------------
+class ServerMetrics:
+    """
+    サーバ全体のメトリクス。ツールごとの ToolMetrics と、処理待ちの転記件数を保持する。
+    記録と参照は任意のスレッドから呼び出せます。
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._tools: Dict[str, ToolMetrics] = {}
+        self.pending_writes = 0
+        self.max_pending_writes = 0
+
+    def record(self, tool: str, seconds: float, error: bool):
+        """ツールの呼び出し1回分を記録します。"""
+        with self._lock:
+            metrics = self._tools.get(tool)
+            if metrics is None:
+                metrics = self._tools[tool] = ToolMetrics()
+            metrics.record(seconds, error)
+
+    def write_started(self):
+        """転記の依頼を記録します。完了時に write_finished を呼び出してください。"""
+        with self._lock:
+            self.pending_writes += 1
+            self.max_pending_writes = max(self.max_pending_writes, self.pending_writes)
+
+    def write_finished(self):
+        with self._lock:
+            self.pending_writes -= 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "稼働秒数": round(time.monotonic() - self.started, 1),
+                "ツール": {tool: metrics.to_dict() for tool, metrics in sorted(self._tools.items())},
+                "転記待ち": {"件数": self.pending_writes, "最大件数": self.max_pending_writes}
+            }
+
+
+# --------------------------------------------------------
+# MetricsDumper
+# --------------------------------------------------------
+class MetricsDumper:
+    """
+    collect() の結果を interval 秒ごとに JSON ファイルへ書き出すデーモンスレッド。
+    一時ファイルへ書き出してから置き換えるため、読み取り側が書きかけのファイルを読むことはない。
+    """
+
+    def __init__(self, path: str, interval: float, collect: Callable[[], Dict[str, Any]]):
+        self.path = path
+        self.interval = max(1.0, interval)
+        self._collect = collect
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-dumper", daemon=True)
+
+    @classmethod
+    def from_config(cls, conf: Dict[str, Any], collect: Callable[[], Dict[str, Any]]) -> 'MetricsDumper | None':
+        """
+        YAML 設定の「メトリクス」から MetricsDumper を作成します。未設定の場合は None を返します。
+
+        メトリクス:
+          ファイル: "bokicast-metrics.json"
+          間隔秒: 60
+        """
+        metrics_conf = conf.get("メトリクス")
+        if not metrics_conf or not metrics_conf.get("ファイル"):
+            return None
+
+        return cls(metrics_conf["ファイル"], metrics_conf.get("間隔秒", 60), collect)
+
+    def start(self):
+        logger.info(f"メトリクスを {self.interval} 秒ごとに {self.path} へ出力します。")
+        self._thread.start()
+
+    def stop(self):
+        """スレッドを停止し、最後のメトリクスを書き出します。"""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.dump()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.dump()
+
+    def dump(self):
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._collect(), f, ensure_ascii=False, indent=4)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"メトリクスを {self.path} へ出力できませんでした。{e}")
@@ -0,0 +1,250 @@
+"""
+Postings module
+仕訳明細 (勘定科目ID・仕訳番号・貸借・金額・日付) を NumPy 配列に列指向で保持し、勘定ごとの集計を行う
+"""
+import datetime
+import logging
+from typing import Any, Dict, List, NamedTuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 貸借 (side 列の値)
+DEBIT = 1
+CREDIT = -1
+
+# 期首残高など、仕訳に属さない明細の仕訳番号
+NO_JOURNAL = -1
+
+# 日付のない明細の日付
+NO_DATE = np.datetime64("NaT", "D")
+
+
+def parse_date(value: Any) -> np.datetime64:
+    """
+    仕訳の日付 ("YYYY-MM-DD") を np.datetime64 に変換します。None の場合は NO_DATE を返します。
+    不正な場合は ValueError を送出します。
+    """
+    if value is None:
+        return NO_DATE
+    if not isinstance(value, str):
+        raise ValueError(f"日付 '{value}' は \"YYYY-MM-DD\" 形式の文字列である必要があります。")
+
+    try:
+        return np.datetime64(datetime.date.fromisoformat(value), "D")
+    except ValueError:
+        raise ValueError(f"日付 '{value}' は \"YYYY-MM-DD\" 形式の文字列である必要があります。") from None
+
+
+# --------------------------------------------------------
+# PostingColumns / PostingTotals
+# --------------------------------------------------------
+class PostingColumns(NamedTuple):
+    """明細の各列。行 i が i 番目に追記された明細。"""
+    account_id: np.ndarray   # int32
+    journal: np.ndarray      # int32 (PostingTable.journal_ids の添字、仕訳に属さない明細は NO_JOURNAL)
+    side: np.ndarray         # int8 (DEBIT / CREDIT)
+    amount: np.ndarray       # int64
+    date: np.ndarray         # datetime64[D] (日付のない明細は NaT)
+
+
+class PostingTotals(NamedTuple):
+    """勘定科目IDを添字とする、借方・貸方の合計と明細数。"""
+    debit_total: np.ndarray
+    credit_total: np.ndarray
+    debit_count: np.ndarray
+    credit_count: np.ndarray
+
+    @property
+    def balance(self) -> np.ndarray:
+        """借方合計 - 貸方合計。"""
+        return self.debit_total - self.credit_total
+
+
+def _empty_columns(capacity: int) -> PostingColumns:
+    return PostingColumns(
+        np.empty(capacity, dtype=np.int32),
+        np.empty(capacity, dtype=np.int32),
+        np.empty(capacity, dtype=np.int8),
+        np.empty(capacity, dtype=np.int64),
+        np.empty(capacity, dtype="datetime64[D]")
+    )
+
+
+# --------------------------------------------------------
+# PostingTable
+# --------------------------------------------------------
+class PostingTable:
+    """
+    追記専用の明細テーブル。
+    列は容量を倍々に確保した NumPy 配列で、容量を超えた場合は新しい配列へコピーしてから参照を差し替える。
+    追記済みの行は書き換えないため、スナップショットは自身の作成時点の行数 (size) までを
+    ロックなしで参照できる。
+    集計結果は最後に集計した行数とともにキャッシュし、次回は増えた行のみを集計して加算する。
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._columns = _empty_columns(max(1, capacity))
+        self._size = 0
+        self._totals_cache: tuple[int, PostingTotals] | None = None
+        self.journal_ids: List[str] = []
+        self.journal_remarks: List[str | None] = []
+        self._journal_numbers: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add_journal(self, journal_id: str, remarks: str | None = None) -> int:
+        """仕訳IDと備考を登録し、明細の journal 列に設定する仕訳番号を返します。"""
+        self.journal_ids.append(journal_id)
+        self.journal_remarks.append(remarks)
+        self._journal_numbers.setdefault(journal_id, len(self.journal_ids) - 1)
+        return len(self.journal_ids) - 1
+
+    def journal_number(self, journal_id: str) -> int | None:
+        """
+        仕訳IDの仕訳番号を返します。未登録の場合は None を返します。
+        仕訳IDは Ledger が転記済みの仕訳IDを受け付けないことで一意に保たれる。
+        """
+        return self._journal_numbers.get(journal_id)
+
+    def journal_rows(self, size: int, first: int, last: int) -> tuple[int, int]:
+        """
+        先頭 size 行のうち、仕訳番号が first 以上 last 以下の明細の行範囲 [start, stop) を返します。
+        💡 明細は仕訳番号順に追記されるため、journal 列の二分探索で求められる。
+        """
+        journal = self._columns.journal[:size]
+        return int(np.searchsorted(journal, first, "left")), int(np.searchsorted(journal, last, "right"))
+
+    def append(self, account_id: int, journal: int, side: int, amount: int, date: np.datetime64 = NO_DATE):
+        """明細を1行追記します。"""
+        columns = self._columns
+        size = self._size
+        if size == len(columns.amount):
+            grown = _empty_columns(size * 2)
+            for src, dst in zip(columns, grown):
+                dst[:size] = src
+            # 💡 コピーが済んでから差し替えるため、参照中のスナップショットは古い配列をそのまま読める
+            self._columns = columns = grown
+
+        columns.account_id[size] = account_id
+        columns.journal[size] = journal
+        columns.side[size] = side
+        columns.amount[size] = amount
+        columns.date[size] = date
+        self._size = size + 1
+
+    def columns(self, size: int | None = None) -> PostingColumns:
+        """先頭 size 行 (省略時は全行) の各列のビューを返します。"""
+        size = self._size if size is None else size
+        return PostingColumns(*(column[:size] for column in self._columns))
+
+    def same_opening_balances(self, other: 'PostingTable') -> bool:
+        """仕訳に属さない明細 (期首残高) の勘定・貸借・金額が、other と同じかどうかを返します。"""
+        def opening(table: PostingTable) -> list[np.ndarray]:
+            columns = table.columns()
+            mask = columns.journal == NO_JOURNAL
+            return [columns.account_id[mask], columns.side[mask], columns.amount[mask]]
+
+        return all(np.array_equal(a, b) for a, b in zip(opening(self), opening(other)))
+
+    # ----------------------------------------------------
+    # 集計
+    # ----------------------------------------------------
+    def totals(self, size: int, account_count: int) -> PostingTotals:
+        """
+        先頭 size 行の明細を勘定科目IDごとに集計します。
+        キャッシュ済みの行数以降の明細のみを np.bincount / np.add.at でまとめて集計し、キャッシュに加算します。
+        """
+        cache = self._totals_cache
+        if cache is not None and cache[0] == size and len(cache[1].debit_total) >= account_count:
+            return cache[1]
+
+        if cache is None or cache[0] > size:
+            start, base = 0, None
+        else:
+            start, base = cache
+
+        totals = self._aggregate(start, size, account_count)
+        if base is not None:
+            totals = PostingTotals(*(_add_padded(a, b) for a, b in zip(base, totals)))
+
+        # 💡 複数スレッドから同時に集計しても、より多くの行を集計した結果のみでキャッシュを置き換える
+        cache = self._totals_cache
+        if cache is None or cache[0] <= size:
+            self._totals_cache = (size, totals)
+        return totals
+
+    def _aggregate(self, start: int, stop: int, account_count: int) -> PostingTotals:
+        columns = self._columns
+        account_id = columns.account_id[start:stop]
+        if len(account_id):
+            account_count = max(account_count, int(account_id.max()) + 1)
+
+        # 💡 勘定科目ID * 2 + (貸方なら1) をキーに、借方・貸方を1回でグループ集計する
+        key = account_id.astype(np.intp) * 2 + (columns.side[start:stop] == CREDIT)
+        counts = np.bincount(key, minlength=account_count * 2)
+        sums = np.zeros(account_count * 2, dtype=np.int64)
+        np.add.at(sums, key, columns.amount[start:stop])
+
+        return PostingTotals(sums[0::2], sums[1::2], counts[0::2], counts[1::2])
+
+    # ----------------------------------------------------
+    # チェックポイント
+    # ----------------------------------------------------
+    def to_checkpoint(self, size: int, account_names: List[str]) -> Dict[str, Any]:
+        """
+        先頭 size 行の明細と、その明細が属する仕訳のID・備考を、JSON に保存できる辞書で返します。
+        勘定科目は ID ではなく勘定科目名で保存します。
+        追記済みの行と仕訳は書き換えないため、転記と並行して呼び出せます。
+        """
+        columns = self.columns(size)
+        # 💡 明細は仕訳番号順に追記されるため、最後の行の仕訳番号までが size 行に含まれる仕訳
+        journal_count = int(columns.journal[-1]) + 1 if size else 0
+        return {
+            "accounts": account_names,
+            "journal_ids": self.journal_ids[:journal_count],
+            "journal_remarks": self.journal_remarks[:journal_count],
+            "account_id": columns.account_id.tolist(),
+            "journal": columns.journal.tolist(),
+            "side": columns.side.tolist(),
+            "amount": columns.amount.tolist(),
+            "date": columns.date.astype("int64").tolist()
+        }
+
+    @classmethod
+    def from_checkpoint(cls, data: Dict[str, Any], account_ids: Dict[str, int]) -> 'PostingTable':
+        """
+        to_checkpoint で保存した明細からテーブルを作成します。
+        account_ids (勘定科目名 -> 勘定科目ID) に存在しない勘定の明細は読み飛ばします。
+        """
+        id_map = np.array([account_ids.get(name, -1) for name in data["accounts"]], dtype=np.int32)
+        account_id = id_map[np.asarray(data["account_id"], dtype=np.intp)]
+        keep = account_id >= 0
+
+        loaded = PostingColumns(
+            account_id[keep],
+            np.asarray(data["journal"], dtype=np.int32)[keep],
+            np.asarray(data["side"], dtype=np.int8)[keep],
+            np.asarray(data["amount"], dtype=np.int64)[keep],
+            np.asarray(data["date"], dtype=np.int64).view("datetime64[D]")[keep]
+        )
+        size = len(loaded.amount)
+
+        table = cls(max(1024, size * 2))
+        for src, dst in zip(loaded, table._columns):
+            dst[:size] = src
+        table._size = size
+        for journal_id, remarks in zip(data["journal_ids"], data["journal_remarks"]):
+            table.add_journal(journal_id, remarks)
+        return table
+
+
+def _add_padded(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """長さの異なる配列を、短い方を0で埋めて加算します。"""
+    if len(a) < len(b):
+        a, b = b, a
+    result = a.copy()
+    result[:len(b)] += b
+    return result
@@ -2,20 +2,22 @@
 MCP Server service module
 MCPサーバクラスとToolsを定義する
 """
+import asyncio
+import functools
 import json
 import sys
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional
 from threading import Thread
 import logging
 import time
-from PySide6.QtWidgets import QApplication
-from PySide6.QtCore import QMetaObject, Qt, QTimer
-from PySide6.QtCore import Q_ARG, Q_RETURN_ARG
+from contextvars import ContextVar
 
 from mcp.server.fastmcp import FastMCP
 from mcp.server.fastmcp.prompts import base
 
-from bokicast_mcp_server.mod_bokicast_service import BokicastService
+from bokicast_mcp_server.mod_book_service import BookRegistry
+from bokicast_mcp_server.mod_ledger import AccountQuery, parse_journal_list
+from bokicast_mcp_server.mod_metrics import ServerMetrics, MetricsDumper
 
 
 import logging
@@ -27,13 +29,118 @@ logger = logging.getLogger(__name__)
 mcp = FastMCP("bokicast-mcp-server")
 _config = None
 
+# 💡 GUI モードでは BokicastService、ヘッドレスモードでは BookRegistry
+#    (どちらも entity 引数付きの journal_entry / journal_entries / get_*_data を持つ)
+_service = None
+_headless = False
+
+# Qt スレッドでの処理完了を待つ最大秒数 (YAML 設定の「MCP: 転記タイムアウト秒」で変更できます)
+INVOKE_TIMEOUT = 10.0
+
+# journal_entries で仕訳1件ごとに加算する待ち時間 (秒)
+INVOKE_TIMEOUT_PER_JOURNAL = 0.05
+
+# 設定可能なトランスポート
+TRANSPORTS = ("stdio", "sse", "streamable-http")
+
+# ツールの呼び出し回数・レイテンシ
+_metrics = ServerMetrics()
+
+# 💡 ツールが失敗を報告するフラグ (_instrumented が呼び出しごとに設定・リセットする)
+_tool_failed: ContextVar[bool] = ContextVar("_tool_failed", default=False)
+
+
+#
+# utility
+#
+async def _invoke(func: Callable[..., Any], *args, timeout: Optional[float] = None) -> Any:
+    """
+    帳簿を更新する func(*args) を実行し、完了を待って結果を返します。
+    GUI モードでは Qt スレッドで実行し、timeout 秒 (省略時は INVOKE_TIMEOUT 秒) 以内に完了しない場合は asyncio.TimeoutError を送出します。
+    タイムアウトしても Qt スレッドでの転記は取り消されないため、転記されたかどうかは不明です。
+    ヘッドレスモードでは Qt スレッドがないため、ワーカースレッドで実行します。
+    転記はエンティティごとのロック (BookService.lock) で1件ずつ実行され、別のエンティティへの転記とは並行します。
+    """
+    _metrics.write_started()
+    try:
+        if _headless:
+            return await asyncio.to_thread(func, *args)
+
+        future = _service.invoke(func, *args)
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout or INVOKE_TIMEOUT)
+    finally:
+        _metrics.write_finished()
+
+
+def _unknown_result(journal: Any, timeout: float) -> Dict[str, Any]:
+    """
+    タイムアウトした仕訳の結果を返します。
+    転記されたかどうかは不明なため、status を "unknown" とし、確認に使う仕訳IDを返します。
+    """
+    journal_id = journal.get("journal_id", "NO_ID") if isinstance(journal, dict) else None
+    return {
+        "journal_id": journal_id,
+        "status": "unknown",
+        "error": f"{timeout:g}秒以内に仕訳処理が完了しませんでした。転記されたかどうかは不明です。"
+                 f"再送する前に get_t_account の journal_from / journal_to で仕訳ID '{journal_id}' の転記を確認してください。"
+    }
+
+
+async def _read(func: Callable[..., Any], *args) -> Any:
+    """
+    帳簿を参照する func(*args) をワーカースレッドで実行し、結果を返します。
+    参照は公開済みのスナップショットのみを使うため、ロックを取らずに転記や他の参照と並行して実行します。
+    """
+    return await asyncio.to_thread(func, *args)
+
+
+def _failed(text: str) -> str:
+    """ツールの呼び出しを失敗として記録し、text をそのまま返します。"""
+    _tool_failed.set(True)
+    return text
+
+
+def _instrumented(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    ツールの呼び出し回数とレイテンシを記録するデコレータ。
+    例外、またはツールが _failed で返した結果をエラーとして数えます。
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        token = _tool_failed.set(False)
+        error = True
+        try:
+            result = await func(*args, **kwargs)
+            error = _tool_failed.get()
+            return result
+        finally:
+            _tool_failed.reset(token)
+            _metrics.record(func.__name__, time.perf_counter() - start, error)
+
+    return wrapper
+
+
+def _collect_stats() -> Dict[str, Any]:
+    """ツールのメトリクス・Qt スレッドの待ち件数・帳簿の大きさをまとめて返します。任意のスレッドから呼び出せます。"""
+    stats = _metrics.to_dict()
+    if _service is None:
+        return stats
+
+    if not _headless:
+        stats["Qtキュー"] = {"待ち件数": _service.queue_depth, "最大待ち件数": _service.max_queue_depth}
+    stats["帳簿"] = _service.get_ledger_stats()
+    return stats
+
 
 #
 # MCP I/F
 #
 @mcp.tool()
+@_instrumented
 async def journal_entry(
-    journal_data: str
+    journal_data: str,
+    entity: str = ""
 ) -> str:
     """
     仕訳データを受け取り、会計処理（JournalEntryWidgetの表示など）を実行します。
@@ -45,60 +152,134 @@ async def journal_entry(
                              - journal_id (str): 仕訳のユニークID (例: "J004")。
                              - debit (list[dict]): 借方項目（勘定科目と金額）のリスト。
                              - credit (list[dict]): 貸方項目（勘定科目と金額）のリスト。
+                             - date (str, optional): 取引日 ("YYYY-MM-DD")。
                              - remarks (str, optional): 摘要/備考。
+        entity (文字列, 任意): 対象のエンティティ(会社)名 (例: "P社", "S社")。省略時は期首残高試算表の帳簿。
 
     Data Example:
     {
         "journal_id": "J004",
         "debit": [
-            {"account": "仕入", "amount": 1000},
-            {"account": "荷役費", "amount": 500},
+            {"account": "仕入", "amount": 1500},
             {"account": "雑費", "amount": 500}
         ],
         "credit": [
             {"account": "買掛金", "amount": 2000}
         ],
+        "date": "2025-04-01",
         "remarks": "仕訳ID004の例"
     }
 
     Returns:
-        str: 実行結果メッセージ
+        str: 実行結果(JSONデータ文字列)
+        status は転記できた場合に "ok"、転記できなかった場合に "error" で、error に理由を返します。
+        転記済みの仕訳IDは受け付けないため、同じ仕訳を再送しても二重には転記されません。
+        転記後の残高 (借方合計 - 貸方合計) は、仕訳で使用した勘定科目のみを返します。
+        Data Example:
+        {
+            "journal_id": "J004",
+            "status": "ok",
+            "balances": {"仕入": 1500, "雑費": 500, "買掛金": -42000}
+        }
+        エラー時 (存在しない勘定科目、金額が整数でない、貸借不一致など。帳簿は変更されません):
+        {
+            "journal_id": "J004",
+            "status": "error",
+            "error": "仕訳 J004: 貸借が一致しません。借方計 2,000 / 貸方計 1,000"
+        }
+        タイムアウト時 (転記されたかどうかは不明です。get_t_account で仕訳IDを確認してください):
+        {
+            "journal_id": "J004",
+            "status": "unknown",
+            "error": "10秒以内に仕訳処理が完了しませんでした。転記されたかどうかは不明です。..."
+        }
     """
     try:
         logger.info("journal entry tool called.")
         logger.info(journal_data)
 
-        # journal_data = {
-        #     "journal_id": "J004", # 👈 journal_id を追加
-        #     "debit": [
-        #         {"account": "仕入", "amount": 1000},
-        #         {"account": "荷役費", "amount": 500},
-        #         {"account": "雑費", "amount": 500}
-        #     ],
-        #     "credit": [
-        #         {"account": "買掛金", "amount": 2000}
-        #     ],
-        #     "remarks": "仕訳ID004の例"
-        # }
+        try:
+            journal = json.loads(journal_data)
+        except json.JSONDecodeError as e:
+            return _failed(json.dumps({"journal_id": None, "status": "error", "error": f"JSONの解析に失敗しました: {e}"}, ensure_ascii=False, indent=4))
+
+        try:
+            result = await _invoke(_service.journal_entry, journal, entity)
+        except asyncio.TimeoutError:
+            result = _unknown_result(journal, INVOKE_TIMEOUT)
+
+        text = json.dumps(result, ensure_ascii=False, indent=4)
+        return text if result["status"] == "ok" else _failed(text)
+
+    except Exception as e:
+        return _failed(f"エラーが発生しました: {str(e)}")
+
+
+#
+# MCP I/F
+#
+@mcp.tool()
+@_instrumented
+async def journal_entries(
+    journals_data: str,
+    entity: str = ""
+) -> str:
+    """
+    複数の仕訳データをまとめて受け取り、1回の呼び出しで会計処理を実行します。
+    すべての仕訳を検証し、正常な仕訳のみを帳簿へ転記して、仕訳ごとの結果を返します。
+
+    Args:
+        journals_data (文字列): journal_entry と同じ構造の仕訳を並べたJSON配列文字列、
+                              またはNDJSON(1行に1仕訳のJSON)文字列。
+        entity (文字列, 任意): 対象のエンティティ(会社)名 (例: "P社", "S社")。省略時は期首残高試算表の帳簿。
+
+    Data Example:
+    [
+        {"journal_id": "J101", "debit": [{"account": "現金", "amount": 1000}], "credit": [{"account": "売上", "amount": 1000}]},
+        {"journal_id": "J102", "debit": [{"account": "仕入", "amount": 500}], "credit": [{"account": "買掛金", "amount": 500}]}
+    ]
+
+    Returns:
+        str: 仕訳ごとの実行結果(JSONデータ文字列)
+        Data Example:
+        [
+            {"index": 0, "journal_id": "J101", "status": "ok", "balances": {"現金": 21000, "売上": -1000}},
+            {"index": 1, "journal_id": "J102", "status": "error", "error": "仕訳 J102: 貸借が一致しません。..."}
+        ]
+        タイムアウト時は、すべての仕訳を status "unknown" で返します (journal_entry と同じく、仕訳IDで転記を確認してください)。
+        待ち時間は INVOKE_TIMEOUT に仕訳1件あたり INVOKE_TIMEOUT_PER_JOURNAL 秒を加えた秒数です。
+    """
+    try:
+        logger.info("journal entries tool called.")
+
+        journal_list = parse_journal_list(journals_data)
 
-        bokicast = BokicastService.instance(_config)
-        QMetaObject.invokeMethod(bokicast, "journal_entry", Qt.ConnectionType.QueuedConnection, Q_ARG(str, journal_data))
+        # 💡 すべての仕訳を1回の Qt スレッド呼び出しで転記する (待ち時間は件数に応じて延ばす)
+        timeout = INVOKE_TIMEOUT + INVOKE_TIMEOUT_PER_JOURNAL * len(journal_list)
+        try:
+            results = await _invoke(_service.journal_entries, journal_list, entity, timeout=timeout)
+        except asyncio.TimeoutError:
+            results = [{"index": i, **_unknown_result(journal, timeout)} for i, journal in enumerate(journal_list)]
 
-        return f"簿記キャストが完了しました。仕訳表と関連するT勘定が表示されました。"
+        # 💡 転記できなかった仕訳が1件でもあれば、呼び出しを失敗として数える
+        text = json.dumps(results, ensure_ascii=False, indent=4)
+        return text if all(result["status"] == "ok" for result in results) else _failed(text)
 
     except Exception as e:
-        return f"エラーが発生しました: {str(e)}"
+        return _failed(f"エラーが発生しました: {str(e)}")
 
 
 #
 # MCP I/F
 #
 @mcp.tool()
-async def get_bs() -> str:
+@_instrumented
+async def get_bs(entity: str = "") -> str:
     """
     貸借対照表データ(JSONデータ文字列)を返します。
 
-    Args: なし
+    Args:
+        entity (文字列, 任意): 対象のエンティティ(会社)名 (例: "P社", "S社")。省略時は期首残高試算表の帳簿。
     Returns: 
         str: 貸借対照表データ(JSONデータ文字列)
         Data Example:
@@ -122,22 +303,23 @@ async def get_bs() -> str:
     try:
         logger.info("get_bs tool called.")
 
-        bokicast = BokicastService.instance(_config)
-        return bokicast.get_bs_data()
+        return await _read(_service.get_bs_data, entity)
 
     except Exception as e:
-        return f"エラーが発生しました: {str(e)}"
+        return _failed(f"エラーが発生しました: {str(e)}")
 
 
 #
 # MCP I/F
 #
 @mcp.tool()
-async def get_pl() -> str:
+@_instrumented
+async def get_pl(entity: str = "") -> str:
     """
     損益計算書データ(JSONデータ文字列)を返します。
 
-    Args: なし
+    Args:
+        entity (文字列, 任意): 対象のエンティティ(会社)名 (例: "P社", "S社")。省略時は期首残高試算表の帳簿。
     Returns: 
         str: 損益計算書データ(JSONデータ文字列)
         Data Example:
@@ -156,24 +338,83 @@ async def get_pl() -> str:
     try:
         logger.info("get_pl tool called.")
 
-        bokicast = BokicastService.instance(_config)
-        return bokicast.get_pl_data()
+        return await _read(_service.get_pl_data, entity)
 
     except Exception as e:
-        return f"エラーが発生しました: {str(e)}"
+        return _failed(f"エラーが発生しました: {str(e)}")
 
 
 #
 # MCP I/F
 #
 @mcp.tool()
-async def get_t_account(accout_name: str) -> str:
+@_instrumented
+async def get_trial_balance(entity: str = "") -> str:
+    """
+    前期・当期の合計残高試算表データ(JSONデータ文字列)を返します。
+    全勘定の借方・貸方の合計と残高を1回の呼び出しで取得できます。明細のない勘定は含みません。
+
+    Args:
+        entity (文字列, 任意): 対象のエンティティ(会社)名 (例: "P社", "S社")。省略時は期首残高試算表の帳簿。
+    Returns: 
+        str: 合計残高試算表データ(JSONデータ文字列)
+        「貸借一致」は借方・貸方の合計と残高がそれぞれ一致するかどうかで、最上位は前期・当期の両方が一致する場合に true です。
+        Data Example:
+        {
+            "前期": {...},
+            "当期": {
+                "勘定": [
+                    {"勘定": "現金", "区分": "資産", "借方合計": 150000, "貸方合計": 30000, "借方残高": 120000, "貸方残高": 0},
+                    {"勘定": "売上", "区分": "収益", "借方合計": 0, "貸方合計": 120000, "借方残高": 0, "貸方残高": 120000}
+                ],
+                "合計": {"借方合計": 150000, "貸方合計": 150000, "借方残高": 120000, "貸方残高": 120000},
+                "貸借一致": true
+            },
+            "貸借一致": true
+        }
+    """
+    try:
+        logger.info("get_trial_balance tool called.")
+
+        return await _read(_service.get_trial_balance_data, entity)
+
+    except Exception as e:
+        return _failed(f"エラーが発生しました: {str(e)}")
+
+
+#
+# MCP I/F
+#
+@mcp.tool()
+@_instrumented
+async def get_t_account(
+    accout_name: str,
+    entity: str = "",
+    cursor: int = 0,
+    limit: int = 100,
+    journal_from: str = "",
+    journal_to: str = "",
+    date_from: str = "",
+    date_to: str = "",
+    summary: bool = False
+) -> str:
     """
     T字勘定の借方、貸方データ(JSONデータ文字列)を返します。
+    明細は転記順に最大 limit 件ずつ返します。続きは結果の「次カーソル」を cursor に指定して取得します。
 
-    Args: なし
+    Args:
+        accout_name (文字列): 勘定科目名。
+        entity (文字列, 任意): 対象のエンティティ(会社)名 (例: "P社", "S社")。省略時は期首残高試算表の帳簿。
+        cursor (整数, 任意): 前回の結果の「次カーソル」。省略時は先頭から。
+        limit (整数, 任意): 返す明細の最大件数 (既定 100)。0 の場合はすべて返します。
+        journal_from (文字列, 任意): この仕訳ID以降の明細のみを返します (期首残高は含みません)。
+        journal_to (文字列, 任意): この仕訳IDまでの明細のみを返します。
+        date_from (文字列, 任意): この日付 ("YYYY-MM-DD") 以降の明細のみを返します。
+        date_to (文字列, 任意): この日付 ("YYYY-MM-DD") までの明細のみを返します。
+        summary (真偽値, 任意): true の場合は明細を返さず、条件に合う明細の合計と件数のみを返します。
     Returns: 
         str: T字勘定の借方、貸方データ(JSONデータ文字列)
+        「残高」は条件によらず勘定全体の残高、「件数」は cursor に関係なく条件に合う明細全体の件数です。
         Data Example:
         {
             "勘定": "売上" 
@@ -186,44 +427,153 @@ async def get_t_account(accout_name: str) -> str:
                 {"ラベル": "J003-売上高", "金額": 150000},
                 {"ラベル": "J004", "金額": 3000}
             ],
-            "残高": 200000
+            "残高": 200000,
+            "件数": 250,
+            "次カーソル": 812
+        }
+        summary の場合:
+        {
+            "勘定": "売上",
+            "借方合計": 107000,
+            "貸方合計": 153000,
+            "借方件数": 3,
+            "貸方件数": 2,
+            "件数": 5,
+            "残高": -46000
         }
     """
     try:
-        logger.info("get_pl tool called.")
+        logger.info("get_t_account tool called.")
+
+        query = AccountQuery(
+            cursor=cursor,
+            limit=limit,
+            journal_from=journal_from or None,
+            journal_to=journal_to or None,
+            date_from=date_from or None,
+            date_to=date_to or None,
+            summary=summary
+        )
+        return await _read(_service.get_account_data, accout_name, entity, query)
+
+    except Exception as e:
+        return _failed(f"エラーが発生しました: {str(e)}")
+
 
-        bokicast = BokicastService.instance(_config)
-        return bokicast.get_account_data(accout_name) 
+#
+# MCP I/F
+#
+@mcp.tool()
+@_instrumented
+async def get_server_stats() -> str:
+    """
+    サーバのメトリクス(JSONデータ文字列)を返します。
+
+    Returns:
+        str: メトリクス(JSONデータ文字列)
+        「転記待ち」は転記ツールが依頼して完了していない件数、「Qtキュー」(GUI モードのみ) は Qt スレッドでの実行を待っている件数です。
+        Data Example:
+        {
+            "稼働秒数": 120.5,
+            "ツール": {
+                "get_bs": {"呼び出し数": 40, "エラー数": 0, "平均ms": 0.8, "最大ms": 5.1, "ヒストグラムms": {"<=1": 35, "<=2": 3, "<=5": 1, "<=10": 1, ...}},
+                "journal_entry": {...}
+            },
+            "転記待ち": {"件数": 0, "最大件数": 3},
+            "Qtキュー": {"待ち件数": 0, "最大待ち件数": 3},
+            "帳簿": {
+                "期首残高試算表": {"当期": {"勘定数": 20, "明細数": 1520, "バージョン": 501, "仕訳数": 500}, "前期": {...}}
+            }
+        }
+    """
+    try:
+        logger.info("get_server_stats tool called.")
+
+        return json.dumps(_collect_stats(), ensure_ascii=False, indent=4)
 
     except Exception as e:
-        return f"エラーが発生しました: {str(e)}"
+        return _failed(f"エラーが発生しました: {str(e)}")
 
 
 #
 # public function
 #
-def start(conf: dict[str, Any]):
+def start(conf: dict[str, Any], headless: bool = False):
     logger.info("mod_service.start called.")
 
     """stdio モードで FastMCP を起動"""
-    global _config 
+    global _config, _service, _headless, INVOKE_TIMEOUT
 
     _config = conf
+    _headless = headless
+    INVOKE_TIMEOUT = float((conf.get("MCP") or {}).get("転記タイムアウト秒", INVOKE_TIMEOUT))
 
     logger.debug(conf)
 
+    if headless:
+        start_headless(conf)
+        return
+
+    # 💡 PySide6 は GUI モードでのみ読み込む
+    from PySide6.QtWidgets import QApplication
+    from bokicast_mcp_server.mod_bokicast_service import BokicastService
+
     logger.info("QT thread start.")
     app = QApplication(sys.argv) 
 
-    BokicastService.instance(conf) 
+    _service = BokicastService.instance(conf) 
+
+    dumper = MetricsDumper.from_config(conf, _collect_stats)
+    if dumper is not None:
+        dumper.start()
+        app.aboutToQuit.connect(dumper.stop)
     
     logger.info("mcp thread start.")
     Thread(target=start_mcp, args=(conf,), daemon=True).start()
 
     sys.exit(app.exec())
 
+def start_headless(conf: dict[str, Any]):
+    """
+    QApplication を作成せず、メインスレッドのイベントループで FastMCP を起動します。
+    ツールはエンティティごとの帳簿サービス (BookRegistry) を直接呼び出します。
+    """
+    global _service
+
+    logger.info("headless mode start.")
+    _service = BookRegistry(conf)
+
+    dumper = MetricsDumper.from_config(conf, _collect_stats)
+    if dumper is not None:
+        dumper.start()
+
+    try:
+        start_mcp(conf)
+    finally:
+        if dumper is not None:
+            dumper.stop()
+        _service.close()
+
 def start_mcp(conf: dict[str, Any]):
+    """
+    YAML 設定の「MCP」で指定されたトランスポートで FastMCP を起動します。
+
+    MCP:
+      トランスポート: stdio   # stdio | sse | streamable-http
+      ホスト: 127.0.0.1
+      ポート: 8000
+      転記タイムアウト秒: 10   # GUI モードで Qt スレッドの転記完了を待つ秒数
+    """
     logger.info("start_mcp called.")
-    mcp.run(transport="stdio")
 
+    mcp_conf = conf.get("MCP") or {}
+    transport = mcp_conf.get("トランスポート", "stdio")
+    if transport not in TRANSPORTS:
+        raise ValueError(f"トランスポート '{transport}' は使用できません。{' | '.join(TRANSPORTS)} を指定してください。")
+
+    if transport != "stdio":
+        mcp.settings.host = mcp_conf.get("ホスト", "127.0.0.1")
+        mcp.settings.port = int(mcp_conf.get("ポート", 8000))
+        logger.info(f"MCP server listening on {mcp.settings.host}:{mcp.settings.port} ({transport})")
 
+    mcp.run(transport=transport)
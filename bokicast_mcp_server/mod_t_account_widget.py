@@ -6,10 +6,11 @@ from PySide6.QtGui import QFont, QFontMetrics, QMouseEvent
 from PySide6.QtCore import Qt, QPoint
 import sys
 import json
-from typing import Any, List, Dict
+from typing import Callable
 
 # 💡 AccountEntryWidget を別のファイルからインポートします
 from bokicast_mcp_server.mod_account_entry_widget import AccountEntryWidget
+from bokicast_mcp_server.mod_ledger import Account
 #from bokicast_mcp_server.mod_journal_entry_widget import JournalEntryWidget
 
 import logging
@@ -24,16 +25,23 @@ class TAccountWidget(QFrame):
     高さ400px固定。
     ヘッダー（上）、フッター（下）は固定表示。
     中央の借方・貸方エリアはスクロール可能。
+    表示内容は帳簿の Account から描画する（データの正は Account 側）。
     """
     _drag_start_position: QPoint | None = None # 💡 TAccountWidget用ドラッグ開始位置
     SNAP_DISTANCE = 15 
     
-    def __init__(self, parent, account_name: str, font: QFont, journal_dict, category):
+    def __init__(self, parent, account: Account, font: QFont, get_journal_widget: Callable[[str], QWidget | None]):
         super().__init__(parent)
         self.font = font
         self.fm = QFontMetrics(self.font)
-        self.journal_dict = journal_dict
-        self.category = category
+        # 💡 仕訳ウィジェットはプールから割り当てられるため、仕訳IDから取得する関数を受け取る
+        self.get_journal_widget = get_journal_widget
+        self.account = account
+        self.category = account.category
+
+        # 💡 テーブルへ描画済みの明細数
+        self._rendered_debit_count = 0
+        self._rendered_credit_count = 0
         
         # QFrameのプロパティで枠の形状を設定（スタイルシートの補助として）
         self.setFrameShape(QFrame.Box)
@@ -58,7 +66,7 @@ class TAccountWidget(QFrame):
         # ----------------------------------------------------
         # 1. ヘッダー（勘定名） - 上部固定
         # ----------------------------------------------------
-        self.account_name_label = QLabel(account_name)
+        self.account_name_label = QLabel(account.name)
         self.account_name_label.setFont(self.font)
         self.account_name_label.setAlignment(Qt.AlignCenter)
         self.account_name_label.setFixedHeight(self.fm.height()+10) # 高さ固定
@@ -129,22 +137,20 @@ class TAccountWidget(QFrame):
         # ----------------------------------------------------
         # 初期調整
         # ----------------------------------------------------
-        self.set_column_width_sync()
-        self.update_balance_label()
+        self.refresh()
         self.setStyleSheet("#TAccountFrame { border: 0px solid #333366; background-color: #A0E0A0; border-radius:0px; }")
 
     # ----------------------------------------------------
-    # Public: 項目追加
+    # Public: 帳簿からの描画
     # ----------------------------------------------------
-    def add_debit(self, item_name: str, amount: int):
-        """借方（Debit）に項目を追加し、幅同期と残高更新を行います。"""
-        self.debit_widget.add_item(item_name, amount)
-        self.set_column_width_sync()
-        self.update_balance_label()
+    def refresh(self):
+        """Account に追加された未描画の明細をテーブルへ反映し、幅同期と残高更新を行います。"""
+        self.debit_widget.add_items(self.account.debit[self._rendered_debit_count:])
+        self._rendered_debit_count = len(self.account.debit)
+
+        self.credit_widget.add_items(self.account.credit[self._rendered_credit_count:])
+        self._rendered_credit_count = len(self.account.credit)
 
-    def add_credit(self, item_name: str, amount: int):
-        """貸方（Credit）に項目を追加し、幅同期と残高更新を行います。"""
-        self.credit_widget.add_item(item_name, amount)
         self.set_column_width_sync()
         self.update_balance_label()
 
@@ -180,11 +186,7 @@ class TAccountWidget(QFrame):
 
 
     def get_balance(self):
-        debit_total = self.debit_widget.get_total_amount()
-        credit_total = self.credit_widget.get_total_amount()
-        
-        balance = debit_total - credit_total
-        return balance
+        return self.account.get_balance()
 
     def update_balance_label(self):
         """借方合計と貸方合計を計算し、差額を表示ラベルに反映します。
@@ -244,34 +246,7 @@ class TAccountWidget(QFrame):
                 "残高": 200000
             }
         """
-        # データの収集
-        # ここで debit_widget.get_all_items() が呼び出されることを前提とします
-        debit_items_raw = self.debit_widget.get_all_items()
-        credit_items_raw = self.credit_widget.get_all_items()
-        
-        debit_data = self._format_items_to_json(debit_items_raw)
-        credit_data = self._format_items_to_json(credit_items_raw)
-        
-        # 残高の取得
-        balance = self.get_balance()
-
-        result = {
-            "勘定": self.account_name_label.text(),
-            "借方": debit_data,
-            "貸方": credit_data,
-            "残高": balance
-        }
-
-        return json.dumps(result, ensure_ascii=False, indent=4)
-
-    def _format_items_to_json(self, items: list[tuple[str, int]]) -> List[Dict[str, Any]]:
-        formatted_list = []
-        for label, amount in items:
-            formatted_list.append({
-                "ラベル": label,
-                "金額": amount
-            })
-        return formatted_list
+        return json.dumps(self.account.get_account_data(), ensure_ascii=False, indent=4)
 
     # ----------------------------------------------------
     # TAccountWidget用 マウスイベントハンドラ (ドラッグ/スナップ機能)
@@ -404,7 +379,7 @@ class TAccountWidget(QFrame):
         ダブルクリックで処理する内容:
 
         1.セルの文字を取得 → "J001-売上" 形式なら仕訳ID抽出
-        2.仕訳IDが journal_dict に存在すれば対応データ表示
+        2.仕訳IDが帳簿に存在すれば、仕訳ウィジェットを割り当てて表示
         3.T字勘定ウィジェットの表示 / 非表示切り替え
         4.表示する場合はクリックしたセル位置に移動（DPI対応）
         """
@@ -422,17 +397,13 @@ class TAccountWidget(QFrame):
             return
 
         journal_id = label.split("-")[0].strip()
-        journal_obj = None
-        if journal_id in self.journal_dict:
-            journal_obj = self.journal_dict[journal_id]
-            logger.debug(f"[DEBUG] 仕訳ID '{journal_id}' → 仕訳データ:")
-            logger.debug(journal_obj)
-
-            # TODO: journal_obj を JournalEntryWidget に渡して表示する処理に拡張する
-        else:
-            logger.warning(f"[WARNING] {label} '{journal_id}' は journal_dict に存在しません。")
+        journal_obj = self.get_journal_widget(journal_id)
+        if journal_obj is None:
+            logger.warning(f"[WARNING] {label} '{journal_id}' は帳簿に存在しません。")
             return
 
+        logger.debug(f"[DEBUG] 仕訳ID '{journal_id}' → 仕訳ウィジェット: {journal_obj}")
+
         # ---------------------------------------------------------
         #   ここから UI 表示処理
         # ---------------------------------------------------------
@@ -531,21 +502,23 @@ if __name__ == "__main__":
     # ---------------------------------------------------
     
     # 1. 現金勘定（データ多め、スクロール確認用）
-    t_cash = TAccountWidget(main_widget, "現金勘定 (スクロールテスト)", font)
+    cash = Account("現金勘定 (スクロールテスト)", "資産")
     
     # 借方: たくさんのデータを追加してスクロールを確認
     for i in range(20):
-        t_cash.add_debit(f"売上入金_{i+1}", 10000)
+        cash.add_debit(f"売上入金_{i+1}", 10000)
     
     # 貸方: 少しだけ
-    t_cash.add_credit("仕入代金", 150000)
-    t_cash.add_credit("光熱費支払", 25000)
+    cash.add_credit("仕入代金", 150000)
+    cash.add_credit("光熱費支払", 25000)
+    t_cash = TAccountWidget(main_widget, cash, font, lambda journal_id: None)
     
     # 2. 買掛金勘定（データ少なめ、上寄せ確認用）
-    t_payable = TAccountWidget(main_widget, "買掛金勘定 (上寄せテスト)", font)
-    t_payable.add_debit("支払", 100000)
-    t_payable.add_credit("期首残高", 200000)
-    t_payable.add_credit("仕入発生", 500000)
+    payable = Account("買掛金勘定 (上寄せテスト)", "負債")
+    payable.add_debit("支払", 100000)
+    payable.add_credit("期首残高", 200000)
+    payable.add_credit("仕入発生", 500000)
+    t_payable = TAccountWidget(main_widget, payable, font, lambda journal_id: None)
     
     # 初期位置設定
     t_cash.move(50, 50)
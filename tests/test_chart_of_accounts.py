@@ -0,0 +1,86 @@
+"""
+勘定科目表のテスト
+
+勘定科目IDと別名の登録・参照、別名による仕訳と T字勘定の参照、
+正常残高と逆の残高 (貸方区分の勘定の借方残高など) が負の値で表示されることを確認する
+"""
+import json
+
+from bokicast_mcp_server.mod_book_service import BookRegistry
+from bokicast_mcp_server.mod_chart_of_accounts import ChartOfAccounts
+
+
+def _config() -> dict:
+    return {
+        "期首残高試算表": {
+            "純資産": {"資本金": 20000},
+            "負債": {"買掛金": 1000},
+            "資産": {"現金": 21000},
+            "費用": {"仕入": 0},
+            "収益": {"売上": 0}
+        },
+        "勘定科目別名": {"キャッシュ": "現金", "売上高": "売上", "存在しない別名": "存在しない勘定"}
+    }
+
+
+def _journal(journal_id: str, debit: str, credit: str, amount: int) -> dict:
+    return {
+        "journal_id": journal_id,
+        "debit": [{"account": debit, "amount": amount}],
+        "credit": [{"account": credit, "amount": amount}]
+    }
+
+
+def test_ids_and_aliases():
+    chart = ChartOfAccounts()
+    cash = chart.add("現金", "資産")
+    sales = chart.add("売上", "収益")
+
+    assert (cash.id, cash.sign) == (0, 1)
+    assert (sales.id, sales.sign) == (1, -1)
+    assert chart.add("現金", "資産") is cash
+    assert chart.ids_in("資産") == [0]
+
+    assert chart.add_alias("キャッシュ", "現金")
+    assert chart.get_id("キャッシュ") == 0
+    assert chart.get("キャッシュ") is cash
+    assert "キャッシュ" in chart
+    # 💡 別名は勘定の一覧には含めない
+    assert [info.name for info in chart] == ["現金", "売上"]
+
+    # 使用済みの名前・未登録の勘定には別名を登録できない
+    assert not chart.add_alias("キャッシュ", "売上")
+    assert not chart.add_alias("売上", "現金")
+    assert not chart.add_alias("預金", "存在しない勘定")
+    assert chart.get_id("預金") is None
+
+
+def test_post_and_query_by_alias():
+    books = BookRegistry(_config())
+
+    result = books.journal_entry(_journal("J001", "キャッシュ", "売上高", 500))
+
+    # 💡 結果と帳簿には別名ではなく勘定科目名を使う
+    assert result["balances"] == {"現金": 21500, "売上": -500}
+    account_data = json.loads(books.get_account_data("キャッシュ"))
+    assert account_data["勘定"] == "現金"
+    assert account_data["借方"][-1] == {"ラベル": "J001-売上", "金額": 500}
+    assert json.loads(books.get_pl_data())["当期"]["収益"] == {"売上": 500}
+
+
+def test_contra_balance_is_shown_as_negative():
+    books = BookRegistry(_config())
+
+    # 買掛金 (負債) を残高 1,000 より多く支払い、借方残高にする
+    books.journal_entry(_journal("J001", "買掛金", "現金", 1500))
+    # 仕入 (費用) の戻しで貸方残高にする
+    books.journal_entry(_journal("J002", "現金", "仕入", 300))
+
+    bs = json.loads(books.get_bs_data())["当期"]
+    pl = json.loads(books.get_pl_data())["当期"]
+
+    # 💡 残高は正常残高の符号を掛けた値のため、正常残高と逆の残高は負の値になる
+    assert bs["負債"] == {"買掛金": -500}
+    assert pl["費用"] == {"仕入": -300}
+    assert bs["資産"] == {"現金": 19800}
+    assert bs["純資産"] == {"資本金": 20000}
@@ -0,0 +1,185 @@
+"""
+チェックポイントのテスト
+
+チェックポイントを読み込み、それ以降に追記された仕訳ログのみを再適用して、再起動前と同じ帳簿に戻ることを確認する
+"""
+import json
+import logging
+import os
+
+from bokicast_mcp_server.mod_book_service import BookRegistry
+
+
+def _config(tmp_path, interval: int = 2) -> dict:
+    return {
+        "期首残高試算表": {
+            "純資産": {"資本金": 30000},
+            "資産": {"現金": 20000, "売掛金": 10000},
+            "費用": {"仕入": 0},
+            "収益": {"売上": 0}
+        },
+        "仕訳ログ": {"ファイル": str(tmp_path / "journal.jsonl")},
+        "チェックポイント": {"ファイル": str(tmp_path / "checkpoint.json"), "間隔件数": interval}
+    }
+
+
+def _journal(journal_id: str, debit: str, credit: str, amount: int, **extra) -> dict:
+    return {
+        "journal_id": journal_id,
+        "debit": [{"account": debit, "amount": amount}],
+        "credit": [{"account": credit, "amount": amount}],
+        **extra
+    }
+
+
+def _replayed_count(caplog) -> int:
+    messages = [record.getMessage() for record in caplog.records if "の仕訳を再適用しました" in record.getMessage()]
+    return int(messages[-1].split(" から ")[1].split(" 件")[0])
+
+
+def _state(books: BookRegistry) -> tuple:
+    ledger = books.get().ledger_dict["当期"]
+    return (
+        books.get_bs_data(),
+        books.get_pl_data(),
+        books.get_account_data("現金"),
+        books.get_account_data("売上"),
+        ledger.journals
+    )
+
+
+def test_checkpoint_and_log_tail_replay(tmp_path, caplog):
+    caplog.set_level(logging.INFO)
+    conf = _config(tmp_path)
+    books = BookRegistry(conf)
+    books.journal_entry(_journal("J001", "現金", "売上", 1000, date="2025-04-01", remarks="売上計上"))
+    books.journal_entry({
+        "journal_id": "J002",
+        "debit": [{"account": "仕入", "amount": 300}, {"account": "売掛金", "amount": 200}],
+        "credit": [{"account": "現金", "amount": 500}]
+    })
+    books.journal_entry(_journal("J003", "売掛金", "売上", 700))
+
+    # 💡 2件目の転記でワーカースレッドが保存したチェックポイントの完了を待つ
+    book = books.get()
+    book.checkpoint.wait()
+    checkpoint = json.loads((tmp_path / "checkpoint.json").read_text(encoding="utf-8"))
+    assert checkpoint["log_offset"] < os.path.getsize(tmp_path / "journal.jsonl")
+
+    state = _state(books)
+
+    # close を呼ばずに再起動 (クラッシュ) した場合は、チェックポイント以降の1件のみを再適用する
+    book.checkpoint.close()
+    book.journal_log.close()
+    restarted = BookRegistry(conf)
+
+    assert _replayed_count(caplog) == 1
+    assert _state(restarted) == state
+    restarted.close()
+
+
+def test_close_saves_checkpoint(tmp_path, caplog):
+    caplog.set_level(logging.INFO)
+    conf = _config(tmp_path, interval=1000)
+    books = BookRegistry(conf)
+    books.journal_entry(_journal("J001", "現金", "売上", 1000))
+    books.journal_entry(_journal("J002", "仕入", "現金", 300))
+    state = _state(books)
+    books.close()
+
+    restarted = BookRegistry(conf)
+
+    assert _replayed_count(caplog) == 0
+    assert _state(restarted) == state
+
+    # 再起動後の転記も、読み込んだ明細の後ろに続けて転記される
+    restarted.journal_entry(_journal("J003", "現金", "売上", 50))
+    account_data = json.loads(restarted.get_account_data("現金"))
+    assert [entry["ラベル"] for entry in account_data["借方"]] == ["期首残高", "J001-売上", "J003-売上"]
+    assert account_data["残高"] == 20750
+    restarted.close()
+
+
+def test_checkpoint_contains_postings_only(tmp_path):
+    conf = _config(tmp_path, interval=1)
+    books = BookRegistry(conf)
+    books.journal_entry(_journal("J001", "現金", "売上", 1000, remarks="売上計上"))
+    books.close()
+
+    checkpoint = json.loads((tmp_path / "checkpoint.json").read_text(encoding="utf-8"))
+
+    assert set(checkpoint["ledger"]) == {"version", "postings"}
+    assert checkpoint["ledger"]["postings"]["journal_ids"] == ["J001"]
+    assert checkpoint["ledger"]["postings"]["journal_remarks"] == ["売上計上"]
+
+
+def test_unknown_checkpoint_format_replays_whole_log(tmp_path, caplog):
+    caplog.set_level(logging.INFO)
+    conf = _config(tmp_path)
+    books = BookRegistry(conf)
+    books.journal_entry(_journal("J001", "現金", "売上", 1000))
+    books.journal_entry(_journal("J002", "仕入", "現金", 300))
+    state = _state(books)
+    books.close()
+
+    (tmp_path / "checkpoint.json").write_text(json.dumps({"log_offset": 0, "ledger": {"accounts": {}}}), encoding="utf-8")
+    restarted = BookRegistry(conf)
+
+    assert _replayed_count(caplog) == 2
+    assert _state(restarted) == state
+    restarted.close()
+
+
+def test_failed_write_keeps_pending_count(tmp_path, caplog):
+    conf = _config(tmp_path, interval=2)
+    conf["チェックポイント"]["ファイル"] = str(tmp_path / "checkpoint" / "checkpoint.json")
+    books = BookRegistry(conf)
+    checkpoint = books.get().checkpoint
+
+    # 💡 保存先のディレクトリがないため、書き出しに失敗する
+    books.journal_entry(_journal("J001", "現金", "売上", 1000))
+    books.journal_entry(_journal("J002", "現金", "売上", 1000))
+    checkpoint.wait()
+
+    assert "を保存できませんでした" in caplog.text
+    assert checkpoint.pending == 2
+
+    # 保存できるようになれば、次の転記で未保存の転記をまとめて保存する
+    (tmp_path / "checkpoint").mkdir()
+    books.journal_entry(_journal("J003", "現金", "売上", 1000))
+    checkpoint.wait()
+
+    assert checkpoint.pending == 0
+    saved = json.loads((tmp_path / "checkpoint" / "checkpoint.json").read_text(encoding="utf-8"))
+    assert saved["ledger"]["postings"]["journal_ids"] == ["J001", "J002", "J003"]
+    books.close()
+
+
+def test_edited_opening_balances_replay_whole_log(tmp_path, caplog):
+    caplog.set_level(logging.INFO)
+    conf = _config(tmp_path)
+    books = BookRegistry(conf)
+    books.journal_entry(_journal("J001", "現金", "売上", 1000))
+    books.journal_entry(_journal("J002", "仕入", "現金", 300))
+    books.close()
+
+    # 💡 チェックポイントの保存後に、設定の期首残高を変更する
+    conf["期首残高試算表"]["純資産"]["資本金"] = 35000
+    conf["期首残高試算表"]["資産"]["現金"] = 25000
+    restarted = BookRegistry(conf)
+
+    assert "期首残高と一致しません" in caplog.text
+    assert _replayed_count(caplog) == 2
+    account_data = json.loads(restarted.get_account_data("現金"))
+    assert account_data["借方"][0] == {"ラベル": "期首残高", "金額": 25000}
+    assert account_data["残高"] == 25700
+    assert json.loads(restarted.get_bs_data())["当期"]["純資産"]["資本金"] == 35000
+    restarted.close()
+
+    # 終了時に設定の期首残高でチェックポイントを保存し直すため、次回は再適用しない
+    caplog.clear()
+    again = BookRegistry(conf)
+    assert "期首残高と一致しません" not in caplog.text
+    assert _replayed_count(caplog) == 0
+    assert json.loads(again.get_account_data("現金"))["残高"] == 25700
+    again.close()
@@ -0,0 +1,135 @@
+"""
+連結帳簿のテスト
+
+P社・S社の転記が差分で連結残高へ反映され、投資と資本の相殺消去の差額が
+のれん (借方) / 負ののれん発生益 (貸方) に計上されることを確認する
+"""
+import json
+
+from bokicast_mcp_server.mod_book_service import BookRegistry, CONSOLIDATED_ENTITY
+
+
+def _config() -> dict:
+    return {
+        "モード": "連結",
+        "期首残高試算表": {
+            "純資産": {"資本金": 1000},
+            "資産": {"現金": 1000}
+        },
+        "P社": {
+            "P:純資産": {"P:資本金": 40000, "P:繰越利益剰余金": 20000},
+            "負債": {"P:買掛金": 40000},
+            "資産": {"P:現金": 20000, "P:商品": 20000, "P:土地": 60000, "P:S社株式": 0},
+            "収益": {"P:売上": 0}
+        },
+        "S社": {
+            "純資産": {"S:資本金": 10000, "S:繰越利益剰余金": 5000},
+            "負債": {"S:買掛金": 5000},
+            "資産": {"S:現金": 1000, "S:商品": 4000, "S:土地": 15000},
+            "収益": {"S:売上": 0}
+        },
+        "連結": {
+            "親会社": "P社",
+            "子会社": ["S社"],
+            "相殺消去": [
+                {
+                    "名称": "投資と資本の相殺消去",
+                    "勘定": ["P:S社株式", "S:資本金", "S:繰越利益剰余金"],
+                    "借方差額": "のれん",
+                    "貸方差額": "負ののれん発生益"
+                }
+            ]
+        }
+    }
+
+
+def _journal(journal_id: str, debit: str, credit: str, amount: int) -> dict:
+    return {
+        "journal_id": journal_id,
+        "debit": [{"account": debit, "amount": amount}],
+        "credit": [{"account": credit, "amount": amount}]
+    }
+
+
+def _consolidated_bs(books: BookRegistry) -> dict:
+    return json.loads(books.get_bs_data(CONSOLIDATED_ENTITY))["当期"]
+
+
+def _consolidated_pl(books: BookRegistry) -> dict:
+    return json.loads(books.get_pl_data(CONSOLIDATED_ENTITY))["当期"]
+
+
+def test_opening_balances_are_aggregated_and_eliminated():
+    books = BookRegistry(_config())
+
+    bs = _consolidated_bs(books)
+    assert bs["資産"] == {"現金": 21000, "商品": 24000, "土地": 75000}
+    assert bs["負債"] == {"買掛金": 45000}
+    # 💡 S社の資本 (15,000) は投資 (0) と相殺消去され、差額は貸方 (負ののれん発生益)
+    assert bs["純資産"] == {"資本金": 40000, "繰越利益剰余金": 20000}
+    assert _consolidated_pl(books)["収益"] == {"負ののれん発生益": 15000}
+
+
+def test_postings_are_reflected_incrementally():
+    books = BookRegistry(_config())
+    ledger = books.get(CONSOLIDATED_ENTITY).ledger_dict["当期"]
+    snapshot = ledger.snapshot
+    version = ledger.version
+
+    # 転記がなければスナップショットを作り直さない
+    assert ledger.snapshot is snapshot
+
+    books.journal_entry(_journal("S001", "S:現金", "S:売上", 500), "S社")
+
+    assert ledger.version > version
+    assert ledger.snapshot is not snapshot
+    assert _consolidated_bs(books)["資産"]["現金"] == 21500
+    assert _consolidated_pl(books)["収益"]["売上"] == 500
+
+    books.journal_entry(_journal("P001", "P:現金", "P:売上", 1200), "P社")
+
+    assert _consolidated_bs(books)["資産"]["現金"] == 22700
+    assert _consolidated_pl(books)["収益"]["売上"] == 1700
+
+    account_data = json.loads(books.get_account_data("現金", CONSOLIDATED_ENTITY))
+    assert account_data["残高"] == 22700
+    assert {(entry["エンティティ"], entry["勘定"], entry["残高"]) for entry in account_data["内訳"]} == {
+        ("P社", "P:現金", 21200),
+        ("S社", "S:現金", 1500)
+    }
+
+
+def test_goodwill_when_investment_exceeds_equity():
+    books = BookRegistry(_config())
+
+    # S社株式 20,000 - S社の資本 15,000 = 借方差額 5,000 (のれん)
+    books.journal_entry(_journal("P001", "P:S社株式", "P:現金", 20000), "P社")
+
+    bs = _consolidated_bs(books)
+    assert bs["資産"]["のれん"] == 5000
+    assert bs["資産"]["現金"] == 1000
+    assert "S社株式" not in bs["資産"]
+    assert "負ののれん発生益" not in _consolidated_pl(books)["収益"]
+
+    account_data = json.loads(books.get_account_data("のれん", CONSOLIDATED_ENTITY))
+    assert account_data["残高"] == 5000
+    assert {entry["勘定"] for entry in account_data["内訳"]} == {"P:S社株式", "S:資本金", "S:繰越利益剰余金"}
+
+
+def test_negative_goodwill_when_equity_exceeds_investment():
+    books = BookRegistry(_config())
+
+    # S社株式 12,000 - S社の資本 15,000 = 貸方差額 3,000 (負ののれん発生益)
+    books.journal_entry(_journal("P001", "P:S社株式", "P:現金", 12000), "P社")
+
+    assert "のれん" not in _consolidated_bs(books)["資産"]
+    assert _consolidated_pl(books)["収益"] == {"負ののれん発生益": 3000}
+
+
+def test_consolidated_ledger_rejects_postings():
+    books = BookRegistry(_config())
+
+    result = books.journal_entry(_journal("C001", "現金", "売上", 100), CONSOLIDATED_ENTITY)
+
+    assert result["status"] == "error"
+    assert _consolidated_bs(books)["資産"]["現金"] == 21000
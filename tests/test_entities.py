@@ -0,0 +1,75 @@
+"""
+エンティティのテスト
+
+YAML 設定からのエンティティ (会社) の検出と、entity を省略した場合の既定のエンティティ、
+存在しないエンティティを指定した場合のエラーを確認する
+"""
+import json
+from pathlib import Path
+
+import pytest
+import yaml
+
+from bokicast_mcp_server.mod_book_service import BookRegistry, CONSOLIDATED_ENTITY, DEFAULT_ENTITY, find_entities
+
+CONFIG_PATH = Path(__file__).resolve().parent.parent / "bokicast-mcp-server.yaml"
+
+
+def _config() -> dict:
+    return {
+        "フォント": {"名前": "Meiryo"},
+        "モード": "個別",
+        "P社": {
+            "P:純資産": {"P:資本金": 1000},
+            "資産": {"P:現金": 1000}
+        },
+        "期首残高試算表": {
+            "純資産": {"資本金": 2000},
+            "資産": {"現金": 2000},
+            "収益": {"売上": 0}
+        },
+        "勘定科目別名": {"キャッシュ": "現金"},
+        "メトリクス": {"ファイル": "metrics.json"},
+        "空の会社": {}
+    }
+
+
+def test_find_entities():
+    # 💡 既定のエンティティは常に先頭。カテゴリ -> 勘定の形式でない設定はエンティティとしない
+    assert find_entities(_config()) == [DEFAULT_ENTITY, "P社"]
+    assert find_entities({}) == [DEFAULT_ENTITY]
+
+
+def test_find_entities_from_yaml():
+    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+        conf = yaml.safe_load(f)
+
+    assert find_entities(conf) == [DEFAULT_ENTITY, "P社", "S社"]
+
+
+def test_default_entity():
+    books = BookRegistry(_config())
+
+    assert books.get() is books.get(DEFAULT_ENTITY)
+    assert books.get("") is books.get(DEFAULT_ENTITY)
+    assert books.get("P社") is not books.get()
+
+    books.journal_entry({
+        "journal_id": "J001",
+        "debit": [{"account": "現金", "amount": 100}],
+        "credit": [{"account": "売上", "amount": 100}]
+    }, "")
+    assert json.loads(books.get_account_data("現金", DEFAULT_ENTITY))["残高"] == 2100
+
+
+def test_unknown_entity():
+    books = BookRegistry(_config())
+
+    with pytest.raises(ValueError, match="存在しません"):
+        books.get("S社")
+    with pytest.raises(ValueError):
+        books.get_bs_data("S社")
+
+    # 💡 連結モードでない場合は連結帳簿もない
+    with pytest.raises(ValueError):
+        books.get(CONSOLIDATED_ENTITY)
@@ -0,0 +1,152 @@
+"""
+T字勘定の取得条件のテスト
+
+get_t_account の cursor / limit によるページ分割と、仕訳ID・日付の範囲指定、summary を確認する
+"""
+import json
+
+import pytest
+
+from bokicast_mcp_server.mod_book_service import BookRegistry
+from bokicast_mcp_server.mod_ledger import AccountQuery
+
+
+def _books() -> BookRegistry:
+    books = BookRegistry({
+        "期首残高試算表": {
+            "純資産": {"資本金": 20000},
+            "資産": {"現金": 20000},
+            "費用": {"仕入": 0},
+            "収益": {"売上": 0}
+        }
+    })
+
+    # 💡 J001〜J010 を 2025-04-01〜2025-04-10 に転記する (奇数: 現金の借方、偶数: 現金の貸方)
+    for day in range(1, 11):
+        amount = day * 100
+        debit, credit = ("現金", "売上") if day % 2 else ("仕入", "現金")
+        result = books.journal_entry({
+            "journal_id": f"J{day:03d}",
+            "date": f"2025-04-{day:02d}",
+            "debit": [{"account": debit, "amount": amount}],
+            "credit": [{"account": credit, "amount": amount}]
+        })
+        assert result["status"] == "ok"
+
+    return books
+
+
+def _get(books: BookRegistry, **query) -> dict:
+    return json.loads(books.get_account_data("現金", None, AccountQuery(**query)))
+
+
+def _labels(account_data: dict) -> list[str]:
+    return [entry["ラベル"] for entry in account_data["借方"] + account_data["貸方"]]
+
+
+def test_without_query_returns_all_entries():
+    account_data = json.loads(_books().get_account_data("現金"))
+
+    assert len(account_data["借方"]) == 6
+    assert len(account_data["貸方"]) == 5
+    assert account_data["残高"] == 20000 + 2500 - 3000
+
+
+def test_cursor_and_limit_page_through_all_entries():
+    books = _books()
+
+    pages = []
+    cursor = 0
+    while cursor is not None:
+        page = _get(books, cursor=cursor, limit=4)
+        assert page["残高"] == 19500
+        pages.append(page)
+        cursor = page["次カーソル"]
+
+    assert [len(_labels(page)) for page in pages] == [4, 4, 3]
+    assert [page["件数"] for page in pages] == [11, 11, 11]
+
+    labels = sorted(label for page in pages for label in _labels(page))
+    assert labels == sorted(_labels(json.loads(books.get_account_data("現金"))))
+
+
+def test_limit_zero_returns_everything():
+    page = _get(_books(), limit=0)
+
+    assert len(_labels(page)) == 11
+    assert page["次カーソル"] is None
+
+
+def test_journal_range():
+    page = _get(_books(), journal_from="J003", journal_to="J006")
+
+    # 期首残高は仕訳に属さないため含まない
+    assert page["借方"] == [{"ラベル": "J003-売上", "金額": 300}, {"ラベル": "J005-売上", "金額": 500}]
+    assert page["貸方"] == [{"ラベル": "J004-仕入", "金額": 400}, {"ラベル": "J006-仕入", "金額": 600}]
+    assert page["件数"] == 4
+
+
+def test_date_range():
+    page = _get(_books(), date_from="2025-04-08", date_to="2025-04-10")
+
+    assert sorted(_labels(page)) == ["J008-仕入", "J009-売上", "J010-仕入"]
+    assert page["件数"] == 3
+
+
+def test_date_range_with_cursor():
+    books = _books()
+
+    first = _get(books, date_from="2025-04-05", limit=2)
+    second = _get(books, date_from="2025-04-05", limit=2, cursor=first["次カーソル"])
+
+    assert _labels(first) == ["J005-売上", "J006-仕入"]
+    assert sorted(_labels(second)) == ["J007-売上", "J008-仕入"]
+    # 件数はカーソルに関係なく、条件に合う明細全体の件数
+    assert first["件数"] == second["件数"] == 6
+
+
+def test_reversed_journal_range_is_empty():
+    books = _books()
+
+    page = _get(books, journal_from="J006", journal_to="J003")
+    summary = _get(books, journal_from="J006", journal_to="J003", summary=True)
+
+    assert _labels(page) == []
+    assert page["件数"] == 0
+    assert page["次カーソル"] is None
+    assert summary["件数"] == 0
+    assert summary["借方合計"] == summary["貸方合計"] == 0
+
+
+def test_summary():
+    summary = _get(_books(), journal_from="J001", date_to="2025-04-04", summary=True)
+
+    assert summary == {
+        "勘定": "現金",
+        "借方合計": 400,
+        "貸方合計": 600,
+        "借方件数": 2,
+        "貸方件数": 2,
+        "件数": 4,
+        "残高": 19500
+    }
+
+
+def test_duplicate_journal_id_is_rejected():
+    books = _books()
+
+    result = books.journal_entry({
+        "journal_id": "J003",
+        "debit": [{"account": "現金", "amount": 50}],
+        "credit": [{"account": "売上", "amount": 50}]
+    })
+
+    assert result["status"] == "error"
+    # 仕訳IDの範囲指定は、転記済みの仕訳のみを返す
+    page = _get(books, journal_from="J003", journal_to="J003")
+    assert _labels(page) == ["J003-売上"]
+
+
+def test_unknown_journal_id():
+    with pytest.raises(ValueError):
+        _get(_books(), journal_from="J999")
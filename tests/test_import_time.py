@@ -0,0 +1,61 @@
+"""
+エントリポイントの import 時間のテスト
+
+python -X importtime の出力から bokicast_mcp_server.main の累積 import 時間を取得し、
+起動時に重いライブラリ (FastMCP / PySide6 / numpy) を読み込んでいないことを確認する
+"""
+import subprocess
+import sys
+
+# bokicast_mcp_server.main の累積 import 時間の上限 (マイクロ秒)
+IMPORT_TIME_BUDGET_US = 200_000
+
+# 引数の解析前に読み込んではいけないモジュール
+HEAVY_MODULES = ["mcp", "PySide6", "numpy"]
+
+
+def _run_importtime(module: str) -> tuple[dict[str, int], str]:
+    """
+    python -X importtime で module を import し、{モジュール名: 累積時間(us)} と標準出力を返します。
+    """
+    code = f"import sys, {module}; print(' '.join(sorted(sys.modules)))"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        # 例: "import time:       730 |      31165 | bokicast_mcp_server.main"
+        _, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        cumulative[name] = int(cumulative_us)
+
+    return cumulative, proc.stdout
+
+
+def test_main_import_time_within_budget():
+    cumulative, _ = _run_importtime("bokicast_mcp_server.main")
+
+    assert "bokicast_mcp_server.main" in cumulative
+    assert cumulative["bokicast_mcp_server.main"] < IMPORT_TIME_BUDGET_US
+
+
+def test_main_does_not_import_heavy_modules():
+    _, stdout = _run_importtime("bokicast_mcp_server.main")
+    loaded = set(stdout.split())
+
+    for module in HEAVY_MODULES:
+        assert module not in loaded, f"{module} が bokicast_mcp_server.main の import 時に読み込まれています。"
+
+
+def test_service_does_not_import_pyside6():
+    # 💡 ヘッドレスモードで使用する mod_service は PySide6 を読み込まない
+    _, stdout = _run_importtime("bokicast_mcp_server.mod_service")
+    loaded = set(stdout.split())
+
+    assert "PySide6" not in loaded
@@ -0,0 +1,95 @@
+"""
+journal_entries のテスト
+
+NDJSON / JSON配列で受け取った複数の仕訳を1回でまとめて転記し、仕訳ごとの結果 (index 付き) を返すこと、
+正常な仕訳のみが転記され、スナップショットの公開・変更通知・仕訳ログへの追記が1回にまとまることを確認する
+"""
+import json
+
+from bokicast_mcp_server.mod_book_service import BookRegistry
+from bokicast_mcp_server.mod_ledger import parse_journal_list
+
+
+def _config(tmp_path) -> dict:
+    return {
+        "期首残高試算表": {
+            "純資産": {"資本金": 20000},
+            "資産": {"現金": 20000},
+            "費用": {"仕入": 0},
+            "収益": {"売上": 0}
+        },
+        "仕訳ログ": {"ファイル": str(tmp_path / "journal.jsonl")}
+    }
+
+
+def _journal(journal_id: str, debit: str, credit: str, amount) -> dict:
+    return {
+        "journal_id": journal_id,
+        "debit": [{"account": debit, "amount": amount}],
+        "credit": [{"account": credit, "amount": amount}]
+    }
+
+
+def test_parse_ndjson_and_json_array():
+    journals = [_journal("J001", "現金", "売上", 1000), _journal("J002", "仕入", "現金", 300)]
+    ndjson = "\n".join(json.dumps(journal, ensure_ascii=False) for journal in journals) + "\n\n"
+
+    assert parse_journal_list(ndjson) == journals
+    assert parse_journal_list(json.dumps(journals)) == journals
+
+
+def test_mixed_valid_and_invalid_entries(tmp_path):
+    books = BookRegistry(_config(tmp_path))
+    ndjson = "\n".join(json.dumps(journal, ensure_ascii=False) for journal in [
+        _journal("J001", "現金", "売上", 1000),
+        _journal("J002", "仕入", "存在しない勘定", 300),
+        _journal("J003", "仕入", "現金", 300),
+        _journal("J001", "現金", "売上", 50),
+        _journal("J004", "仕入", "現金", "300")
+    ])
+
+    results = books.journal_entries(parse_journal_list(ndjson))
+    books.close()
+
+    assert [(result["index"], result["journal_id"], result["status"]) for result in results] == [
+        (0, "J001", "ok"),
+        (1, "J002", "error"),
+        (2, "J003", "ok"),
+        (3, "J001", "error"),
+        (4, "J004", "error")
+    ]
+    # 💡 残高は各仕訳の転記直後の値
+    assert results[0]["balances"] == {"現金": 21000, "売上": -1000}
+    assert results[2]["balances"] == {"仕入": 300, "現金": 20700}
+    assert "存在しない勘定" in results[1]["error"]
+
+    assert json.loads(books.get_account_data("現金"))["残高"] == 20700
+    lines = (tmp_path / "journal.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["journal_id"] for line in lines] == ["J001", "J003"]
+
+
+def test_batch_is_published_and_notified_once(tmp_path):
+    books = BookRegistry(_config(tmp_path))
+    ledger = books.get().ledger_dict["当期"]
+    version = ledger.version
+    notified = []
+    ledger.add_listener(notified.append)
+
+    books.journal_entries([_journal(f"J{i:03d}", "現金", "売上", 100) for i in range(1, 6)])
+    books.close()
+
+    assert ledger.version == version + 1
+    assert notified == [["現金", "売上"]]
+
+
+def test_nothing_is_published_when_every_entry_fails(tmp_path):
+    books = BookRegistry(_config(tmp_path))
+    ledger = books.get().ledger_dict["当期"]
+    snapshot = ledger.snapshot
+
+    results = books.journal_entries([_journal("J001", "現金", "存在しない勘定", 100), "not a journal"])
+    books.close()
+
+    assert [result["status"] for result in results] == ["error", "error"]
+    assert results[1]["journal_id"] is None
+    assert ledger.snapshot is snapshot
@@ -0,0 +1,124 @@
+"""
+journal_entry ツールのテスト
+
+ツールが返す結果 (仕訳ID・転記した勘定の残高・エラー) と、転記済みの仕訳IDの拒否、
+GUI モードで Qt スレッドの転記がタイムアウトした場合に転記結果を「不明」として返すことを確認する
+"""
+import asyncio
+import json
+from concurrent.futures import Future
+
+import pytest
+
+from bokicast_mcp_server import mod_service
+from bokicast_mcp_server.mod_book_service import BookRegistry
+
+
+def _config() -> dict:
+    return {
+        "期首残高試算表": {
+            "純資産": {"資本金": 20000},
+            "負債": {"買掛金": 5000},
+            "資産": {"現金": 25000},
+            "費用": {"仕入": 0},
+            "収益": {"売上": 0}
+        }
+    }
+
+
+def _journal(journal_id: str, debit: str, credit: str, amount: int) -> dict:
+    return {
+        "journal_id": journal_id,
+        "debit": [{"account": debit, "amount": amount}],
+        "credit": [{"account": credit, "amount": amount}]
+    }
+
+
+class _StalledService:
+    """Qt スレッドが応答しない GUI モードの BokicastService を模したサービス"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, func, *args) -> Future:
+        self.calls += 1
+        return Future()
+
+    def journal_entry(self, journal_data: dict, entity: str = "") -> dict:
+        raise AssertionError("Qt スレッド以外から呼び出された")
+
+    journal_entries = journal_entry
+
+
+@pytest.fixture
+def headless(monkeypatch) -> BookRegistry:
+    books = BookRegistry(_config())
+    monkeypatch.setattr(mod_service, "_service", books)
+    monkeypatch.setattr(mod_service, "_headless", True)
+    return books
+
+
+def _call(tool, *args) -> dict:
+    return json.loads(asyncio.run(tool(*args)))
+
+
+def test_result_contains_journal_id_and_touched_balances(headless):
+    result = _call(mod_service.journal_entry, json.dumps(_journal("J001", "仕入", "買掛金", 1500)))
+
+    assert result == {"journal_id": "J001", "status": "ok", "balances": {"仕入": 1500, "買掛金": -6500}}
+
+
+def test_result_contains_error(headless):
+    result = _call(mod_service.journal_entry, json.dumps(_journal("J001", "仕入", "存在しない勘定", 1500)))
+
+    assert result["journal_id"] == "J001"
+    assert result["status"] == "error"
+    assert "存在しない勘定" in result["error"]
+    assert "balances" not in result
+
+
+def test_invalid_json(headless):
+    result = _call(mod_service.journal_entry, "{")
+
+    assert result["journal_id"] is None
+    assert result["status"] == "error"
+
+
+def test_resent_journal_is_not_posted_twice(headless):
+    data = json.dumps(_journal("J001", "現金", "売上", 1000))
+    _call(mod_service.journal_entry, data)
+
+    result = _call(mod_service.journal_entry, data)
+
+    assert result["status"] == "error"
+    assert "転記済み" in result["error"]
+    assert json.loads(headless.get_account_data("現金"))["残高"] == 26000
+
+
+def test_timeout_reports_unknown_outcome(monkeypatch):
+    service = _StalledService()
+    monkeypatch.setattr(mod_service, "_service", service)
+    monkeypatch.setattr(mod_service, "_headless", False)
+    monkeypatch.setattr(mod_service, "INVOKE_TIMEOUT", 0.01)
+
+    result = _call(mod_service.journal_entry, json.dumps(_journal("J001", "現金", "売上", 1000)))
+
+    assert service.calls == 1
+    assert result["journal_id"] == "J001"
+    assert result["status"] == "unknown"
+    assert "J001" in result["error"]
+
+
+def test_batch_timeout_reports_unknown_outcome_per_journal(monkeypatch):
+    monkeypatch.setattr(mod_service, "_service", _StalledService())
+    monkeypatch.setattr(mod_service, "_headless", False)
+    monkeypatch.setattr(mod_service, "INVOKE_TIMEOUT", 0.01)
+    monkeypatch.setattr(mod_service, "INVOKE_TIMEOUT_PER_JOURNAL", 0.001)
+
+    journals = [_journal("J001", "現金", "売上", 1000), _journal("J002", "仕入", "現金", 300)]
+    results = _call(mod_service.journal_entries, json.dumps(journals))
+
+    assert [(result["index"], result["journal_id"], result["status"]) for result in results] == [
+        (0, "J001", "unknown"),
+        (1, "J002", "unknown")
+    ]
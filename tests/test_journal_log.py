@@ -0,0 +1,102 @@
+"""
+仕訳ログのテスト
+
+転記した仕訳が仕訳ログへ追記され、再起動時 (BookRegistry の作り直し) に当期の帳簿へ再適用されることを確認する
+"""
+import json
+
+from bokicast_mcp_server.mod_book_service import BookRegistry
+
+
+def _config(tmp_path) -> dict:
+    return {
+        "期首残高試算表": {
+            "純資産": {"資本金": 30000},
+            "資産": {"現金": 20000, "売掛金": 10000},
+            "費用": {"仕入": 0},
+            "収益": {"売上": 0}
+        },
+        "P社": {
+            "純資産": {"P:資本金": 1000},
+            "資産": {"P:現金": 1000},
+            "収益": {"P:売上": 0}
+        },
+        "仕訳ログ": {"ファイル": str(tmp_path / "journal.jsonl"), "同期件数": 2}
+    }
+
+
+def _journal(journal_id: str, debit: str, credit: str, amount: int, **extra) -> dict:
+    return {
+        "journal_id": journal_id,
+        "debit": [{"account": debit, "amount": amount}],
+        "credit": [{"account": credit, "amount": amount}],
+        **extra
+    }
+
+
+def test_replay_after_restart(tmp_path):
+    conf = _config(tmp_path)
+    books = BookRegistry(conf)
+    books.journal_entry(_journal("J001", "現金", "売上", 1000, date="2025-04-01", remarks="売上計上"))
+    books.journal_entry(_journal("J002", "仕入", "現金", 300))
+    books.journal_entry(_journal("P001", "P:現金", "P:売上", 500), "P社")
+    bs_data = books.get_bs_data()
+    account_data = books.get_account_data("現金")
+    books.close()
+
+    restarted = BookRegistry(conf)
+
+    assert restarted.get_bs_data() == bs_data
+    assert restarted.get_account_data("現金") == account_data
+    assert json.loads(restarted.get_account_data("P:現金", "P社"))["残高"] == 1500
+    assert restarted.get().ledger_dict["当期"].journals["J001"]["remarks"] == "売上計上"
+    assert json.loads(restarted.get_bs_data())["前期"]["資産"]["現金"] == 20000
+    restarted.close()
+
+
+def test_rejected_journal_is_not_logged(tmp_path):
+    conf = _config(tmp_path)
+    books = BookRegistry(conf)
+    books.journal_entry(_journal("J001", "現金", "売上", 1000))
+    result = books.journal_entry(_journal("J002", "現金", "存在しない勘定", 1000))
+    books.close()
+
+    assert result["status"] == "error"
+    lines = (tmp_path / "journal.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["journal_id"] for line in lines] == ["J001"]
+
+    restarted = BookRegistry(conf)
+    assert json.loads(restarted.get_account_data("現金"))["残高"] == 21000
+    restarted.close()
+
+
+def test_entity_log_file(tmp_path):
+    conf = _config(tmp_path)
+    books = BookRegistry(conf)
+    books.journal_entry(_journal("P001", "P:現金", "P:売上", 500), "P社")
+    books.close()
+
+    assert (tmp_path / "journal.P社.jsonl").exists()
+    assert (tmp_path / "journal.jsonl").read_text(encoding="utf-8") == ""
+
+
+def test_incomplete_last_line_is_skipped(tmp_path):
+    conf = _config(tmp_path)
+    books = BookRegistry(conf)
+    books.journal_entry(_journal("J001", "現金", "売上", 1000))
+    books.close()
+
+    # 💡 書き込み途中でクラッシュした行を再現する
+    with open(tmp_path / "journal.jsonl", "ab") as f:
+        f.write(b'{"journal_id": "J002", "debit": [')
+
+    restarted = BookRegistry(conf)
+    assert json.loads(restarted.get_account_data("現金"))["残高"] == 21000
+
+    # 不完全な行の後に追記した仕訳も、次回の起動時に再適用される
+    restarted.journal_entry(_journal("J003", "現金", "売上", 200))
+    restarted.close()
+
+    again = BookRegistry(conf)
+    assert json.loads(again.get_account_data("現金"))["残高"] == 21200
+    again.close()
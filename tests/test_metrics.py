@@ -0,0 +1,121 @@
+"""
+メトリクスのテスト
+
+レイテンシのヒストグラムの区間、ツールの失敗 (_failed の結果と例外) の数え方、
+MetricsDumper の停止時の書き出しと、get_server_stats の結果を確認する
+"""
+import asyncio
+import json
+
+import pytest
+
+from bokicast_mcp_server import mod_service
+from bokicast_mcp_server.mod_book_service import BookRegistry
+from bokicast_mcp_server.mod_metrics import HISTOGRAM_BOUNDS_MS, MetricsDumper, ServerMetrics, ToolMetrics
+
+
+@pytest.fixture
+def metrics(monkeypatch) -> ServerMetrics:
+    metrics = ServerMetrics()
+    monkeypatch.setattr(mod_service, "_metrics", metrics)
+    return metrics
+
+
+def test_histogram_buckets():
+    metrics = ToolMetrics()
+    # 💡 上限値ちょうどはその区間に含め、最大の上限値を超えたものは最後の区間に数える
+    for ms in [0.5, 1, 1.5, 10, 10.001, 10000, 10001]:
+        metrics.record(ms / 1000, False)
+
+    histogram = metrics.histogram()
+
+    assert list(histogram) == [f"<={bound}" for bound in HISTOGRAM_BOUNDS_MS] + [">10000"]
+    assert histogram["<=1"] == 2
+    assert histogram["<=2"] == 1
+    assert histogram["<=10"] == 1
+    assert histogram["<=20"] == 1
+    assert histogram["<=10000"] == 1
+    assert histogram[">10000"] == 1
+    assert sum(histogram.values()) == metrics.count == 7
+    assert metrics.to_dict()["最大ms"] == 10001
+
+
+def test_failures_are_counted(metrics):
+    @mod_service._instrumented
+    async def ok_tool() -> str:
+        return "ok"
+
+    @mod_service._instrumented
+    async def failed_tool() -> str:
+        return mod_service._failed("error")
+
+    @mod_service._instrumented
+    async def raising_tool() -> str:
+        raise RuntimeError("error")
+
+    assert asyncio.run(ok_tool()) == "ok"
+    assert asyncio.run(failed_tool()) == "error"
+    with pytest.raises(RuntimeError):
+        asyncio.run(raising_tool())
+    asyncio.run(ok_tool())
+
+    tools = metrics.to_dict()["ツール"]
+    assert {tool: (stats["呼び出し数"], stats["エラー数"]) for tool, stats in tools.items()} == {
+        "ok_tool": (2, 0),
+        "failed_tool": (1, 1),
+        "raising_tool": (1, 1)
+    }
+    # 💡 失敗の記録は呼び出しごとにリセットされる
+    assert mod_service._tool_failed.get() is False
+
+
+def test_dumper_writes_on_stop(tmp_path):
+    path = tmp_path / "metrics.json"
+    dumper = MetricsDumper(str(path), 60, lambda: {"呼び出し数": 1})
+
+    dumper.start()
+    dumper.stop()
+
+    assert json.loads(path.read_text(encoding="utf-8")) == {"呼び出し数": 1}
+    assert not dumper._thread.is_alive()
+    assert not (tmp_path / "metrics.json.tmp").exists()
+
+
+def test_dumper_stop_without_start(tmp_path):
+    path = tmp_path / "metrics.json"
+
+    MetricsDumper(str(path), 60, lambda: {"呼び出し数": 0}).stop()
+
+    assert json.loads(path.read_text(encoding="utf-8")) == {"呼び出し数": 0}
+
+
+def test_dumper_from_config(tmp_path):
+    assert MetricsDumper.from_config({}, dict) is None
+
+    dumper = MetricsDumper.from_config({"メトリクス": {"ファイル": str(tmp_path / "metrics.json"), "間隔秒": 0}}, dict)
+    assert dumper.interval == 1.0
+
+
+def test_get_server_stats(metrics, monkeypatch):
+    books = BookRegistry({
+        "期首残高試算表": {
+            "純資産": {"資本金": 1000},
+            "資産": {"現金": 1000},
+            "収益": {"売上": 0}
+        }
+    })
+    monkeypatch.setattr(mod_service, "_service", books)
+    monkeypatch.setattr(mod_service, "_headless", True)
+
+    asyncio.run(mod_service.journal_entry(json.dumps({
+        "journal_id": "J001",
+        "debit": [{"account": "現金", "amount": 100}],
+        "credit": [{"account": "売上", "amount": 100}]
+    })))
+    stats = json.loads(asyncio.run(mod_service.get_server_stats()))
+
+    assert stats["ツール"]["journal_entry"]["呼び出し数"] == 1
+    assert stats["転記待ち"] == {"件数": 0, "最大件数": 1}
+    # 💡 ヘッドレスモードには Qt スレッドがない
+    assert "Qtキュー" not in stats
+    assert stats["帳簿"]["期首残高試算表"]["当期"]["仕訳数"] == 1
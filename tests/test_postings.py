@@ -0,0 +1,92 @@
+"""
+明細テーブルとスナップショットのテスト
+
+PostingTable.totals の差分集計とキャッシュ、転記後に古いスナップショットを参照した場合の集計結果、
+LedgerSnapshot の残高と T字勘定がスナップショット時点の明細のみから求められることを確認する
+"""
+import pytest
+
+from bokicast_mcp_server.mod_ledger import Ledger
+from bokicast_mcp_server.mod_postings import CREDIT, DEBIT, NO_JOURNAL, PostingTable
+
+
+def _ledger() -> Ledger:
+    return Ledger.from_opening_balances({
+        "純資産": {"資本金": 1000},
+        "資産": {"現金": 1000},
+        "収益": {"売上": 0}
+    })
+
+
+def _post(ledger: Ledger, journal_id: str, amount: int):
+    ledger.post({
+        "journal_id": journal_id,
+        "debit": [{"account": "現金", "amount": amount}],
+        "credit": [{"account": "売上", "amount": amount}]
+    })
+
+
+def test_totals_are_aggregated_incrementally():
+    table = PostingTable(capacity=2)
+    table.append(0, NO_JOURNAL, DEBIT, 100)
+    table.append(1, NO_JOURNAL, CREDIT, 100)
+
+    first = table.totals(2, 2)
+    assert table.totals(2, 2) is first
+
+    # 💡 容量を超えて追記し、増えた行のみを集計してキャッシュに加算する
+    table.append(0, 0, DEBIT, 30)
+    table.append(2, 0, CREDIT, 30)
+    totals = table.totals(4, 3)
+
+    assert totals.debit_total.tolist() == [130, 0, 0]
+    assert totals.credit_total.tolist() == [0, 100, 30]
+    assert totals.debit_count.tolist() == [2, 0, 0]
+    assert totals.credit_count.tolist() == [0, 1, 1]
+    assert totals.balance.tolist() == [130, -100, -30]
+
+
+def test_old_snapshot_totals_after_newer_posts():
+    ledger = _ledger()
+    _post(ledger, "J001", 100)
+    old = ledger.snapshot
+    _post(ledger, "J002", 200)
+    _post(ledger, "J003", 300)
+    new = ledger.snapshot
+
+    new_totals = new.totals()
+    assert ledger.postings._totals_cache[0] == new.size
+
+    # 💡 キャッシュ済みの行数がスナップショットより多い場合は先頭から集計し直す
+    old_totals = old.totals()
+    cash = old.chart.get_id("現金")
+    assert int(old_totals.debit_total[cash]) == 1100
+    assert old.get_balance("現金") == 1100
+    assert old.get_bs_data()["資産"] == {"現金": 1100}
+
+    # 少ない行数の集計結果でキャッシュを置き換えない
+    assert ledger.postings._totals_cache[0] == new.size
+    assert new.totals() is new_totals
+    assert new.get_balance("現金") == 1600
+
+
+def test_old_snapshot_account_data():
+    ledger = _ledger()
+    _post(ledger, "J001", 100)
+    old = ledger.snapshot
+    _post(ledger, "J002", 200)
+
+    account_data = old.get_account_data("現金")
+
+    assert account_data["借方"] == [{"ラベル": "期首残高", "金額": 1000}, {"ラベル": "J001-売上", "金額": 100}]
+    assert account_data["貸方"] == []
+    assert account_data["残高"] == 1100
+    assert ledger.snapshot.get_account_data("売上")["残高"] == -300
+
+
+def test_unknown_account():
+    snapshot = _ledger().snapshot
+
+    with pytest.raises(ValueError, match="存在しません"):
+        snapshot.get_balance("存在しない勘定")
+    assert snapshot.get_account_data("存在しない勘定") is None
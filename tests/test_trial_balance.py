@@ -0,0 +1,124 @@
+"""
+合計残高試算表のテスト
+
+get_trial_balance ツールと get_trial_balance_data が返す勘定ごとの借方・貸方の合計と残高、
+貸借一致の判定、連結帳簿の試算表を確認する
+"""
+import asyncio
+import json
+
+from bokicast_mcp_server import mod_service
+from bokicast_mcp_server.mod_book_service import BookRegistry, CONSOLIDATED_ENTITY
+
+
+def _config() -> dict:
+    return {
+        "期首残高試算表": {
+            "純資産": {"資本金": 30000},
+            "資産": {"現金": 20000, "売掛金": 10000, "備品": 0},
+            "費用": {"仕入": 0},
+            "収益": {"売上": 0}
+        }
+    }
+
+
+def _journal(journal_id: str, debit: str, credit: str, amount: int) -> dict:
+    return {
+        "journal_id": journal_id,
+        "debit": [{"account": debit, "amount": amount}],
+        "credit": [{"account": credit, "amount": amount}]
+    }
+
+
+def _rows(trial_balance: dict) -> dict:
+    return {
+        row["勘定"]: (row["区分"], row["借方合計"], row["貸方合計"], row["借方残高"], row["貸方残高"])
+        for row in trial_balance["勘定"]
+    }
+
+
+def test_totals_per_account():
+    books = BookRegistry(_config())
+    books.journal_entry(_journal("J001", "現金", "売上", 5000))
+    books.journal_entry(_journal("J002", "仕入", "現金", 2000))
+    books.journal_entry(_journal("J003", "現金", "売掛金", 3000))
+
+    data = json.loads(books.get_trial_balance_data())
+    current = data["当期"]
+
+    # 💡 明細のない勘定 (備品) は含めない
+    assert _rows(current) == {
+        "資本金": ("純資産", 0, 30000, 0, 30000),
+        "現金": ("資産", 28000, 2000, 26000, 0),
+        "売掛金": ("資産", 10000, 3000, 7000, 0),
+        "仕入": ("費用", 2000, 0, 2000, 0),
+        "売上": ("収益", 0, 5000, 0, 5000)
+    }
+    assert current["合計"] == {"借方合計": 40000, "貸方合計": 40000, "借方残高": 35000, "貸方残高": 35000}
+    assert current["貸借一致"] is True
+    assert data["前期"]["合計"]["借方合計"] == 30000
+    assert data["貸借一致"] is True
+
+
+def test_unbalanced_opening_balances():
+    conf = _config()
+    conf["期首残高試算表"]["資産"]["現金"] = 25000
+
+    data = json.loads(BookRegistry(conf).get_trial_balance_data())
+
+    assert data["当期"]["合計"]["借方合計"] == 35000
+    assert data["当期"]["合計"]["貸方合計"] == 30000
+    assert data["当期"]["貸借一致"] is False
+    assert data["貸借一致"] is False
+
+
+def test_tool_returns_trial_balance(monkeypatch):
+    books = BookRegistry(_config())
+    books.journal_entry(_journal("J001", "現金", "売上", 5000))
+    monkeypatch.setattr(mod_service, "_service", books)
+
+    data = json.loads(asyncio.run(mod_service.get_trial_balance()))
+
+    assert data == json.loads(books.get_trial_balance_data())
+    assert _rows(data["当期"])["売上"] == ("収益", 0, 5000, 0, 5000)
+
+    error = asyncio.run(mod_service.get_trial_balance("存在しない会社"))
+    assert error.startswith("エラーが発生しました")
+
+
+def test_consolidated_trial_balance():
+    books = BookRegistry({
+        "モード": "連結",
+        "期首残高試算表": {
+            "純資産": {"資本金": 1000},
+            "資産": {"現金": 1000}
+        },
+        "P社": {
+            "P:純資産": {"P:資本金": 40000},
+            "資産": {"P:現金": 20000, "P:S社株式": 20000}
+        },
+        "S社": {
+            "純資産": {"S:資本金": 15000},
+            "資産": {"S:現金": 15000},
+            "収益": {"S:売上": 0}
+        },
+        "連結": {
+            "親会社": "P社",
+            "子会社": ["S社"],
+            "相殺消去": [{"名称": "投資と資本の相殺消去", "勘定": ["P:S社株式", "S:資本金"]}]
+        }
+    })
+    books.journal_entry(_journal("S001", "S:現金", "S:売上", 500), "S社")
+
+    data = json.loads(books.get_trial_balance_data(CONSOLIDATED_ENTITY))
+    current = data["当期"]
+
+    # 💡 S社株式 20,000 - S社の資本 15,000 = のれん 5,000 (相殺消去した勘定は含めない)
+    assert _rows(current) == {
+        "資本金": ("純資産", 0, 40000, 0, 40000),
+        "現金": ("資産", 35500, 0, 35500, 0),
+        "売上": ("収益", 0, 500, 0, 500),
+        "のれん": ("資産", 5000, 0, 5000, 0)
+    }
+    assert current["貸借一致"] is True
+    assert data["貸借一致"] is True